@@ -250,6 +250,17 @@ DEFAULT_CONFIGS = {
     "measurement": DEFAULT_MEAS_CONFIG,
 }
 
+# Settings keys and defaults for performance tuning
+PLOT_CACHE_SIZE_KEY = "performance/plot_cache_mb"
+DEFAULT_PLOT_CACHE_SIZE_MB = 128
+# Number of processes simulating conditions in parallel, 0: one per core
+SIMULATION_WORKERS_KEY = "performance/simulation_workers"
+DEFAULT_SIMULATION_WORKERS = 0
+SIMULATION_CACHE_SIZE_KEY = "performance/simulation_cache_mb"
+DEFAULT_SIMULATION_CACHE_SIZE_MB = 256
+# Name of the simulator backend, see petab_gui.simulators
+SIMULATOR_BACKEND_KEY = "performance/simulator_backend"
+
 COMMON_ERRORS = {
     r"Error parsing '': Syntax error at \d+:\d+: mismatched input '<EOF>' "
     r"expecting \{[^}]+\}": "Invalid empty cell!"
@@ -1,3 +1,10 @@
 """Package for the PETAB GUI."""
 
-from .app import main
+
+def main():
+    """Start the PEtab GUI, see :func:`petab_gui.app.main`."""
+    # Imported on use, so that worker processes importing parts of the
+    # package do not load the Qt application
+    from .app import main
+
+    main()
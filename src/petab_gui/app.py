@@ -13,6 +13,7 @@ from .C import APP_NAME
 from .controllers import MainController
 from .models import PEtabModel
 from .views import MainWindow
+from .views.plot_export import EXPORT_FORMATS
 
 
 def find_example(path: Path) -> Path:
@@ -111,6 +112,28 @@ class PEtabGuiApp(QApplication):
             pass
 
 
+def _export_plots(args) -> int:
+    """Export the plots of a PEtab problem, see :func:`main`."""
+    import petab.v1 as petab
+
+    from .views.plot_export import export_plots
+
+    problem = petab.Problem.from_yaml(args.petab_yaml)
+    simulation_df = None
+    if args.simulations:
+        simulation_df = petab.get_simulation_df(args.simulations)
+    written = export_plots(
+        problem,
+        args.export_plots,
+        formats=args.formats or ["png"],
+        simulation_df=simulation_df,
+        max_workers=args.jobs,
+    )
+    for path in written:
+        sys.stdout.write(f"{path}\n")
+    return 0 if written else 1
+
+
 def main():
     """Entry point for the PEtab GUI application.
 
@@ -132,8 +155,41 @@ def main():
     parser.add_argument(
         "petab_yaml", nargs="?", help="Path to the PEtab YAML file"
     )
+    export = parser.add_argument_group(
+        "plot export",
+        "Render all plots of the problem to files without opening the GUI.",
+    )
+    export.add_argument(
+        "--export-plots",
+        metavar="DIR",
+        help="Directory to write the plots of PETAB_YAML to",
+    )
+    export.add_argument(
+        "--format",
+        dest="formats",
+        action="append",
+        choices=EXPORT_FORMATS,
+        help="File format of the exported plots, may be repeated "
+        "(default: png)",
+    )
+    export.add_argument(
+        "--simulations",
+        metavar="FILE",
+        help="Simulation table to plot together with the measurements",
+    )
+    export.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: number of CPUs)",
+    )
     args = parser.parse_args()
 
+    if args.export_plots:
+        if not args.petab_yaml:
+            parser.error("--export-plots requires PETAB_YAML")
+        sys.exit(_export_plots(args))
+
     if sys.platform == "darwin":
         try:
             from Foundation import NSBundle  # type: ignore[import]
@@ -81,6 +81,8 @@ class FileIOController:
         if not file_name:
             return False
 
+        # Save the result of a pending Antimony to SBML conversion
+        self.main.sbml_controller.flush_conversion()
         if filtering == "COMBINE Archive (*.omex)":
             self.model.save_as_omex(file_name)
         elif filtering == "Folder":
@@ -161,6 +163,7 @@ class FileIOController:
         bool
             True if exported successfully, False otherwise.
         """
+        self.main.sbml_controller.flush_conversion()
         if not self.model.sbml or not self.model.sbml.sbml_text:
             QMessageBox.warning(
                 self.view,
@@ -732,4 +735,5 @@ class FileIOController:
         petab.Problem
             The current PEtab problem.
         """
+        self.main.sbml_controller.flush_conversion()
         return self.model.current_petab_problem
@@ -439,6 +439,14 @@ class MainController:
             qta.icon("mdi6.play"), "Simulate", self.view
         )
         actions["simulate"].triggered.connect(self.simulation.simulate)
+        actions["simulate_ensemble"] = QAction(
+            qta.icon("mdi6.chart-bell-curve"),
+            "Simulate Ensemble...",
+            self.view,
+        )
+        actions["simulate_ensemble"].triggered.connect(
+            self.simulation.simulate_ensemble
+        )
 
         # Filter widget
         filter_widget = QWidget()
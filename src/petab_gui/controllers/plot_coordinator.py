@@ -10,7 +10,7 @@ and selection synchronization operations, including:
 
 from PySide6.QtCore import Qt, QTimer
 
-from ..utils import get_selected
+from ..utils import get_selected_rows
 
 
 class PlotCoordinator:
@@ -102,53 +102,18 @@ class PlotCoordinator:
     def update_plot(self):
         """Update the plot with the selected measurement data.
 
-        Extracts the selected data points from the measurement table and
-        updates the plot visualization with this data. The plot shows all
-        data for the selected observables with the selected points highlighted.
+        Gathers the unique selected rows of the measurement table as one
+        integer array and highlights the corresponding points in the plots
+        of their observables.
         """
-        selection_model = (
-            self.view.measurement_dock.table_view.selectionModel()
-        )
-        indexes = selection_model.selectedIndexes()
-        if not indexes:
+        if self.plotter is None:
             return
-
-        selected_points = {}
-        for index in indexes:
-            if index.row() == self.model.measurement.get_df().shape[0]:
-                continue
-            row = index.row()
-            observable_id = self.model.measurement._data_frame.iloc[row][
-                "observableId"
-            ]
-            if observable_id not in selected_points:
-                selected_points[observable_id] = []
-            selected_points[observable_id].append(
-                {
-                    "x": self.model.measurement._data_frame.iloc[row]["time"],
-                    "y": self.model.measurement._data_frame.iloc[row][
-                        "measurement"
-                    ],
-                }
-            )
-        if selected_points == {}:
+        selected_rows = get_selected_rows(
+            self.view.measurement_dock.table_view
+        )
+        if not selected_rows.size:
             return
-
-        measurement_data = self.model.measurement._data_frame
-        plot_data = {"all_data": [], "selected_points": selected_points}
-        for observable_id in selected_points:
-            observable_data = measurement_data[
-                measurement_data["observableId"] == observable_id
-            ]
-            plot_data["all_data"].append(
-                {
-                    "observable_id": observable_id,
-                    "x": observable_data["time"].tolist(),
-                    "y": observable_data["measurement"].tolist(),
-                }
-            )
-
-        self.view.plot_dock.update_visualization(plot_data)
+        self.plotter.highlight_from_selection(selected_rows)
 
     def _schedule_plot_update(self):
         """Start the plot schedule timer.
@@ -158,31 +123,12 @@ class PlotCoordinator:
         """
         self._plot_update_timer.start()
 
-    def _floats_match(self, a, b, epsilon=1e-9):
-        """Check if two floats match within epsilon tolerance.
-
-        Parameters
-        ----------
-        a : float
-            First value to compare.
-        b : float
-            Second value to compare.
-        epsilon : float, optional
-            Tolerance for comparison (default: 1e-9).
-
-        Returns
-        -------
-        bool
-            True if |a - b| < epsilon, False otherwise.
-        """
-        return abs(a - b) < epsilon
-
     def _on_plot_point_clicked(self, x, y, label, data_type):
         """Handle plot point clicks and select corresponding table row.
 
-        Uses epsilon tolerance for floating-point comparison to avoid
-        precision issues. Synchronizes the table selection with the clicked
-        plot point.
+        Resolves the point via the plotter's hash index of plotted points,
+        which tolerates floating point noise. Synchronizes the table
+        selection with the clicked plot point.
 
         Parameters
         ----------
@@ -204,81 +150,40 @@ class PlotCoordinator:
             )
             return
 
-        # Extract observable ID from label
-        proxy = self.main.measurement_controller.proxy_model
         view = self.main.measurement_controller.view.table_view
         if data_type == "simulation":
-            proxy = self.main.simulation_controller.proxy_model
             view = self.main.simulation_controller.view.table_view
         obs = label
 
-        x_axis_col = "time"
-        y_axis_col = data_type
-        observable_col = "observableId"
-
-        # Get column indices with error handling
-        def column_index(name):
-            for col in range(proxy.columnCount()):
-                if proxy.headerData(col, Qt.Horizontal) == name:
-                    return col
-            raise ValueError(f"Column '{name}' not found.")
-
-        try:
-            x_col = column_index(x_axis_col)
-            y_col = column_index(y_axis_col)
-            obs_col = column_index(observable_col)
-        except ValueError as e:
-            self.logger.log_message(
-                f"Table selection failed: {e}",
-                color="red",
-            )
-            return
-
-        # Search for matching row using epsilon tolerance for floats
-        matched = False
-        for row in range(proxy.rowCount()):
-            row_obs = proxy.index(row, obs_col).data()
-            row_x = proxy.index(row, x_col).data()
-            row_y = proxy.index(row, y_col).data()
-            try:
-                row_x, row_y = float(row_x), float(row_y)
-            except ValueError:
-                continue
-
-            # Use epsilon tolerance for float comparison
-            if (
-                row_obs == obs
-                and self._floats_match(row_x, x)
-                and self._floats_match(row_y, y)
-            ):
-                # Manually update highlight BEFORE selecting row
-                # This ensures the circle appears even though we skip
-                # the signal handler
-                if data_type == "measurement":
-                    self.plotter.highlight_from_selection([row])
-                else:
-                    self.plotter.highlight_from_selection(
-                        [row],
-                        proxy=self.main.simulation_controller.proxy_model,
-                        y_axis_col="simulation",
-                    )
-
-                # Set flag to prevent redundant highlight update from signal
-                self._updating_from_plot = True
-                try:
-                    view.selectRow(row)
-                    matched = True
-                finally:
-                    self._updating_from_plot = False
-                break
-
-        # Provide feedback if no match found
-        if not matched:
+        # Hash lookup of the matching row, tolerating floating point noise
+        rows = self.plotter.rows_for_point(x, y, obs, data_type)
+        if not rows:
             self.logger.log_message(
                 f"No matching row found for plot point "
                 f"(obs={obs}, x={x:.4g}, y={y:.4g})",
                 color="orange",
             )
+            return
+        row = rows[0]
+
+        # Manually update highlight BEFORE selecting row
+        # This ensures the circle appears even though we skip
+        # the signal handler
+        if data_type == "measurement":
+            self.plotter.highlight_from_selection([row])
+        else:
+            self.plotter.highlight_from_selection(
+                [row],
+                proxy=self.main.simulation_controller.proxy_model,
+                y_axis_col="simulation",
+            )
+
+        # Set flag to prevent redundant highlight update from signal
+        self._updating_from_plot = True
+        try:
+            view.selectRow(row)
+        finally:
+            self._updating_from_plot = False
 
     def _handle_table_selection_changed(
         self, table_view, proxy=None, y_axis_col="measurement"
@@ -305,7 +210,7 @@ class PlotCoordinator:
         # Set flag to prevent infinite loop if highlight triggers selection
         self._updating_from_table = True
         try:
-            selected_rows = get_selected(table_view)
+            selected_rows = get_selected_rows(table_view)
             if proxy:
                 self.plotter.highlight_from_selection(
                     selected_rows, proxy=proxy, y_axis_col=y_axis_col
@@ -4,13 +4,21 @@ from pathlib import Path
 
 import libsbml
 from petab.models.sbml_model import SbmlModel
-from PySide6.QtCore import QObject, Signal
-from PySide6.QtWidgets import QFileDialog
+from PySide6.QtCore import QObject, Qt, QTimer, Signal
+from PySide6.QtWidgets import QApplication, QFileDialog
 
 from ..C import DEFAULT_ANTIMONY_TEXT
 from ..models.sbml_model import SbmlViewerModel
-from ..models.sbml_utils import sbml_to_antimony
+from ..models.sbml_utils import convert_model_text
 from ..views.sbml_view import SbmlViewer
+from .simulation_runner import SimulationRunner
+
+#: Delay in ms before converting, to coalesce repeated requests
+CONVERSION_DELAY = 200
+#: Error message if the conversion process died, see SimulationRunner
+CONVERSION_EXIT_MESSAGE = (
+    "Conversion process exited unexpectedly (code {exitcode})."
+)
 
 
 class SbmlController(QObject):
@@ -44,9 +52,24 @@ class SbmlController(QObject):
         self.model = model
         self.logger = logger
         self.mother_controller = mother_controller
+        # Conversions run in a worker process, keeping the GUI responsive.
+        # The process is kept between conversions, see request_conversion.
+        self.converter = SimulationRunner(
+            parent=self, exit_message=CONVERSION_EXIT_MESSAGE
+        )
+        self.converter.finished.connect(self._on_converted)
+        self.converter.failed.connect(self._on_conversion_failed)
+        # The requested conversion as (text, to_sbml) and the direction of
+        # the running one
+        self._conversion = None
+        self._converting_to_sbml = None
+        self._conversion_timer = QTimer(self)
+        self._conversion_timer.setSingleShot(True)
+        self._conversion_timer.setInterval(CONVERSION_DELAY)
+        self._conversion_timer.timeout.connect(self._start_conversion)
         # set the texts once
-        self.view.sbml_text_edit.setPlainText(self.model.sbml_text)
-        self.view.antimony_text_edit.setPlainText(self.model.antimony_text)
+        self.view.sbml_text_edit.set_model_text(self.model.sbml_text)
+        self.view.antimony_text_edit.set_model_text(self.model.antimony_text)
         self.setup_connections()
 
     def setup_connections(self):
@@ -64,40 +87,126 @@ class SbmlController(QObject):
             "Resetting the model to the original SBML and Antimony text",
             color="orange",
         )
-        self.model.sbml_text = libsbml.writeSBMLToString(
-            self.model._sbml_model_original.sbml_model.getSBMLDocument()
+        self._set_sbml_text(
+            libsbml.writeSBMLToString(
+                self.model._sbml_model_original.sbml_model.getSBMLDocument()
+            )
         )
-        self.model.antimony_text = sbml_to_antimony(self.model.sbml_text)
-        self.view.sbml_text_edit.setPlainText(self.model.sbml_text)
-        self.view.antimony_text_edit.setPlainText(self.model.antimony_text)
 
     def update_antimony_from_sbml(self):
-        """Convert current SBML to Antimony and update the Antimony text."""
-        self.model.sbml_text = self.view.sbml_text_edit.toPlainText()
-        try:
-            self.model.convert_sbml_to_antimony()
-        except Exception as e:
-            self.logger.log_message(
-                f"Failed to convert SBML to Antimony: {str(e)}", color="red"
-            )
-            return
-        self.logger.log_message("Converting SBML to Antimony", color="green")
-        self.view.antimony_text_edit.setPlainText(self.model.antimony_text)
-        self.model.something_changed.emit(True)
+        """Convert current SBML to Antimony and update the Antimony text.
+
+        The conversion runs in the background, see
+        :meth:`request_conversion`.
+        """
+        self.model.sbml_text = self.view.sbml_text_edit.model_text()
+        self.request_conversion(self.model.sbml_text, to_sbml=False)
 
     def update_sbml_from_antimony(self):
-        """Convert current Antimony to SBML and update the SBML text."""
-        self.model.antimony_text = self.view.antimony_text_edit.toPlainText()
+        """Convert current Antimony to SBML and update the SBML text.
+
+        The conversion runs in the background, see
+        :meth:`request_conversion`.
+        """
+        self.model.antimony_text = self.view.antimony_text_edit.model_text()
+        self.request_conversion(self.model.antimony_text, to_sbml=True)
+
+    def request_conversion(self, text: str, to_sbml: bool):
+        """Convert ``text`` in a worker process.
+
+        Requests within :data:`CONVERSION_DELAY` ms are coalesced, only the
+        last one is converted. A request made while converting cancels the
+        running conversion once its delay passed, and is converted in a new
+        worker process. Otherwise the worker process is kept between
+        conversions. The result replaces the text of the other editor.
+
+        See :meth:`flush_conversion` to wait for the result.
+
+        Parameters
+        ----------
+        text: str
+            The Antimony or SBML text to convert.
+        to_sbml: bool
+            Whether to convert Antimony to SBML or SBML to Antimony.
+        """
+        self._conversion = (text, to_sbml)
+        self._conversion_timer.start()
+
+    def cancel_conversion(self):
+        """Drop requested conversions and cancel a running one."""
+        self._conversion_timer.stop()
+        self._conversion = None
+        self.converter.cancel()
+
+    def is_converting(self) -> bool:
+        """Whether a conversion is requested or running."""
+        return self._conversion is not None or self.converter.is_running()
+
+    def flush_conversion(self):
+        """Finish requested and running conversions.
+
+        Blocks until the converted text is in the model, so that saving,
+        checking or simulating the model right after requesting a
+        conversion uses its result.
+        """
+        if not self.is_converting():
+            return
+        QApplication.setOverrideCursor(Qt.WaitCursor)
         try:
-            self.model.convert_antimony_to_sbml()
-        except Exception as e:
+            if self._conversion_timer.isActive():
+                self._conversion_timer.stop()
+                self._start_conversion()
+            self.converter.wait()
+        finally:
+            QApplication.restoreOverrideCursor()
+
+    def _start_conversion(self):
+        """Start the requested conversion, cancelling a running one."""
+        if self._conversion is None:
+            return
+        # The running conversion is superseded
+        self.converter.cancel()
+        text, to_sbml = self._conversion
+        self._conversion = None
+        self._converting_to_sbml = to_sbml
+        self.logger.log_message(
+            f"Converting {self._conversion_direction()}", color="green"
+        )
+        self.converter.run(convert_model_text, text, to_sbml)
+
+    def _conversion_direction(self):
+        """Describe the direction of the running conversion."""
+        if self._converting_to_sbml:
+            return "Antimony to SBML"
+        return "SBML to Antimony"
+
+    def _is_outdated(self) -> bool:
+        """Whether a newer conversion waits for its delay to pass."""
+        return self._conversion is not None
+
+    def _on_converted(self, text):
+        """Update the model and the editor with a finished conversion."""
+        if not self._is_outdated():
+            if self._converting_to_sbml:
+                self.model.set_sbml_from_antimony(text)
+                self.view.sbml_text_edit.set_model_text(self.model.sbml_text)
+            else:
+                self.model.set_antimony_from_sbml(text)
+                self.view.antimony_text_edit.set_model_text(
+                    self.model.antimony_text
+                )
+
+    def _on_conversion_failed(self, error):
+        """Report a failed conversion."""
+        if not self._is_outdated():
+            # Only the exception itself, not the full traceback of the worker
+            message = (
+                error.strip().splitlines()[-1] if error.strip() else error
+            )
+            direction = self._conversion_direction()
             self.logger.log_message(
-                f"Failed to convert Antimony to SBML: {str(e)}", color="red"
+                f"Failed to convert {direction}: {message}", color="red"
             )
-            return
-        self.logger.log_message("Converting Antimony to SBML", color="green")
-        self.view.sbml_text_edit.setPlainText(self.model.sbml_text)
-        self.model.something_changed.emit(True)
 
     def overwrite_sbml(self, file_path=None, sbml_model=None):
         """
@@ -141,20 +250,31 @@ class SbmlController(QObject):
         sbml_model: SbmlModel
             The SbmlModel instance to use.
         """
-        self.model.sbml_text = sbml_model.to_sbml_str()
-        self.model.convert_sbml_to_antimony()
-        self.view.sbml_text_edit.setPlainText(self.model.sbml_text)
-        self.view.antimony_text_edit.setPlainText(self.model.antimony_text)
-
+        self._set_sbml_text(sbml_model.to_sbml_str())
         self.overwritten_model.emit()
         self.logger.log_message(
             "SBML model successfully overwritten.", color="green"
         )
 
+    def _set_sbml_text(self, sbml_text: str):
+        """Show new SBML text, converting it to Antimony in the background.
+
+        The Antimony editor is empty until the conversion finished.
+        """
+        self.cancel_conversion()
+        self.model.replace_sbml(sbml_text)
+        self.view.sbml_text_edit.set_model_text(self.model.sbml_text)
+        self.view.antimony_text_edit.set_model_text("")
+        self.request_conversion(sbml_text, to_sbml=False)
+
     def clear_model(self):
-        """Clear the model in case the user wants to start a new problem."""
+        """Clear the model in case the user wants to start a new problem.
+
+        The small default model is converted right away, in this process.
+        """
+        self.cancel_conversion()
         self.model.antimony_text = DEFAULT_ANTIMONY_TEXT
         self.model.convert_antimony_to_sbml()
-        self.view.sbml_text_edit.setPlainText(self.model.sbml_text)
-        self.view.antimony_text_edit.setPlainText(self.model.antimony_text)
+        self.view.sbml_text_edit.set_model_text(self.model.sbml_text)
+        self.view.antimony_text_edit.set_model_text(self.model.antimony_text)
         self.overwritten_model.emit()
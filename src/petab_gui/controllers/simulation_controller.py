@@ -2,20 +2,51 @@
 
 This module contains the SimulationController class, which handles PEtab model
 simulation operations, including:
-- Running PEtab simulations using COPASI/basico
+- Running PEtab simulations with the configured simulator in a worker
+  process
 - Managing simulation settings
 - Handling simulation results and updating the simulation table
+- Simulating parameter ensembles and showing their simulation band
 """
 
+import shutil
 import tempfile
+from functools import partial
 
+import numpy as np
+import pandas as pd
 import petab.v1 as petab
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QDialog, QProgressDialog
+
+from ..C import (
+    DEFAULT_SIMULATION_CACHE_SIZE_MB,
+    DEFAULT_SIMULATION_WORKERS,
+    SIMULATION_CACHE_SIZE_KEY,
+    SIMULATION_WORKERS_KEY,
+    SIMULATOR_BACKEND_KEY,
+)
+from ..ensemble import EnsembleStore, run_ensemble, sample_parameters
+from ..settings_manager import settings_manager
+from ..simulation import (
+    SimulationSnapshot,
+    reusable_simulations,
+    simulate_incremental,
+)
+from ..simulation_cache import (
+    SimulationCache,
+    problem_fingerprint,
+    simulation_cache_dir,
+)
+from ..simulators import DEFAULT_BACKEND, backends, required_capabilities
+from ..views.dialogs import EnsembleDialog
+from .simulation_runner import SimulationRunner
 
 
 class SimulationController:
     """Controller for PEtab simulations.
 
-    Handles execution of PEtab simulations using the basico/COPASI backend.
+    Handles execution of PEtab simulations with the configured simulator.
     Manages simulation settings, runs simulations, and updates the simulation
     results table with the output.
 
@@ -44,24 +75,189 @@ class SimulationController:
         self.model = main_controller.model
         self.logger = main_controller.logger
 
+        self.runner = SimulationRunner()
+        self.runner.progress.connect(self._on_progress)
+        self.runner.partial_result.connect(self._on_partial)
+        self.runner.finished.connect(self._on_finished)
+        self.runner.failed.connect(self._on_failed)
+        self.runner.cancelled.connect(self._on_cancelled)
+        self.ensemble_runner = SimulationRunner()
+        self.ensemble_runner.progress.connect(self._on_progress)
+        self.ensemble_runner.finished.connect(self._on_ensemble_finished)
+        self.ensemble_runner.failed.connect(self._on_ensemble_failed)
+        self.ensemble_runner.cancelled.connect(self._on_ensemble_cancelled)
+        self._progress_dialog = None
+        # Store of the ensemble being simulated and the one shown
+        self._ensemble_dir = None
+        self._shown_ensemble_dir = None
+
+        self.cache = SimulationCache(
+            simulation_cache_dir(), self._cache_max_bytes()
+        )
+        # Fingerprint of the problem being simulated, to store the result
+        self._cache_key = None
+        # The problem being simulated and the last simulation, to re-use
+        # the results of unchanged measurements
+        self._simulated_problem = None
+        self._backend = DEFAULT_BACKEND
+        self._snapshot = None
+        # Rows of the running simulation received so far
+        self._partial_dfs = []
+        settings_manager.settings_changed.connect(self._on_settings_changed)
+
+    @staticmethod
+    def _cache_max_bytes():
+        return (
+            settings_manager.get_value(
+                SIMULATION_CACHE_SIZE_KEY,
+                DEFAULT_SIMULATION_CACHE_SIZE_MB,
+                int,
+            )
+            * 1024**2
+        )
+
+    def _on_settings_changed(self, key):
+        if key == SIMULATION_CACHE_SIZE_KEY:
+            self.cache.set_max_bytes(self._cache_max_bytes())
+
     def simulate(self):
-        """Simulate the PEtab model using COPASI/basico.
+        """Simulate the PEtab model.
 
-        Runs a simulation of the current PEtab problem using the basico
-        library with COPASI as the backend simulator. The simulation results
-        are written to the simulation table and invalid cells are cleared.
+        Starts a simulation of the current PEtab problem with the simulator
+        selected in the settings, by default COPASI through basico, see
+        :mod:`petab_gui.simulators`. The simulation runs in a worker
+        process, showing its progress in a dialog that allows
+        cancelling it. Results are appended to the simulation table as
+        soon as the simulator finished them, so the plot fills in while
+        simulating. Once finished, the simulation table is replaced by the
+        complete results in the order of the measurements and invalid cells
+        are cleared. A cancelled or failed simulation keeps the results
+        received so far, and the next simulation re-uses them.
+
+        Results are stored in a persistent cache, keyed by the fingerprint
+        of the problem. Simulating an unchanged problem loads the cached
+        results without starting a simulation. Otherwise, only the
+        measurements affected by changes since the last simulation are
+        simulated, see :func:`~petab_gui.simulation.reusable_simulations`.
 
         Notes
         -----
-        Uses a temporary directory for simulation working files.
-        Currently configured to use COPASI's CURRENT_SOLUTION method.
-        Requires basico and COPASI to be installed.
+        Simulates the nominal parameter values. Problems using features the
+        simulator does not support are reported without simulating, other
+        models it cannot simulate as a failed simulation.
         """
-        # obtain petab problem
-        petab_problem = self.model.current_petab_problem
+        if self._is_running():
+            return
+        # Simulate the result of a pending Antimony to SBML conversion
+        self.main.sbml_controller.flush_conversion()
+        petab_problem = self._problem_with_nominal_values(
+            self.model.get_problem_copy()
+        )
 
+        self._simulated_problem = petab_problem
+        self._backend = settings_manager.get_value(
+            SIMULATOR_BACKEND_KEY, DEFAULT_BACKEND, value_type=str
+        )
+        if not self._supports(petab_problem, self._backend):
+            return
+        self._cache_key = problem_fingerprint(petab_problem, self._backend)
+        sim_df = self.cache.get(self._cache_key)
+        if sim_df is not None:
+            self.logger.log_message(
+                "Loaded simulation results from the cache.", color="green"
+            )
+            self._show_results(sim_df)
+            return
+
+        reused = reusable_simulations(
+            petab_problem, self._snapshot, self._backend
+        )
+        n_measurements = len(petab_problem.measurement_df)
+        if len(reused):
+            self.logger.log_message(
+                f"Re-using the simulation of {len(reused)} of "
+                f"{n_measurements} unchanged measurements.",
+                color="green",
+            )
+        if len(reused) == n_measurements:
+            self._on_finished(
+                simulate_incremental(
+                    petab_problem, reused=reused, backend=self._backend
+                )
+            )
+            return
+
+        max_workers = settings_manager.get_value(
+            SIMULATION_WORKERS_KEY, DEFAULT_SIMULATION_WORKERS, value_type=int
+        )
+        self._partial_dfs = []
+        # Streamed results are appended to an empty simulation table
+        self.main.simulation_controller.overwrite_df(
+            pd.DataFrame(
+                columns=petab_problem.measurement_df.rename(
+                    columns={petab.C.MEASUREMENT: petab.C.SIMULATION}
+                ).columns
+            )
+        )
+        self.runner.start(
+            petab_problem,
+            simulate=partial(
+                simulate_incremental,
+                reused=reused,
+                max_workers=max_workers,
+                backend=self._backend,
+            ),
+        )
+        self._set_running(True)
+
+    def _supports(self, petab_problem, backend) -> bool:
+        """Whether the simulator supports the problem, reporting it if not.
+
+        Compares the features the problem uses with the capabilities of
+        the simulator, see
+        :meth:`~petab_gui.simulators.SimulatorBackend.capabilities`, so an
+        unsupported problem is reported before starting a worker.
+        """
+        backend_class = backends().get(backend)
+        if backend_class is None:
+            # Reported by the worker, like simulators that are not installed
+            return True
+        capabilities = backend_class.capabilities()
+        missing = sorted(
+            feature
+            for feature in required_capabilities(petab_problem)
+            if not capabilities.get(feature, False)
+        )
+        if missing:
+            features = ", ".join(f.replace("_", " ") for f in missing)
+            self.logger.log_message(
+                f"The simulator {backend_class.label} does not support "
+                f"{features}, used by this problem. Choose another "
+                f"simulator in the settings.",
+                color="red",
+            )
+            return False
+        return True
+
+    def _is_running(self):
+        """Whether a simulation is running, reporting it if so."""
+        if self.runner.is_running() or self.ensemble_runner.is_running():
+            self.logger.log_message(
+                "A simulation is already running.", color="orange"
+            )
+            return True
+        return False
+
+    def _problem_with_nominal_values(self, petab_problem):
+        """Add nominal values from the SBML model, if there are none.
+
+        Returns
+        -------
+        petab.Problem
+            ``petab_problem`` itself, or a copy with a nominalValue column.
+        """
         # Check if nominalValue column exists, if not add it from SBML model
-        parameter_df = petab_problem.parameter_df.copy()
+        parameter_df = petab_problem.parameter_df
         if (
             parameter_df is not None
             and not parameter_df.empty
@@ -73,23 +269,30 @@ class SimulationController:
                 color="orange",
             )
             # Extract parameter values from SBML model
-            sbml_model = self.model.sbml.get_current_sbml_model()
-            if sbml_model is not None:
-                nominal_values = []
-                for param_id in parameter_df.index:
-                    try:
-                        value = sbml_model.get_parameter_value(param_id)
-                        nominal_values.append(value)
-                    except Exception:
-                        # If parameter not found in SBML, use default value
-                        nominal_values.append(1.0)
-
-                # Add nominalValue column to parameter_df
-                parameter_df[petab.C.NOMINAL_VALUE] = nominal_values
+            initial_values = self.model.sbml.get_initial_values()
+            if initial_values is not None:
+                nominal_values = parameter_df.index.to_series().map(
+                    initial_values
+                )
+                # If parameter not found in SBML, use default value
+                missing = nominal_values.index[nominal_values.isna()]
+                if len(missing):
+                    self.logger.log_message(
+                        f"No value in the SBML model for "
+                        f"{', '.join(map(str, missing))}, using 1.0.",
+                        color="orange",
+                    )
+
+                # Add nominalValue column to a copy of parameter_df
+                parameter_df = parameter_df.copy()
+                parameter_df[petab.C.NOMINAL_VALUE] = (
+                    nominal_values.fillna(1.0).astype(float).to_numpy()
+                )
                 self.logger.log_message(
-                    f"Successfully extracted {len(nominal_values)} "
-                    f"nominal values from SBML model. Add nominalValue "
-                    f"column to parameter table to set values manually.",
+                    f"Successfully extracted "
+                    f"{len(nominal_values) - len(missing)} nominal values "
+                    f"from SBML model. Add nominalValue column to parameter "
+                    f"table to set values manually.",
                     color="green",
                 )
 
@@ -103,28 +306,204 @@ class SimulationController:
                     model=petab_problem.model,
                 )
 
-        import basico
-        from basico.petab import PetabSimulator
+        return petab_problem
 
-        # report current basico / COPASI version
-        self.logger.log_message(
-            f"Simulate with basico: {basico.__version__}, "
-            f"COPASI: {basico.COPASI.__version__}",
-            color="green",
+    def simulate_ensemble(self):
+        """Simulate an ensemble of parameter vectors.
+
+        Asks for the number of samples and how to draw them, see
+        :func:`~petab_gui.ensemble.sample_parameters`, then simulates each
+        parameter vector in a process pool with the configured simulator.
+        The simulations are stored in an
+        :class:`~petab_gui.ensemble.EnsembleStore` and their band is shown
+        in the plot dock. The simulation table is not changed.
+        """
+        if self._is_running():
+            return
+        dialog = EnsembleDialog(self.main.view)
+        if dialog.exec() != QDialog.Accepted:
+            return
+        n_samples, method, seed = dialog.get_result()
+        self.main.sbml_controller.flush_conversion()
+        petab_problem = self._problem_with_nominal_values(
+            self.model.get_problem_copy()
+        )
+        try:
+            samples = sample_parameters(
+                petab_problem.parameter_df, n_samples, method, seed
+            )
+        except (KeyError, ValueError) as e:
+            self.logger.log_message(
+                f"Cannot sample parameters: {e}", color="red"
+            )
+            return
+        backend = settings_manager.get_value(
+            SIMULATOR_BACKEND_KEY, DEFAULT_BACKEND, value_type=str
         )
+        if not self._supports(petab_problem, backend):
+            return
 
-        # create temp directory in temp folder:
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # settings is only current solution statistic for now:
-            settings = {"method": {"name": basico.PE.CURRENT_SOLUTION}}
-            # create simulator
-            simulator = PetabSimulator(
-                petab_problem, settings=settings, working_dir=temp_dir
+        self._ensemble_dir = tempfile.mkdtemp(prefix="petab_gui_ensemble_")
+        self.ensemble_runner.start(
+            petab_problem,
+            simulate=partial(
+                run_ensemble,
+                samples=samples,
+                directory=self._ensemble_dir,
+                max_workers=settings_manager.get_value(
+                    SIMULATION_WORKERS_KEY,
+                    DEFAULT_SIMULATION_WORKERS,
+                    value_type=int,
+                ),
+                backend=backend,
+            ),
+        )
+        self._set_running(True)
+
+    def cancel(self):
+        """Cancel the running simulation."""
+        self.runner.cancel()
+        self.ensemble_runner.cancel()
+
+    def _set_running(self, running):
+        """Show or hide the progress dialog and toggle the simulate action."""
+        self.main.actions["simulate"].setEnabled(not running)
+        self.main.actions["simulate_ensemble"].setEnabled(not running)
+        if running:
+            self._progress_dialog = QProgressDialog(
+                "Starting simulation...", "Cancel", 0, 0, self.main.view
             )
+            self._progress_dialog.setWindowTitle("Simulation")
+            self._progress_dialog.setWindowModality(Qt.NonModal)
+            self._progress_dialog.setMinimumDuration(0)
+            self._progress_dialog.canceled.connect(self.cancel)
+            self._progress_dialog.show()
+        elif self._progress_dialog is not None:
+            self._progress_dialog.canceled.disconnect(self.cancel)
+            self._progress_dialog.close()
+            self._progress_dialog.deleteLater()
+            self._progress_dialog = None
+
+    def _on_progress(self, done, total, message):
+        """Report simulation progress in the dialog and the logger."""
+        self.logger.log_message(message, color="green")
+        if self._progress_dialog is not None:
+            self._progress_dialog.setLabelText(message)
+            self._progress_dialog.setRange(0, total)
+            self._progress_dialog.setValue(done)
+
+    def _on_partial(self, partial_df):
+        """Append finished rows to the simulation table."""
+        self._partial_dfs.append(partial_df)
+        self.main.simulation_controller.model.append_rows(partial_df)
+
+    def _keep_partial_results(self):
+        """Keep the results of an unfinished simulation for re-use.
+
+        Measurements without a result are NaN in the snapshot and are
+        simulated by the next run. The simulation table keeps the rows
+        received so far.
+        """
+        if not self._partial_dfs:
+            return
+        partial_df = pd.concat(self._partial_dfs)
+        self._partial_dfs = []
+        sim_df = self._simulated_problem.measurement_df.reset_index(
+            drop=True
+        ).rename(columns={petab.C.MEASUREMENT: petab.C.SIMULATION})
+        sim_df[petab.C.SIMULATION] = np.nan
+        sim_df.loc[partial_df.index, petab.C.SIMULATION] = partial_df[
+            petab.C.SIMULATION
+        ].to_numpy()
+        self._snapshot = SimulationSnapshot(
+            self._simulated_problem, sim_df, self._backend
+        )
+        self.logger.log_message(
+            f"Kept the simulation of {len(partial_df)} of {len(sim_df)} "
+            f"measurements.",
+            color="orange",
+        )
 
-            # simulate
-            sim_df = simulator.simulate()
+    def _on_finished(self, sim_df):
+        """Cache the simulation results and show them."""
+        self._set_running(False)
+        self._partial_dfs = []
+        try:
+            self.cache.put(self._cache_key, sim_df)
+        except OSError as e:
+            self.logger.log_message(
+                f"Could not cache the simulation results: {e}",
+                color="orange",
+            )
+        self._show_results(sim_df)
 
-        # assign to simulation table
+    def _show_results(self, sim_df):
+        """Write the simulation results to the simulation table."""
+        self._snapshot = SimulationSnapshot(
+            self._simulated_problem, sim_df, self._backend
+        )
         self.main.simulation_controller.overwrite_df(sim_df)
         self.main.simulation_controller.model.reset_invalid_cells()
+
+    def _on_failed(self, error):
+        """Report a failed simulation."""
+        self._set_running(False)
+        # Only the exception itself, not the full traceback of the worker
+        message = error.strip().splitlines()[-1] if error.strip() else error
+        self.logger.log_message(f"Simulation failed: {message}", color="red")
+        self._keep_partial_results()
+
+    def _on_cancelled(self):
+        """Report a cancelled simulation."""
+        self._set_running(False)
+        self.logger.log_message("Simulation cancelled.", color="orange")
+        self._keep_partial_results()
+
+    def _on_ensemble_finished(self, directory):
+        """Show the simulation band of the ensemble in the plot dock."""
+        self._set_running(False)
+        self._ensemble_dir = None
+        store = EnsembleStore(directory)
+        try:
+            n_failed = store.n_failed
+            band_df = store.band()
+            n_samples = len(store.samples)
+            errors = store.errors
+        finally:
+            store.close()
+        if n_failed:
+            self.logger.log_message(
+                f"{n_failed} of {n_samples} ensemble samples failed.",
+                color="orange",
+            )
+        # The first error of each chunk of samples, once per message
+        samples_by_message = {}
+        for sample, message in errors:
+            samples_by_message.setdefault(message, []).append(str(sample))
+        for message, samples in samples_by_message.items():
+            label = "sample" if len(samples) == 1 else "samples"
+            self.logger.log_message(
+                f"Ensemble {label} {', '.join(samples)} failed: {message}",
+                color="orange",
+            )
+        self.main.plotter.set_ensemble(band_df)
+        # Only the shown ensemble is kept
+        if self._shown_ensemble_dir is not None:
+            shutil.rmtree(self._shown_ensemble_dir, ignore_errors=True)
+        self._shown_ensemble_dir = directory
+
+    def _discard_ensemble(self):
+        """Delete the store of an ensemble that did not finish."""
+        if self._ensemble_dir is not None:
+            shutil.rmtree(self._ensemble_dir, ignore_errors=True)
+            self._ensemble_dir = None
+
+    def _on_ensemble_failed(self, error):
+        """Report a failed ensemble simulation."""
+        self._discard_ensemble()
+        self._on_failed(error)
+
+    def _on_ensemble_cancelled(self):
+        """Report a cancelled ensemble simulation."""
+        self._discard_ensemble()
+        self._on_cancelled()
@@ -0,0 +1,234 @@
+"""Simulation runner for PEtab GUI.
+
+Runs PEtab simulations in a separate worker process, so that the GUI stays
+responsive and COPASI state is isolated from the application. Progress,
+results and errors are delivered through Qt signals.
+"""
+
+import multiprocessing
+import queue
+import weakref
+
+from PySide6.QtCore import QCoreApplication, QObject, QTimer, Signal
+
+from ..simulation import run_simulation_session, simulate_problem
+
+#: Interval in ms in which the worker process is polled for messages
+POLL_INTERVAL = 100
+#: Seconds to wait for the worker process to exit after a shutdown
+SHUTDOWN_TIMEOUT = 5
+#: Polls after the worker process died until the simulation fails, as
+#: messages posted right before exiting may still be in transit
+EXIT_GRACE_POLLS = 10
+#: Error message if the worker process died, formatted with its exit code
+EXIT_MESSAGE = "Simulation process exited unexpectedly (code {exitcode})."
+
+
+class SimulationRunner(QObject):
+    """Run simulations in a worker process.
+
+    Only one simulation runs at a time. The process is polled from the GUI
+    thread with a timer, so all signals are emitted on the GUI thread.
+
+    The worker process is kept between simulations, together with its
+    prepared simulators, see :mod:`petab_gui.simulation`. Cancelling
+    terminates it, the next simulation starts a new one. Other work that
+    should stay out of the GUI process runs in it with :meth:`run`.
+
+    Parameters
+    ----------
+    simulate : callable, optional
+        Picklable function ``simulate(petab_problem, report_progress)``
+        returning the simulation table, see
+        :func:`~petab_gui.simulation.simulate_problem`.
+    exit_message : str, optional
+        Emitted with :attr:`failed` if the worker process died, formatted
+        with its ``exitcode``. Runners doing other work than simulating
+        name it here.
+    """
+
+    #: Emitted with (done, total, message) while simulating
+    progress = Signal(int, int, str)
+    #: Emitted with finished rows of the simulation table while simulating
+    partial_result = Signal(object)
+    #: Emitted with the simulation table when the simulation finished
+    finished = Signal(object)
+    #: Emitted with the error message if the simulation failed
+    failed = Signal(str)
+    #: Emitted when a running simulation was cancelled
+    cancelled = Signal()
+
+    def __init__(
+        self, simulate=simulate_problem, parent=None, exit_message=EXIT_MESSAGE
+    ):
+        super().__init__(parent)
+        self._simulate = simulate
+        self._exit_message = exit_message
+        # spawn: the worker must not inherit the Qt application state
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._requests = None
+        self._messages = None
+        self._running = False
+        # Polls since the worker process was found dead
+        self._dead_polls = 0
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(POLL_INTERVAL)
+        self._poll_timer.timeout.connect(self._poll)
+        # The worker is not daemonic, so it has to be stopped before exiting
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+        self._finalizer = None
+
+    def is_running(self) -> bool:
+        """Whether a simulation is in progress."""
+        return self._running
+
+    def start(self, petab_problem, simulate=None):
+        """Start simulating ``petab_problem`` in the worker process.
+
+        ``simulate`` overrides the simulate function of the runner.
+
+        Raises
+        ------
+        RuntimeError
+            If a simulation is running already.
+        """
+        self._submit(simulate or self._simulate, (petab_problem,), True)
+
+    def run(self, function, *args):
+        """Start ``function(*args)`` in the worker process.
+
+        ``function`` and ``args`` must be picklable. Its return value is
+        emitted with :attr:`finished`, an exception with :attr:`failed`.
+
+        Raises
+        ------
+        RuntimeError
+            If a simulation is running already.
+        """
+        self._submit(function, args, False)
+
+    def wait(self):
+        """Block until the running simulation finished, if any.
+
+        Emits the signals of the simulation like polling does.
+        """
+        while self.is_running():
+            try:
+                message = self._messages.get(timeout=POLL_INTERVAL / 1000)
+            except queue.Empty:
+                # Handles a worker process that died
+                self._poll()
+                continue
+            self._handle(message)
+
+    def _submit(self, function, args, reports_progress):
+        """Send a request to the worker process, starting it if needed."""
+        if self.is_running():
+            raise RuntimeError("A simulation is already running.")
+        if self._process is None or not self._process.is_alive():
+            self._start_process()
+        self._requests.put((function, args, reports_progress))
+        self._running = True
+        self._dead_polls = 0
+        self._poll_timer.start()
+
+    def cancel(self):
+        """Stop the running simulation, if any.
+
+        The worker process is terminated. Where the process can handle
+        ``SIGTERM``, it first calls
+        :meth:`~petab_gui.simulators.SimulatorBackend.cancel` of its
+        backends, see :func:`~petab_gui.simulation.cancel_session`.
+        """
+        if not self.is_running():
+            return
+        self._process.terminate()
+        self._stop()
+        self.cancelled.emit()
+
+    def shutdown(self):
+        """Stop the worker process, cancelling a running simulation."""
+        self.cancel()
+        if self._process is not None:
+            self._stop()
+
+    def _start_process(self):
+        """Start a new worker process, replacing a dead one."""
+        if self._process is not None:
+            self._stop()
+        self._requests = self._context.Queue()
+        self._messages = self._context.Queue()
+        self._process = self._context.Process(
+            target=run_simulation_session,
+            args=(self._requests, self._messages),
+            # Not daemonic, as daemonic processes cannot start a process pool
+            daemon=False,
+        )
+        self._process.start()
+        # Without a shutdown, exiting Python would wait for the worker
+        self._finalizer = weakref.finalize(
+            self, _stop_process, self._process, self._requests
+        )
+
+    def _poll(self):
+        """Forward the messages of the worker process as signals."""
+        while True:
+            try:
+                message = self._messages.get_nowait()
+            except queue.Empty:
+                break
+            if self._handle(message):
+                return
+        if self._process.is_alive():
+            return
+        # Later polls pick up messages that are still in transit
+        self._dead_polls += 1
+        if self._dead_polls < EXIT_GRACE_POLLS:
+            return
+        exitcode = self._process.exitcode
+        self._stop()
+        self.failed.emit(self._exit_message.format(exitcode=exitcode))
+
+    def _handle(self, message) -> bool:
+        """Emit the signal for a message, return whether it was the last."""
+        kind, *payload = message
+        if kind == "progress":
+            self.progress.emit(*payload)
+            return False
+        if kind == "partial":
+            self.partial_result.emit(payload[0])
+            return False
+        self._poll_timer.stop()
+        self._running = False
+        if kind == "result":
+            self.finished.emit(payload[0])
+        else:
+            self.failed.emit(payload[0])
+        return True
+
+    def _stop(self):
+        """Forget the worker process, terminating it if still alive."""
+        self._poll_timer.stop()
+        self._running = False
+        self._finalizer.detach()
+        _stop_process(self._process, self._requests)
+        self._process = None
+        self._requests.close()
+        self._messages.close()
+        self._requests = self._messages = None
+
+
+def _stop_process(process, requests):
+    """Ask a worker process to exit, terminating it if it does not."""
+    if process.is_alive():
+        try:
+            requests.put(None)
+        except (OSError, ValueError):
+            pass
+        process.join(timeout=SHUTDOWN_TIMEOUT)
+    if process.is_alive():
+        process.terminate()
+    process.join()
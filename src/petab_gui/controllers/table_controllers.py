@@ -1100,16 +1100,38 @@ class ConditionController(TableController):
         row_name: str = None,
         col_name: str = None,
     ):
-        """Check a number of rows of the model with petablint."""
+        """Check a number of rows of the model with petablint.
+
+        The columns are checked against the symbol index of the SBML model,
+        output parameters are only derived for columns not in the model.
+        """
         if row_data is None:
             row_data = self.model.get_df()
         observable_df = self.mother_controller.model.observable.get_df()
-        sbml_model = self.mother_controller.model.sbml.get_current_sbml_model()
-        return petab.check_condition_df(
-            row_data,
-            observable_df=observable_df,
-            model=sbml_model,
+        petab.check_condition_df(row_data, observable_df=observable_df)
+        sbml = self.mother_controller.model.sbml
+        symbol_index = sbml.get_symbol_index()
+        if symbol_index is None:
+            return
+        unknown = [
+            column
+            for column in row_data.columns
+            if column != petab.C.CONDITION_NAME
+            and column not in symbol_index.condition_table_ids
+        ]
+        if not unknown:
+            return
+        output_parameters = set(
+            petab.get_output_parameters(
+                observable_df, sbml.get_current_sbml_model()
+            )
         )
+        for column in unknown:
+            if column not in output_parameters:
+                raise AssertionError(
+                    "Condition table contains column for unknown entity '"
+                    f"{column}'."
+                )
 
     def maybe_rename_condition(self, new_id, old_id):
         """Potentially rename condition_ids in measurement_df.
@@ -55,6 +55,7 @@ class ValidationController:
         Uses PEtab's built-in validation through `model.test_consistency()`.
         Captures log messages from the PEtab linter for display to the user.
         """
+        self.main.sbml_controller.flush_conversion()
         capture_handler = CaptureLogHandler()
         logger_lint = logging.getLogger("petab.v1.lint")
         logger_vis = logging.getLogger("petab.v1.visualize.lint")
@@ -0,0 +1,361 @@
+"""Ensemble simulations over sampled parameter vectors.
+
+Parameter vectors are drawn within the bounds of the estimated parameters,
+on their ``parameterScale``, and simulated in a process pool. The results
+go to an :class:`EnsembleStore`, a memory-mapped float64 array with one
+row per sample and one column per measurement, which the workers write to
+directly. Like :mod:`petab_gui.simulation`, this module contains no Qt
+code.
+"""
+
+import json
+import os
+import warnings
+from concurrent.futures import as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import petab.v1 as petab
+
+from .simulation import session_backend, session_pool
+from .simulators import DEFAULT_BACKEND
+
+#: Supported ways to draw parameter vectors, see :func:`sample_parameters`
+SAMPLING_METHODS = ("latin_hypercube", "random", "grid")
+
+#: Number of array elements read at once when computing quantiles
+_QUANTILE_BLOCK_SIZE = 8_000_000
+
+#: Errors of simulators for single parameter vectors, e.g. a failed
+#: integration. Other errors stop the ensemble.
+SIMULATION_ERRORS = (ArithmeticError, RuntimeError, ValueError)
+
+
+def sample_parameters(
+    parameter_df, n_samples, method="latin_hypercube", seed=None
+) -> pd.DataFrame:
+    """Draw parameter vectors within the bounds of the estimated parameters.
+
+    Samples are uniform on the ``parameterScale`` of each parameter, e.g.
+    log-uniform for ``log10``. Parameters that are not estimated keep
+    their nominal value and are not part of the samples.
+
+    Parameters
+    ----------
+    parameter_df:
+        The parameter table.
+    n_samples:
+        Number of parameter vectors. For ``"grid"``, the grid has
+        ``floor(n_samples ** (1 / n_parameters))`` points per parameter,
+        which may give fewer vectors.
+    method:
+        One of :data:`SAMPLING_METHODS`.
+    seed:
+        Seed of the random number generator.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per sample and one column per estimated parameter, with
+        values on linear scale.
+
+    Raises
+    ------
+    ValueError
+        If there are no estimated parameters, bounds are missing or
+        invalid on the parameter scale, or the method is unknown.
+    """
+    if method not in SAMPLING_METHODS:
+        raise ValueError(f"Unknown sampling method: {method}")
+    if petab.C.ESTIMATE in parameter_df:
+        estimated = parameter_df[
+            pd.to_numeric(parameter_df[petab.C.ESTIMATE], errors="coerce") == 1
+        ]
+    else:
+        estimated = parameter_df
+    if estimated.empty:
+        raise ValueError("There are no estimated parameters to sample.")
+    scales = (
+        estimated[petab.C.PARAMETER_SCALE].fillna(petab.C.LIN)
+        if petab.C.PARAMETER_SCALE in estimated
+        else pd.Series(petab.C.LIN, index=estimated.index)
+    )
+    bounds = []
+    for column in (petab.C.LOWER_BOUND, petab.C.UPPER_BOUND):
+        if column not in estimated:
+            raise ValueError(f"The parameter table has no {column} column.")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bounds.append(
+                np.array(
+                    [
+                        petab.scale(float(value), scale)
+                        for value, scale in zip(
+                            estimated[column], scales, strict=True
+                        )
+                    ]
+                )
+            )
+    lower, upper = bounds
+    invalid = ~(np.isfinite(lower) & np.isfinite(upper) & (lower <= upper))
+    if invalid.any():
+        raise ValueError(
+            f"Invalid bounds for {list(estimated.index[invalid])}."
+        )
+
+    n_parameters = len(estimated)
+    if method == "grid":
+        # Tolerance, so that e.g. 1000 samples give 10 points for 3
+        n_points = max(
+            1, int(np.floor(n_samples ** (1 / n_parameters) + 1e-9))
+        )
+        # Cell midpoints, so a single point is the center of the bounds
+        axis = (np.arange(n_points) + 0.5) / n_points
+        unit = np.stack(
+            np.meshgrid(*[axis] * n_parameters, indexing="ij"), axis=-1
+        ).reshape(-1, n_parameters)
+    elif method == "latin_hypercube":
+        from scipy.stats import qmc
+
+        unit = qmc.LatinHypercube(d=n_parameters, seed=seed).random(n_samples)
+    else:
+        unit = np.random.default_rng(seed).random((n_samples, n_parameters))
+
+    scaled = lower + unit * (upper - lower)
+    values = {
+        parameter_id: petab.unscale(scaled[:, i], scale)
+        for i, (parameter_id, scale) in enumerate(scales.items())
+    }
+    return pd.DataFrame(values, index=pd.RangeIndex(len(scaled)))
+
+
+class EnsembleStore:
+    """Simulations of a parameter ensemble, stored in a directory.
+
+    The directory holds
+
+    * ``simulations.npy``: float64 array of shape (n_samples,
+      n_measurements), opened memory-mapped. Rows of failed samples are
+      NaN.
+    * ``samples.tsv``: the parameter vectors, one row per sample.
+    * ``measurements.tsv``: the measurement table without measured values,
+      one row per column of the array.
+    * ``errors.json``: the first error of each chunk of simulated samples,
+      as ``[sample, message]`` pairs, see :attr:`errors`.
+
+    Parameters
+    ----------
+    directory:
+        Directory of an existing store, see :meth:`create`.
+    mode:
+        Memory-map mode of the array, ``"r"`` or ``"r+"``.
+    """
+
+    SIMULATIONS = "simulations.npy"
+    SAMPLES = "samples.tsv"
+    MEASUREMENTS = "measurements.tsv"
+    ERRORS = "errors.json"
+
+    def __init__(self, directory, mode="r"):
+        self.directory = Path(directory)
+        self.samples = pd.read_csv(
+            self.directory / self.SAMPLES, sep="\t", index_col=0
+        )
+        self.measurements = pd.read_csv(
+            self.directory / self.MEASUREMENTS, sep="\t"
+        )
+        self.simulations = np.load(
+            self.directory / self.SIMULATIONS, mmap_mode=mode
+        )
+        errors_file = self.directory / self.ERRORS
+        #: Errors of failed samples, as (sample, message) pairs
+        self.errors = (
+            [tuple(error) for error in json.loads(errors_file.read_text())]
+            if errors_file.exists()
+            else []
+        )
+
+    @classmethod
+    def create(cls, directory, samples, measurement_df) -> "EnsembleStore":
+        """Create an empty store for simulating ``samples``."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        samples.to_csv(directory / cls.SAMPLES, sep="\t")
+        measurements = measurement_df.drop(
+            columns=petab.C.MEASUREMENT, errors="ignore"
+        )
+        measurements.to_csv(
+            directory / cls.MEASUREMENTS, sep="\t", index=False
+        )
+        simulations = np.lib.format.open_memmap(
+            directory / cls.SIMULATIONS,
+            mode="w+",
+            dtype=np.float64,
+            shape=(len(samples), len(measurements)),
+        )
+        simulations[:] = np.nan
+        simulations.flush()
+        del simulations
+        return cls(directory, mode="r+")
+
+    @property
+    def n_failed(self) -> int:
+        """Number of samples without any simulated value."""
+        return int(np.isnan(self.simulations).all(axis=1).sum())
+
+    def band(self, lower=0.05, upper=0.95) -> pd.DataFrame:
+        """Quantiles of the simulations of each measurement.
+
+        Reads the array in blocks of columns, so memory use stays bounded
+        for large ensembles. Failed samples are ignored.
+
+        Returns
+        -------
+        pd.DataFrame
+            The measurement rows, without duplicates, with the columns
+            ``lower``, ``median`` and ``upper``.
+        """
+        n_samples, n_measurements = self.simulations.shape
+        block = max(1, _QUANTILE_BLOCK_SIZE // max(1, n_samples))
+        quantiles = np.empty((3, n_measurements))
+        with warnings.catch_warnings():
+            # Measurements for which all samples failed are NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            for start in range(0, n_measurements, block):
+                stop = min(start + block, n_measurements)
+                quantiles[:, start:stop] = np.nanquantile(
+                    self.simulations[:, start:stop],
+                    [lower, 0.5, upper],
+                    axis=0,
+                )
+        band_df = self.measurements.copy()
+        band_df["lower"], band_df["median"], band_df["upper"] = quantiles
+        return band_df.drop_duplicates(
+            subset=list(self.measurements.columns)
+        ).reset_index(drop=True)
+
+    def close(self):
+        """Release the memory map, e.g. before deleting the directory.
+
+        The map is closed once no views of :attr:`simulations` are left.
+        """
+        self.simulations = None
+
+
+def _simulate_samples(
+    petab_problem, samples, directory, backend
+) -> tuple[int, tuple[int, str] | None]:
+    """Simulate samples in a worker and write them to the store.
+
+    Returns the number of samples that failed, and the sample and message
+    of the first failure, if any.
+    """
+    simulations = np.load(
+        Path(directory) / EnsembleStore.SIMULATIONS, mmap_mode="r+"
+    )
+    simulator = session_backend(backend, petab_problem)
+    failed = 0
+    error = None
+    for position, parameters in samples.iterrows():
+        try:
+            simulator.set_nominal_values(parameters.to_dict())
+            sim_df = simulator.simulate()
+        except SIMULATION_ERRORS as e:
+            failed += 1
+            if error is None:
+                error = (int(position), f"{type(e).__name__}: {e}")
+            continue
+        simulations[position] = sim_df[petab.C.SIMULATION].to_numpy()
+    simulations.flush()
+    return failed, error
+
+
+def run_ensemble(
+    petab_problem,
+    report_progress=None,
+    samples=None,
+    directory=None,
+    max_workers=0,
+    backend=DEFAULT_BACKEND,
+) -> str:
+    """Simulate a problem for each parameter vector of an ensemble.
+
+    Parameters
+    ----------
+    petab_problem : petab.Problem
+        The problem to simulate. Parameters that are not in ``samples``
+        keep their nominal values.
+    report_progress : callable, optional
+        Called as ``report_progress(done, total, message)``.
+    samples : pd.DataFrame
+        The parameter vectors, see :func:`sample_parameters`.
+    directory : str or Path
+        Where to create the :class:`EnsembleStore`.
+    max_workers : int
+        Number of processes, ``0`` for one per CPU core.
+    backend : str
+        Name of the simulator, see :mod:`petab_gui.simulators`.
+
+    Returns
+    -------
+    str
+        The directory of the store.
+    """
+    measurement_df = petab_problem.measurement_df.reset_index(drop=True)
+    petab_problem = petab.Problem(
+        condition_df=petab_problem.condition_df,
+        measurement_df=measurement_df,
+        observable_df=petab_problem.observable_df,
+        parameter_df=petab_problem.parameter_df,
+        model=petab_problem.model,
+    )
+    samples = samples.reset_index(drop=True)
+    EnsembleStore.create(directory, samples, measurement_df).close()
+    n_samples = len(samples)
+    max_workers = min(max_workers or os.cpu_count() or 1, n_samples)
+
+    def progress(done, message):
+        if report_progress is not None:
+            report_progress(done, n_samples, message)
+
+    progress(0, f"Simulating {n_samples} samples...")
+    errors = []
+    if max_workers <= 1:
+        failed, error = _simulate_samples(
+            petab_problem, samples, directory, backend
+        )
+        errors.append(error)
+    else:
+        # Several chunks per process, for progress and load balancing
+        chunks = np.array_split(
+            np.arange(n_samples), min(n_samples, 4 * max_workers)
+        )
+        failed = done = 0
+        pool = session_pool(max_workers)
+        futures = {
+            pool.submit(
+                _simulate_samples,
+                petab_problem,
+                samples.iloc[chunk],
+                directory,
+                backend,
+            ): len(chunk)
+            for chunk in chunks
+        }
+        try:
+            for future in as_completed(futures):
+                chunk_failed, error = future.result()
+                failed += chunk_failed
+                errors.append(error)
+                done += futures[future]
+                progress(done, f"Simulated {done} of {n_samples} samples.")
+        finally:
+            for future in futures:
+                future.cancel()
+    errors = sorted(error for error in errors if error is not None)
+    (Path(directory) / EnsembleStore.ERRORS).write_text(json.dumps(errors))
+    message = f"Simulated {n_samples} samples."
+    if failed:
+        message += f" {failed} failed."
+    progress(n_samples, message)
+    return str(directory)
@@ -153,18 +153,18 @@ class DefaultHandlerModel:
         return ""
 
     def _sbml_lookup(self, row_key):
-        """Use the most frequent value in the column as the default.
+        """Use the value of the parameter in the SBML model.
 
-        Defaults to last used value in case of a tie.
+        Defaults to 1 if the row is not a parameter of the SBML model that
+        can be in the parameter table, or it has no value.
         """
         if self._sbml_model is None:
             return 1
         if row_key is None:
             return 1
-        curr_model = self._sbml_model.get_current_sbml_model()
-        if curr_model is None:
+        symbol_index = self._sbml_model.get_symbol_index()
+        if symbol_index is None:
             return 1
-        parameters = curr_model.get_valid_parameters_for_parameter_table()
-        if row_key not in list(parameters):
+        if row_key not in symbol_index.parameter_table_ids:
             return 1
-        return curr_model.get_parameter_value(row_key)
+        return self._sbml_model.get_initial_values().get(row_key, 1)
@@ -1,5 +1,6 @@
 from typing import Any
 
+import pandas as pd
 import petab.v1 as petab
 from PySide6.QtCore import (
     QAbstractTableModel,
@@ -43,7 +44,8 @@ def _get_system_palette_color(role):
         from PySide6.QtWidgets import QApplication
 
         app = QApplication.instance()
-        if app:
+        # A QCoreApplication has no palette
+        if isinstance(app, QApplication):
             return app.palette().color(role)
     except (ImportError, RuntimeError):
         pass
@@ -120,6 +122,33 @@ class PandasTableModel(QAbstractTableModel):
         self._highlight_fg_color = _get_system_palette_color(
             QPalette.HighlightedText
         )
+        # Number of edits of the table, to tell whether it changed since a
+        # snapshot of it was taken, see PEtabModel.current_petab_problem
+        self.revision = 0
+        for signal in (
+            self.rowsInserted,
+            self.rowsRemoved,
+            self.rowsMoved,
+            self.columnsInserted,
+            self.columnsRemoved,
+            self.columnsMoved,
+            self.modelReset,
+            self.layoutChanged,
+        ):
+            signal.connect(self._count_revision)
+        self.dataChanged.connect(self._count_data_change)
+
+    def _count_revision(self, *args):
+        """Count an edit of the table."""
+        self.revision += 1
+
+    def _count_data_change(self, top_left, bottom_right, roles=()):
+        """Count changed cells, but not changed colors of cells."""
+        if roles and not any(
+            role in (Qt.DisplayRole, Qt.EditRole) for role in roles
+        ):
+            return
+        self.revision += 1
 
     def rowCount(self, parent=None):
         """Return the number of rows in the model.
@@ -777,6 +806,29 @@ class PandasTableModel(QAbstractTableModel):
         )
         self.endResetModel()
 
+    def append_rows(self, df: pd.DataFrame):
+        """Append rows at the end of the table, without an undo command.
+
+        Used for rows produced by the application, e.g. streamed
+        simulation results. Only emits ``rowsInserted``, so views and
+        proxies keep their state.
+
+        Args:
+            df: The rows to append, with the columns of the table
+        """
+        if df.empty:
+            return
+        rows = df[self._data_frame.columns].reset_index(drop=True)
+        position = self._data_frame.shape[0]
+        self.beginInsertRows(QModelIndex(), position, position + len(df) - 1)
+        if self._data_frame.empty:
+            self._data_frame = rows
+        else:
+            self._data_frame = pd.concat(
+                [self._data_frame, rows], ignore_index=True
+            )
+        self.endInsertRows()
+
     def check_selection(self):
         """Check if multiple rows but only one column is selected in the view.
 
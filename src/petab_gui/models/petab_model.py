@@ -80,6 +80,11 @@ class PEtabModel:
         self.visualization = VisualizationModel(
             data_frame=self.problem.visualization_df,
         )
+        # The current problem and its copy for workers, with the revisions
+        # of the tables and the SBML model they were built from
+        self._current_problem = None
+        self._problem_copy = None
+        self._problem_revisions = None
 
     @property
     def models(self):
@@ -152,20 +157,79 @@ class PEtabModel:
                 organization=settings_manager.get_value("general/orga"),
             )
 
+    def _revisions(self) -> tuple:
+        """Revisions of the tables and the parsed SBML model."""
+        return (
+            self.condition.revision,
+            self.measurement.revision,
+            self.observable.revision,
+            self.parameter.revision,
+            self.visualization.revision,
+            # Re-parsed only if the SBML text changed
+            self.sbml.get_current_sbml_model(),
+        )
+
+    def _update_problem(self):
+        """Rebuild the problems if a table or the SBML model changed."""
+        revisions = self._revisions()
+        # SBML models are compared by identity
+        if revisions == self._problem_revisions:
+            return
+        self._current_problem = petab.Problem(
+            condition_df=self.condition.get_df(),
+            measurement_df=self.measurement.get_df(),
+            observable_df=self.observable.get_df(),
+            parameter_df=self.parameter.get_df(),
+            visualization_df=self.visualization.get_df(),
+            model=revisions[-1],
+        )
+        self._problem_copy = None
+        self._problem_revisions = revisions
+
     @property
     def current_petab_problem(self) -> petab.Problem:
         """Get the current PEtab problem.
 
+        The problem is rebuilt only if a table or the SBML text changed
+        since the last access, so accesses within one user action return
+        the same object. Its tables are the tables of the GUI, which are
+        edited in place, see :meth:`get_problem_copy` for a problem to hand
+        to workers.
+
         Returns
         -------
         petab.Problem
             The current PEtab problem.
         """
-        return petab.Problem(
-            condition_df=self.condition.get_df(),
-            measurement_df=self.measurement.get_df(),
-            observable_df=self.observable.get_df(),
-            parameter_df=self.parameter.get_df(),
-            visualization_df=self.visualization.get_df(),
-            model=self.sbml.get_current_sbml_model(),
-        )
+        self._update_problem()
+        return self._current_problem
+
+    def get_problem_copy(self) -> petab.Problem:
+        """Get a copy of the current PEtab problem for workers.
+
+        Later edits in the GUI do not change the copy, so it can be handed
+        to worker processes and threads. It is made once per revision of
+        the problem and shared by all callers, so it must not be modified.
+        The SBML model is shared with :attr:`current_petab_problem`.
+
+        Returns
+        -------
+        petab.Problem
+            The copy of the current PEtab problem.
+        """
+        self._update_problem()
+        if self._problem_copy is None:
+            problem = self._current_problem
+            self._problem_copy = petab.Problem(
+                condition_df=_copy(problem.condition_df),
+                measurement_df=_copy(problem.measurement_df),
+                observable_df=_copy(problem.observable_df),
+                parameter_df=_copy(problem.parameter_df),
+                visualization_df=_copy(problem.visualization_df),
+                model=problem.model,
+            )
+        return self._problem_copy
+
+
+def _copy(df):
+    return None if df is None else df.copy()
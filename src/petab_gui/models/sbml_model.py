@@ -7,7 +7,13 @@ from petab.v1.sbml import load_sbml_from_string
 from PySide6.QtCore import QObject, QSignalBlocker, Signal
 
 from ..C import DEFAULT_ANTIMONY_TEXT
-from .sbml_utils import antimony_to_sbml, sbml_to_antimony
+from .sbml_symbols import SbmlSymbolIndex
+from .sbml_utils import (
+    antimony_to_sbml,
+    read_sbml_header,
+    sbml_initial_values,
+    sbml_to_antimony,
+)
 
 
 class SbmlViewerModel(QObject):
@@ -19,6 +25,11 @@ class SbmlViewerModel(QObject):
         The SBML text.
     antimony_text: str
         The SBML model converted to Antimony.
+    header: dict | None
+        Level, version, ID and name of the SBML model, see
+        :func:`~petab_gui.models.sbml_utils.read_sbml_header`.
+    model_id: str
+        The ID of the SBML model, ``"New_File"`` if it has none.
     """
 
     something_changed = Signal(bool)
@@ -26,6 +37,13 @@ class SbmlViewerModel(QObject):
     def __init__(self, sbml_model: petab.models.Model, parent=None):
         super().__init__(parent)
         self._sbml_model_original = sbml_model
+        # The parsed SBML model, the text it was parsed from and the hash
+        # of that text, its initial values and its symbol index
+        self._parsed_model = None
+        self._parsed_text = None
+        self._parsed_hash = None
+        self._initial_values = None
+        self._symbol_index = None
         if sbml_model:
             self.sbml_text = libsbml.writeSBMLToString(
                 self._sbml_model_original.sbml_model.getSBMLDocument()
@@ -35,38 +53,113 @@ class SbmlViewerModel(QObject):
             self.antimony_text = DEFAULT_ANTIMONY_TEXT
             with QSignalBlocker(self):
                 self.convert_antimony_to_sbml()
-        self.model_id = self._get_model_id()
+        self._read_header()
 
     def convert_sbml_to_antimony(self):
-        self.antimony_text = sbml_to_antimony(self.sbml_text)
-        self.model_id = self._get_model_id()
-        self.something_changed.emit(True)
+        self.set_antimony_from_sbml(sbml_to_antimony(self.sbml_text))
 
     def convert_antimony_to_sbml(self):
-        self.sbml_text = antimony_to_sbml(self.antimony_text)
-        self.model_id = self._get_model_id()
+        self.set_sbml_from_antimony(antimony_to_sbml(self.antimony_text))
+
+    def set_antimony_from_sbml(self, antimony_text: str):
+        """Set the Antimony text converted from the SBML text."""
+        self.invalidate_cache()
+        self.antimony_text = antimony_text
+        self._read_header()
         self.something_changed.emit(True)
 
+    def set_sbml_from_antimony(self, sbml_text: str):
+        """Set the SBML text converted from the Antimony text."""
+        self.invalidate_cache()
+        self.sbml_text = sbml_text
+        self._read_header()
+        self.something_changed.emit(True)
+
+    def replace_sbml(self, sbml_text: str):
+        """Replace the model with SBML text, e.g. of a loaded file.
+
+        The Antimony text is empty until it is converted from the SBML text.
+        """
+        self.invalidate_cache()
+        self.sbml_text = sbml_text
+        self.antimony_text = ""
+        self._read_header()
+
+    def invalidate_cache(self):
+        """Forget the parsed SBML model, e.g. when replacing the SBML text."""
+        self._parsed_model = None
+        self._parsed_text = None
+        self._parsed_hash = None
+        self._initial_values = None
+        self._symbol_index = None
+
     def get_current_sbml_model(self):
-        """Temporary write SBML to file and turn into petab.models.Model."""
+        """Turn the SBML text into petab.models.Model.
+
+        The text is parsed once and the model is shared by all callers
+        until the text changes, so it must not be modified.
+        """
         if self.sbml_text == "":
             return None
 
-        sbml_reader, sbml_document, sbml_model = load_sbml_from_string(
-            self.sbml_text
-        )
+        if not self._is_parsed(self.sbml_text):
+            sbml_reader, sbml_document, sbml_model = load_sbml_from_string(
+                self.sbml_text
+            )
 
-        model_id = sbml_model.getIdAttribute()
+            model_id = sbml_model.getIdAttribute()
 
-        return SbmlModel(
-            sbml_model=sbml_model,
-            sbml_reader=sbml_reader,
-            sbml_document=sbml_document,
-            model_id=model_id,
-        )
+            self._parsed_model = SbmlModel(
+                sbml_model=sbml_model,
+                sbml_reader=sbml_reader,
+                sbml_document=sbml_document,
+                model_id=model_id,
+            )
+            self._parsed_text = self.sbml_text
+            self._parsed_hash = hash(self.sbml_text)
+            self._initial_values = None
+            self._symbol_index = None
+        return self._parsed_model
+
+    def _is_parsed(self, sbml_text: str) -> bool:
+        """Whether the parsed model was parsed from ``sbml_text``."""
+        if self._parsed_model is None:
+            return False
+        # Mostly the very text that was parsed
+        if sbml_text is self._parsed_text:
+            return True
+        # str caches its hash, so this rules out most changed texts cheaply
+        if hash(sbml_text) != self._parsed_hash:
+            return False
+        # Equal hashes of different texts must not share the model
+        return sbml_text == self._parsed_text
+
+    def get_initial_values(self) -> dict | None:
+        """Initial values of the current SBML model by entity ID.
+
+        See :func:`~petab_gui.models.sbml_utils.sbml_initial_values`. Read
+        once per parsed model, ``None`` if there is no model.
+        """
+        sbml_model = self.get_current_sbml_model()
+        if sbml_model is None:
+            return None
+        if self._initial_values is None:
+            self._initial_values = sbml_initial_values(sbml_model.sbml_model)
+        return self._initial_values
+
+    def get_symbol_index(self) -> SbmlSymbolIndex | None:
+        """Index of the symbols of the current SBML model.
+
+        Built once per parsed model, ``None`` if there is no model.
+        """
+        sbml_model = self.get_current_sbml_model()
+        if sbml_model is None:
+            return None
+        if self._symbol_index is None:
+            self._symbol_index = SbmlSymbolIndex(sbml_model.sbml_model)
+        return self._symbol_index
 
-    def _get_model_id(self):
-        """Extract the model ID from the SBML text."""
-        document = libsbml.readSBMLFromString(self.sbml_text)
-        model = document.getModel()
-        return model.getIdAttribute() or "New_File"
+    def _read_header(self):
+        """Read the header and the model ID from the SBML text."""
+        self.header = read_sbml_header(self.sbml_text)
+        self.model_id = (self.header or {}).get("id") or "New_File"
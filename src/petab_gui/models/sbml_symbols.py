@@ -0,0 +1,87 @@
+"""Index of the symbols of an SBML model."""
+
+import bisect
+import itertools
+
+
+class SbmlSymbolIndex:
+    """Symbols of an SBML model by kind, with prefix lookup.
+
+    Built once per revision of the SBML text, see
+    :meth:`~petab_gui.models.sbml_model.SbmlViewerModel.get_symbol_index`,
+    so completers and checks do not walk the libsbml model each time.
+
+    Parameters
+    ----------
+    sbml_model: libsbml.Model
+        The model to index.
+
+    Attributes
+    ----------
+    parameters: frozenset
+        IDs of the parameters.
+    species: frozenset
+        IDs of the species.
+    compartments: frozenset
+        IDs of the compartments.
+    assignment_targets: frozenset
+        IDs of the variables of rules.
+    """
+
+    def __init__(self, sbml_model):
+        self.parameters = frozenset(
+            p.getId() for p in sbml_model.getListOfParameters()
+        )
+        self.species = frozenset(
+            s.getId() for s in sbml_model.getListOfSpecies()
+        )
+        self.compartments = frozenset(
+            c.getId() for c in sbml_model.getListOfCompartments()
+        )
+        self.assignment_targets = frozenset(
+            r.getVariable() for r in sbml_model.getListOfRules()
+        )
+        # Same sets as get_valid_parameters_for_parameter_table and
+        # get_valid_ids_for_condition_table of petab's SbmlModel
+        self.parameter_table_ids = self.parameters - self.assignment_targets
+        self.condition_table_ids = (
+            self.parameters | self.species | self.compartments
+        )
+        self._sorted = sorted(
+            self.condition_table_ids | self.assignment_targets
+        )
+
+    def __contains__(self, symbol):
+        """Whether ``symbol`` is the ID of an indexed entity."""
+        return (
+            symbol in self.condition_table_ids
+            or symbol in self.assignment_targets
+        )
+
+    def complete(self, prefix: str, kind: frozenset = None) -> list[str]:
+        """Symbols starting with ``prefix``, in alphabetical order.
+
+        The symbols are found by a binary search in the sorted symbols, so
+        only the matches are visited.
+
+        Parameters
+        ----------
+        prefix: str
+            The start of the symbols.
+        kind: frozenset, optional
+            Restrict the symbols to a set of this index, e.g.
+            :attr:`parameter_table_ids`.
+
+        Returns
+        -------
+        list[str]
+            The matching symbols.
+        """
+        start = bisect.bisect_left(self._sorted, prefix)
+        symbols = []
+        for symbol in itertools.islice(self._sorted, start, None):
+            if not symbol.startswith(prefix):
+                break
+            if kind is None or symbol in kind:
+                symbols.append(symbol)
+        return symbols
@@ -2,8 +2,13 @@
 
 import logging
 import os
+from xml.etree import ElementTree
 
 import antimony
+import libsbml
+
+#: Characters fed to the XML parser at once when reading the SBML header
+_HEADER_CHUNK_SIZE = 4096
 
 
 def _check_antimony_return_code(code):
@@ -68,3 +73,96 @@ def antimony_to_sbml(ant):
     _check_antimony_return_code(code)
     mid = antimony.getMainModuleName()
     return antimony.getSBMLString(mid)
+
+
+def sbml_initial_values(sbml_model):
+    """Collect the initial values of all entities of an SBML model.
+
+    Covers parameter values, species initial concentrations, or amounts
+    if no concentration is set, and compartment sizes. Entities without a
+    value are left out.
+
+    Args:
+        sbml_model: The libsbml model
+
+    Returns:
+        dict: Initial value by entity ID
+    """
+    values = {}
+    for compartment in sbml_model.getListOfCompartments():
+        if compartment.isSetSize():
+            values[compartment.getId()] = compartment.getSize()
+    for species in sbml_model.getListOfSpecies():
+        if species.isSetInitialConcentration():
+            values[species.getId()] = species.getInitialConcentration()
+        elif species.isSetInitialAmount():
+            values[species.getId()] = species.getInitialAmount()
+    for parameter in sbml_model.getListOfParameters():
+        if parameter.isSetValue():
+            values[parameter.getId()] = parameter.getValue()
+    return values
+
+
+def convert_model_text(text, to_sbml=True):
+    """Convert Antimony to SBML or SBML to Antimony.
+
+    Run by the SBML controller in the worker process of a
+    :class:`~petab_gui.controllers.simulation_runner.SimulationRunner`, so
+    that converting large models does not block the GUI.
+
+    Args:
+        text: Antimony or SBML string
+        to_sbml: Whether to convert Antimony to SBML or SBML to Antimony
+
+    Returns:
+        str: The converted model
+    """
+    if to_sbml:
+        return antimony_to_sbml(text)
+    return sbml_to_antimony(text)
+
+
+def read_sbml_header(sbml_text):
+    """Read the level, version, model ID and model name of SBML.
+
+    Parses the XML incrementally and stops at the start of the model
+    element, so only the header of the document is read. Falls back to
+    parsing the whole document with libsbml if the header cannot be read
+    this way.
+
+    Args:
+        sbml_text: SBML string
+
+    Returns:
+        dict: "level", "version", "id" and "name", or None if the text
+        has no model
+    """
+    parser = ElementTree.XMLPullParser(events=("start",))
+    level = version = None
+    try:
+        for start in range(0, len(sbml_text), _HEADER_CHUNK_SIZE):
+            parser.feed(sbml_text[start : start + _HEADER_CHUNK_SIZE])
+            for _, element in parser.read_events():
+                tag = element.tag.rpartition("}")[2]
+                if tag == "sbml":
+                    level = element.get("level")
+                    version = element.get("version")
+                elif tag == "model":
+                    return {
+                        "level": int(level),
+                        "version": int(version),
+                        "id": element.get("id", ""),
+                        "name": element.get("name", ""),
+                    }
+    except (ElementTree.ParseError, TypeError, ValueError) as e:
+        logging.debug(f"Reading the SBML header with libsbml: {e}")
+    document = libsbml.readSBMLFromString(sbml_text)
+    model = document.getModel()
+    if model is None:
+        return None
+    return {
+        "level": document.getLevel(),
+        "version": document.getVersion(),
+        "id": model.getIdAttribute(),
+        "name": model.getName(),
+    }
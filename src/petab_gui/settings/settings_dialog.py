@@ -20,6 +20,7 @@ from PySide6.QtWidgets import (
     QScrollArea,
     QSizePolicy,
     QSpacerItem,
+    QSpinBox,
     QStackedWidget,
     QVBoxLayout,
     QWidget,
@@ -28,14 +29,23 @@ from PySide6.QtWidgets import (
 from ..C import (
     ALLOWED_STRATEGIES,
     COPY_FROM,
+    DEFAULT_PLOT_CACHE_SIZE_MB,
+    DEFAULT_SIMULATION_CACHE_SIZE_MB,
+    DEFAULT_SIMULATION_WORKERS,
     DEFAULT_VALUE,
     MODE,
     NO_DEFAULT,
+    PLOT_CACHE_SIZE_KEY,
+    SIMULATION_CACHE_SIZE_KEY,
+    SIMULATION_WORKERS_KEY,
+    SIMULATOR_BACKEND_KEY,
     SOURCE_COLUMN,
     STRATEGIES_DEFAULT_ALL,
     STRATEGY_TOOLTIP,
     USE_DEFAULT,
 )
+from ..simulation_cache import SimulationCache, simulation_cache_dir
+from ..simulators import DEFAULT_BACKEND, backends
 
 
 class ColumnConfigWidget(QWidget):
@@ -294,7 +304,7 @@ class SettingsDialog(QDialog):
     """Dialog for editing application settings.
 
     Main settings dialog with navigation sidebar and multiple pages for
-    different setting categories (General, Table Defaults).
+    different setting categories (General, Table Defaults, Performance).
 
     Attributes
     ----------
@@ -340,7 +350,7 @@ class SettingsDialog(QDialog):
         self.main_layout = QHBoxLayout(self)
 
         self.nav_list = QListWidget()
-        self.nav_list.addItems(["General", "Table Defaults"])
+        self.nav_list.addItems(["General", "Table Defaults", "Performance"])
         self.nav_list.currentRowChanged.connect(self.switch_page)
         self.main_layout.addWidget(self.nav_list, 1)
 
@@ -350,6 +360,7 @@ class SettingsDialog(QDialog):
         # add pages to the stack
         self.init_general_page()
         self.init_table_defaults_page()
+        self.init_performance_page()
 
         self.nav_list.setCurrentRow(0)
 
@@ -442,6 +453,142 @@ class SettingsDialog(QDialog):
         self._add_buttons(page)
         self.content_stack.addWidget(page)
 
+    def init_performance_page(self):
+        """Create the performance settings page.
+
+        Builds the UI for the memory limits of the application caches and
+        the parallelism of simulations.
+        """
+        page = QWidget()
+        layout = QVBoxLayout(page)
+
+        header = QLabel("<b>Plotting</b>")
+        desc = QLabel(
+            "Rendered plots are kept in memory, so switching back to a "
+            "previous grouping or re-showing the plot does not re-render."
+        )
+        desc.setWordWrap(True)
+        layout.addWidget(header)
+        layout.addWidget(desc)
+
+        form = QFormLayout()
+        self.plot_cache_size = QSpinBox()
+        self.plot_cache_size.setRange(0, 8192)
+        self.plot_cache_size.setSuffix(" MB")
+        self.plot_cache_size.setValue(
+            self.settings_manager.get_value(
+                PLOT_CACHE_SIZE_KEY, DEFAULT_PLOT_CACHE_SIZE_MB, int
+            )
+        )
+        form.addRow("Plot cache size:", self.plot_cache_size)
+        layout.addLayout(form)
+
+        header = QLabel("<b>Simulation</b>")
+        desc = QLabel(
+            "Simulation conditions are simulated in parallel processes. "
+            "Use 0 for one process per CPU core, 1 to simulate the whole "
+            "problem at once."
+        )
+        desc.setWordWrap(True)
+        layout.addWidget(header)
+        layout.addWidget(desc)
+
+        form = QFormLayout()
+        self.simulator_backend = QComboBox()
+        for name, backend_class in backends().items():
+            self.simulator_backend.addItem(backend_class.label or name, name)
+            if not backend_class.is_available():
+                index = self.simulator_backend.count() - 1
+                self.simulator_backend.model().item(index).setEnabled(False)
+        self.simulator_backend.setCurrentIndex(
+            max(
+                0,
+                self.simulator_backend.findData(
+                    self.settings_manager.get_value(
+                        SIMULATOR_BACKEND_KEY, DEFAULT_BACKEND, str
+                    )
+                ),
+            )
+        )
+        self.simulator_backend.setToolTip(
+            "COPASI supports all SBML models. SciPy is faster to start for "
+            "small models without events."
+        )
+        form.addRow("Simulator:", self.simulator_backend)
+        self.simulation_workers = QSpinBox()
+        self.simulation_workers.setRange(0, 256)
+        self.simulation_workers.setSpecialValueText("One per core")
+        self.simulation_workers.setValue(
+            self.settings_manager.get_value(
+                SIMULATION_WORKERS_KEY, DEFAULT_SIMULATION_WORKERS, int
+            )
+        )
+        form.addRow("Simulation processes:", self.simulation_workers)
+        layout.addLayout(form)
+
+        header = QLabel("<b>Simulation cache</b>")
+        desc = QLabel(
+            "Simulation results are stored on disk, so simulating an "
+            "unchanged problem again loads the previous results. Use 0 MB "
+            "to disable the cache."
+        )
+        desc.setWordWrap(True)
+        layout.addWidget(header)
+        layout.addWidget(desc)
+
+        form = QFormLayout()
+        self.simulation_cache_size = QSpinBox()
+        self.simulation_cache_size.setRange(0, 65536)
+        self.simulation_cache_size.setSuffix(" MB")
+        self.simulation_cache_size.setValue(
+            self.settings_manager.get_value(
+                SIMULATION_CACHE_SIZE_KEY,
+                DEFAULT_SIMULATION_CACHE_SIZE_MB,
+                int,
+            )
+        )
+        form.addRow("Simulation cache size:", self.simulation_cache_size)
+
+        self.simulation_cache = SimulationCache(
+            simulation_cache_dir(),
+            self.simulation_cache_size.value() * 1024**2,
+        )
+        cache_row = QHBoxLayout()
+        self.simulation_cache_usage = QLabel()
+        self.simulation_cache_usage.setTextInteractionFlags(
+            Qt.TextSelectableByMouse
+        )
+        self.simulation_cache_usage.setWordWrap(True)
+        clear_button = QPushButton("Clear")
+        clear_button.setAutoDefault(False)
+        clear_button.clicked.connect(self._clear_simulation_cache)
+        cache_row.addWidget(self.simulation_cache_usage, 1)
+        cache_row.addWidget(clear_button)
+        form.addRow("Cached results:", cache_row)
+        self._update_simulation_cache_usage()
+        layout.addLayout(form)
+        layout.addStretch()
+
+        page.setLayout(layout)
+        self._add_buttons(page)
+        self.content_stack.addWidget(page)
+
+    def _update_simulation_cache_usage(self):
+        """Show the number and size of the cached simulation results."""
+        n_entries, n_bytes = self.simulation_cache.stats()
+        self.simulation_cache_usage.setText(
+            f"{n_entries} simulation(s), {n_bytes / 1024**2:.1f} MB "
+            f"in {self.simulation_cache.directory}"
+        )
+
+    def _clear_simulation_cache(self):
+        """Remove all cached simulation results."""
+        self.simulation_cache.clear()
+        self._update_simulation_cache_usage()
+        self.settings_manager.new_log_message.emit(
+            "Simulation cache cleared.", "green"
+        )
+
     def _add_buttons(self, page: QWidget):
         """Add Apply and Cancel buttons to a settings page.
 
@@ -481,6 +628,20 @@ class SettingsDialog(QDialog):
         for _table_name, table_widget in self.table_widgets.items():
             table_widget.save_current_settings()
 
+        # Save performance settings
+        self.settings_manager.set_value(
+            PLOT_CACHE_SIZE_KEY, self.plot_cache_size.value()
+        )
+        self.settings_manager.set_value(
+            SIMULATOR_BACKEND_KEY, self.simulator_backend.currentData()
+        )
+        self.settings_manager.set_value(
+            SIMULATION_WORKERS_KEY, self.simulation_workers.value()
+        )
+        self.settings_manager.set_value(
+            SIMULATION_CACHE_SIZE_KEY, self.simulation_cache_size.value()
+        )
+
         self.settings_manager.new_log_message.emit(
             "New settings applied.", "green"
         )
@@ -0,0 +1,546 @@
+"""Simulation of PEtab problems.
+
+Contains no Qt code, so that the functions can run in worker processes
+without loading the application. See
+:class:`~petab_gui.controllers.simulation_runner.SimulationRunner` for
+running them from the GUI.
+
+Each process keeps a session: the backends it used, prepared for the last
+simulated problem, and a process pool whose workers keep their own
+session. Simulating an edited problem in the same process re-uses the
+prepared model unless the SBML text changed, see
+:meth:`~petab_gui.simulators.SimulatorBackend.update`. Pool workers keep
+one backend per condition pair, as they get another pair each time.
+"""
+
+import multiprocessing
+import os
+import signal
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import petab.v1 as petab
+
+from .simulators import DEFAULT_BACKEND, SimulatorBackend, get_backend
+
+# Backends of this process by name and condition pair, prepared for their
+# last problem
+_session_backends = {}
+# Process pool of this process and its number of workers
+_session_pool = None
+_session_pool_workers = 0
+
+
+def session_backend(name, petab_problem, key=None) -> SimulatorBackend:
+    """Return backend ``name`` of this process, prepared for a problem.
+
+    The backend is created on first use and then kept, so that its
+    prepared model is re-used while the SBML text does not change.
+
+    Parameters
+    ----------
+    name : str
+        Name of the simulator.
+    petab_problem : petab.Problem
+        The problem to prepare.
+    key : tuple, optional
+        The condition pair of a sub-problem of :func:`split_problem`. Each
+        condition pair gets its own backend, so that sub-problems do not
+        replace each other's prepared problem.
+    """
+    simulator = _session_backends.get((name, key))
+    if simulator is None:
+        simulator = _session_backends[name, key] = get_backend(name)
+    simulator.update(petab_problem)
+    return simulator
+
+
+def session_pool(max_workers) -> ProcessPoolExecutor:
+    """Return the process pool of this process, with ``max_workers``.
+
+    The pool is kept between simulations, so that its workers keep their
+    session backends. Workers are started on demand.
+    """
+    global _session_pool, _session_pool_workers
+    if _session_pool is not None and (
+        _session_pool_workers != max_workers or _session_pool._broken
+    ):
+        _session_pool.shutdown(cancel_futures=True)
+        _session_pool = None
+    if _session_pool is None:
+        _session_pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        _session_pool_workers = max_workers
+    return _session_pool
+
+
+def close_session():
+    """Release the session backends and stop the process pool."""
+    global _session_pool
+    for simulator in _session_backends.values():
+        simulator.close()
+    _session_backends.clear()
+    if _session_pool is not None:
+        _session_pool.shutdown(cancel_futures=True)
+        _session_pool = None
+
+
+def cancel_session():
+    """Cancel the running simulations of the session backends.
+
+    See :meth:`~petab_gui.simulators.SimulatorBackend.cancel`.
+    """
+    for simulator in _session_backends.values():
+        simulator.cancel()
+
+
+def simulate_problem(
+    petab_problem, report_progress=None, backend=DEFAULT_BACKEND
+):
+    """Simulate a PEtab problem.
+
+    Parameters
+    ----------
+    petab_problem : petab.Problem
+        The problem to simulate. Requires a nominalValue column in the
+        parameter table.
+    report_progress : callable, optional
+        Called as ``report_progress(done, total, message)``, with finished
+        rows as fourth argument, see
+        :meth:`~petab_gui.simulators.SimulatorBackend.simulate`.
+    backend : str
+        Name of the simulator, see :func:`~petab_gui.simulators.backends`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The simulation table.
+    """
+    return session_backend(backend, petab_problem).simulate(report_progress)
+
+
+def split_problem(petab_problem) -> list[tuple[tuple, list, petab.Problem]]:
+    """Split a problem into one sub-problem per condition pair.
+
+    Measurements are grouped by their preequilibration and simulation
+    condition. Each sub-problem keeps the model, observable and parameter
+    tables, but only the measurements and conditions of its group.
+
+    Returns
+    -------
+    list[tuple[tuple, list, petab.Problem]]
+        The ``(preequilibrationConditionId, simulationConditionId)`` of each
+        group, the positions of its rows in the full measurement table and
+        its sub-problem.
+    """
+    measurement_df = petab_problem.measurement_df.reset_index(drop=True)
+    groups = measurement_df.groupby(
+        _condition_pairs(measurement_df), sort=False
+    )
+
+    sub_problems = []
+    for key, group_df in groups:
+        condition_ids = [condition_id for condition_id in key if condition_id]
+        condition_df = petab_problem.condition_df
+        if condition_df is not None:
+            condition_df = condition_df.loc[
+                condition_df.index.intersection(condition_ids)
+            ]
+        sub_problems.append(
+            (
+                key,
+                group_df.index.tolist(),
+                petab.Problem(
+                    condition_df=condition_df,
+                    measurement_df=group_df.reset_index(drop=True),
+                    observable_df=petab_problem.observable_df,
+                    parameter_df=petab_problem.parameter_df,
+                    model=petab_problem.model,
+                ),
+            )
+        )
+    return sub_problems
+
+
+def _condition_pairs(measurement_df) -> pd.MultiIndex:
+    """The preequilibration and simulation condition of each measurement."""
+    if petab.C.PREEQUILIBRATION_CONDITION_ID in measurement_df:
+        preequilibration = (
+            measurement_df[petab.C.PREEQUILIBRATION_CONDITION_ID]
+            .fillna("")
+            .astype(str)
+        )
+    else:
+        preequilibration = pd.Series("", index=measurement_df.index)
+    return pd.MultiIndex.from_arrays(
+        [preequilibration, measurement_df[petab.C.SIMULATION_CONDITION_ID]]
+    )
+
+
+def _simulate_sub_problem(key, sub_problem, positions, backend):
+    """Simulate a sub-problem, indexed by its measurement positions."""
+    sim_df = session_backend(backend, sub_problem, key).simulate()
+    sim_df.index = positions
+    return sim_df
+
+
+def simulate_split(
+    petab_problem,
+    report_progress=None,
+    max_workers=0,
+    backend=DEFAULT_BACKEND,
+):
+    """Simulate the condition pairs of a problem in parallel processes.
+
+    The problem is split with :func:`split_problem`, the sub-problems are
+    simulated by a process pool and the partial simulation tables are
+    merged in the order of the measurement table.
+
+    Parameters
+    ----------
+    petab_problem : petab.Problem
+        The problem to simulate, see :func:`simulate_problem`.
+    report_progress : callable, optional
+        See :func:`simulate_problem`. The rows of each condition pair are
+        reported once simulated.
+    max_workers : int
+        Number of processes, ``0`` for one per CPU core. With ``1`` or a
+        single condition pair, the problem is simulated in one piece in
+        this process.
+    backend : str
+        Name of the simulator, see :func:`simulate_problem`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The simulation table.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    sub_problems = split_problem(petab_problem)
+    if max_workers == 1 or not sub_problems:
+        return simulate_problem(petab_problem, report_progress, backend)
+    if len(sub_problems) == 1:
+        # Prepared like in the pool, for incremental runs of a single pair
+        key, _, sub_problem = sub_problems[0]
+        return session_backend(backend, sub_problem, key).simulate(
+            report_progress
+        )
+
+    def progress(done, message, partial_df=None):
+        if report_progress is None:
+            return
+        if partial_df is None:
+            report_progress(done, len(sub_problems), message)
+        else:
+            report_progress(done, len(sub_problems), message, partial_df)
+
+    progress(
+        0,
+        f"Simulating {len(sub_problems)} conditions in "
+        f"{min(max_workers, len(sub_problems))} processes...",
+    )
+    sim_dfs = []
+    pool = session_pool(max_workers)
+    futures = {
+        pool.submit(
+            _simulate_sub_problem, key, sub_problem, positions, backend
+        ): key
+        for key, positions, sub_problem in sub_problems
+    }
+    try:
+        for done, future in enumerate(as_completed(futures), start=1):
+            sim_dfs.append(future.result())
+            preequilibration, simulation = futures[future]
+            condition = (
+                f"{preequilibration} -> {simulation}"
+                if preequilibration
+                else simulation
+            )
+            progress(done, f"Simulated condition {condition}.", sim_dfs[-1])
+    finally:
+        for future in futures:
+            future.cancel()
+    return pd.concat(sim_dfs).sort_index().reset_index(drop=True)
+
+
+class SimulationSnapshot:
+    """Inputs and results of a simulation, to re-use them in later runs.
+
+    Parameters
+    ----------
+    petab_problem : petab.Problem
+        The simulated problem.
+    sim_df : pd.DataFrame
+        Its simulation table, in the order of the measurement table.
+    backend : str
+        Name of the simulator that computed the table.
+    """
+
+    def __init__(self, petab_problem, sim_df, backend=DEFAULT_BACKEND):
+        self.backend = backend
+        model = petab_problem.model
+        self.sbml = model.to_sbml_str() if model is not None else None
+        # Copies, as the tables of the GUI are edited in place
+        self.parameter_df = _copy(petab_problem.parameter_df)
+        self.condition_df = _copy(petab_problem.condition_df)
+        self.observable_df = _copy(petab_problem.observable_df)
+        self.measurement_df = petab_problem.measurement_df.reset_index(
+            drop=True
+        )
+        self.simulations = sim_df[petab.C.SIMULATION].to_numpy()
+
+
+def _copy(df):
+    return None if df is None else df.copy()
+
+
+def _normalized(df, columns=None) -> pd.DataFrame:
+    """Table cells as strings, with empty cells as ``""``."""
+    df = df if columns is None else df[columns]
+    return df.astype(object).where(df.notna(), "").astype(str)
+
+
+def _tables_equal(old_df, new_df) -> bool:
+    if old_df is None or new_df is None:
+        return old_df is new_df
+    return (
+        old_df.shape == new_df.shape
+        and old_df.index.equals(new_df.index)
+        and set(old_df.columns) == set(new_df.columns)
+        and _normalized(old_df)
+        .reindex(columns=new_df.columns)
+        .equals(_normalized(new_df))
+    )
+
+
+def _changed_ids(old_df, new_df) -> set:
+    """IDs of the rows that differ or exist in only one of two tables."""
+    old_ids = set() if old_df is None else set(old_df.index)
+    new_ids = set() if new_df is None else set(new_df.index)
+    if (
+        old_df is None
+        or new_df is None
+        or set(old_df.columns) != set(new_df.columns)
+        or not old_df.index.is_unique
+        or not new_df.index.is_unique
+    ):
+        return old_ids | new_ids
+    common = old_df.index.intersection(new_df.index)
+    old = _normalized(old_df.loc[common], list(new_df.columns))
+    new = _normalized(new_df.loc[common])
+    differs = (old != new).any(axis=1)
+    return (old_ids ^ new_ids) | set(differs.index[differs])
+
+
+def reusable_simulations(
+    petab_problem, snapshot, backend=DEFAULT_BACKEND
+) -> pd.Series:
+    """Find the measurements whose previous simulation is still valid.
+
+    A simulation is re-used for a measurement with the same observable,
+    conditions, time point and further columns as a previously simulated
+    one, unless its observable or one of its conditions changed, or it
+    has no simulated value. Changes of the SBML model, the parameter table
+    or the simulator invalidate all simulations.
+
+    Parameters
+    ----------
+    petab_problem : petab.Problem
+        The problem to simulate.
+    snapshot : SimulationSnapshot or None
+        The previous simulation.
+    backend : str
+        Name of the simulator to use.
+
+    Returns
+    -------
+    pd.Series
+        The re-usable simulated values, indexed by the position of their
+        measurement.
+    """
+    measurement_df = petab_problem.measurement_df.reset_index(drop=True)
+    nothing = pd.Series(np.empty(0), index=pd.Index([], dtype=int))
+    if snapshot is None or snapshot.backend != backend:
+        return nothing
+    model = petab_problem.model
+    sbml = model.to_sbml_str() if model is not None else None
+    if sbml != snapshot.sbml or not _tables_equal(
+        snapshot.parameter_df, petab_problem.parameter_df
+    ):
+        return nothing
+    keys = [
+        column
+        for column in measurement_df.columns
+        if column != petab.C.MEASUREMENT
+    ]
+    previous_df = snapshot.measurement_df
+    if set(keys) != set(previous_df.columns) - {petab.C.MEASUREMENT}:
+        return nothing
+
+    changed_conditions = _changed_ids(
+        snapshot.condition_df, petab_problem.condition_df
+    )
+    changed_observables = _changed_ids(
+        snapshot.observable_df, petab_problem.observable_df
+    )
+    previous = _normalized(previous_df, keys)
+    # Measurements a cancelled simulation did not reach are NaN
+    valid = ~previous[petab.C.OBSERVABLE_ID].isin(changed_observables) & (
+        ~np.isnan(snapshot.simulations)
+    )
+    for column in (
+        petab.C.SIMULATION_CONDITION_ID,
+        petab.C.PREEQUILIBRATION_CONDITION_ID,
+    ):
+        if column in previous:
+            valid &= ~previous[column].isin(changed_conditions)
+    previous[petab.C.SIMULATION] = snapshot.simulations
+    previous = previous[valid].drop_duplicates(keys)
+
+    # Left merge on unique keys keeps one row per measurement, in order
+    merged = _normalized(measurement_df, keys).merge(
+        previous, on=keys, how="left", indicator=True
+    )
+    found = (merged["_merge"] == "both").to_numpy()
+    return pd.Series(
+        merged[petab.C.SIMULATION].to_numpy()[found],
+        index=np.flatnonzero(found),
+    )
+
+
+def simulate_incremental(
+    petab_problem,
+    report_progress=None,
+    reused=None,
+    max_workers=0,
+    backend=DEFAULT_BACKEND,
+):
+    """Simulate only the measurements without a re-usable simulation.
+
+    Condition pairs with any such measurement are simulated as a whole, so
+    that their sub-problems match those of a full simulation and the
+    backends prepared for them are re-used, see :func:`session_backend`.
+    Only the values of the measurements without a re-usable simulation
+    are taken from it.
+
+    Parameters
+    ----------
+    petab_problem : petab.Problem
+        The problem to simulate, see :func:`simulate_problem`.
+    report_progress : callable, optional
+        See :func:`simulate_problem`. The re-used rows are reported first.
+    reused : pd.Series, optional
+        Simulated values to keep, see :func:`reusable_simulations`.
+    max_workers : int
+        Number of processes, see :func:`simulate_split`.
+    backend : str
+        Name of the simulator, see :func:`simulate_problem`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The simulation table, with the re-used values spliced in.
+    """
+    if reused is None or reused.empty:
+        return simulate_split(
+            petab_problem, report_progress, max_workers, backend
+        )
+    measurement_df = petab_problem.measurement_df.reset_index(drop=True)
+    sim_df = measurement_df.rename(
+        columns={petab.C.MEASUREMENT: petab.C.SIMULATION}
+    )
+    sim_df[petab.C.SIMULATION] = np.nan
+    sim_df.loc[reused.index, petab.C.SIMULATION] = reused.to_numpy()
+
+    stale = np.setdiff1d(np.arange(len(measurement_df)), reused.index)
+    if report_progress is not None:
+        report_progress(
+            0,
+            1,
+            f"Re-simulating {len(stale)} of {len(measurement_df)} "
+            f"measurements...",
+            sim_df.loc[reused.index],
+        )
+
+    pairs = _condition_pairs(measurement_df)
+    affected = np.flatnonzero(pairs.isin(pairs[stale]))
+
+    def report_stale(done, total, message, partial_df=None):
+        """Report stale rows of the simulated pairs at their positions."""
+        if partial_df is not None:
+            partial_df = partial_df.set_axis(affected[partial_df.index])
+            partial_df = partial_df[np.isin(partial_df.index, stale)]
+        if partial_df is None or partial_df.empty:
+            report_progress(done, total, message)
+        else:
+            report_progress(done, total, message, partial_df)
+
+    if len(stale):
+        affected_problem = petab.Problem(
+            condition_df=petab_problem.condition_df,
+            measurement_df=measurement_df.iloc[affected].reset_index(
+                drop=True
+            ),
+            observable_df=petab_problem.observable_df,
+            parameter_df=petab_problem.parameter_df,
+            model=petab_problem.model,
+        )
+        affected_df = simulate_split(
+            affected_problem,
+            report_stale if report_progress is not None else None,
+            max_workers,
+            backend,
+        )
+        simulations = pd.Series(
+            affected_df[petab.C.SIMULATION].to_numpy(), index=affected
+        )
+        sim_df.loc[stale, petab.C.SIMULATION] = simulations[stale].to_numpy()
+    return sim_df
+
+
+def _terminate_children(signum, frame):
+    """Cancel the backends and stop the processes of a worker process.
+
+    Then exits the worker.
+    """
+    try:
+        cancel_session()
+    finally:
+        for child in multiprocessing.active_children():
+            child.terminate()
+        os._exit(1)
+
+
+def run_simulation_session(requests, messages):
+    """Entry point of the worker process.
+
+    Runs the ``(function, args, reports_progress)`` requests from
+    ``requests`` one after another, until it receives ``None``. Functions
+    that report progress are called with a ``report_progress`` callback
+    after ``args``, which posts ``("progress", done, total, message)`` and
+    ``("partial", partial_df)`` for finished rows. Each request ends with
+    either ``("result", result)`` or ``("error", traceback)`` posted to
+    ``messages``.
+    """
+    # Cancelling terminates the worker, which must take its pool along
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, _terminate_children)
+
+    def report_progress(done, total, message, partial_df=None):
+        if partial_df is not None:
+            messages.put(("partial", partial_df))
+        messages.put(("progress", done, total, message))
+
+    while (request := requests.get()) is not None:
+        function, args, reports_progress = request
+        if reports_progress:
+            args = (*args, report_progress)
+        try:
+            messages.put(("result", function(*args)))
+        except Exception:
+            messages.put(("error", traceback.format_exc()))
+    close_session()
@@ -0,0 +1,176 @@
+"""Persistent cache of simulation results.
+
+Simulation tables are stored on disk, keyed by a fingerprint of everything
+that determines them, so simulating an unchanged problem again - also in a
+later session - loads the previous result instead of re-running COPASI.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+import petab.v1 as petab
+from PySide6.QtCore import QStandardPaths
+
+logger = logging.getLogger(__name__)
+
+#: Part of every fingerprint, bump to invalidate entries of older versions
+CACHE_FORMAT_VERSION = "1"
+
+_SUFFIX = ".tsv"
+
+
+def simulation_cache_dir() -> Path:
+    """Directory of the simulation cache in the user's cache directory."""
+    return (
+        Path(
+            QStandardPaths.writableLocation(
+                QStandardPaths.StandardLocation.GenericCacheLocation
+            )
+        )
+        / "petab_gui"
+        / "simulations"
+    )
+
+
+def problem_fingerprint(petab_problem: petab.Problem, *extra) -> str:
+    """Hash the parts of a problem that determine its simulation table.
+
+    Covers the SBML text and the parameter (including nominal values),
+    condition and observable tables, as well as the measurement table
+    without the measured values. Changing measured values thus keeps the
+    fingerprint, changing e.g. time points does not.
+
+    Parameters
+    ----------
+    petab_problem:
+        The problem to simulate.
+    extra:
+        Further strings that affect the result, e.g. the simulator.
+    """
+    digest = hashlib.sha256(CACHE_FORMAT_VERSION.encode())
+
+    def update(text):
+        # Length prefix, so that parts cannot shift into each other
+        data = text.encode()
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+
+    model = petab_problem.model
+    update(model.to_sbml_str() if model is not None else "")
+    measurement_df = petab_problem.measurement_df
+    if measurement_df is not None:
+        measurement_df = measurement_df.drop(
+            columns=petab.C.MEASUREMENT, errors="ignore"
+        )
+    for df in (
+        petab_problem.parameter_df,
+        petab_problem.condition_df,
+        petab_problem.observable_df,
+        measurement_df,
+    ):
+        update("" if df is None else df.to_csv(sep="\t"))
+    for item in extra:
+        update(str(item))
+    return digest.hexdigest()
+
+
+class SimulationCache:
+    """Size-capped on-disk cache of simulation tables.
+
+    Each entry is a simulation table in PEtab format, named after the
+    fingerprint of its problem. The least recently used entries are
+    removed once the cache grows over its size limit; the modification
+    time of the files records their last use.
+
+    Parameters
+    ----------
+    directory:
+        Where to store the tables, created on the first write.
+    max_bytes:
+        Size limit of the cache. ``0`` disables caching.
+    """
+
+    def __init__(self, directory, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{_SUFFIX}"
+
+    def _entries(self) -> list[Path]:
+        if not self.directory.is_dir():
+            return []
+        return list(self.directory.glob(f"*{_SUFFIX}"))
+
+    def get(self, key: str):
+        """Return the cached simulation table for ``key`` or ``None``."""
+        if not self.max_bytes:
+            return None
+        path = self._path(key)
+        try:
+            sim_df = petab.get_simulation_df(path)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.exception(f"Removing unreadable cache entry {path}")
+            path.unlink(missing_ok=True)
+            return None
+        # Mark as recently used
+        os.utime(path)
+        return sim_df
+
+    def put(self, key: str, sim_df):
+        """Store a simulation table and evict entries over the size limit."""
+        if not self.max_bytes:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so that concurrent readers
+        # never see partial tables
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", newline="") as file:
+                sim_df.to_csv(file, sep="\t", index=False)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries over the size limit."""
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def set_max_bytes(self, max_bytes: int):
+        """Change the size limit, evicting entries if needed."""
+        self.max_bytes = max_bytes
+        self.evict()
+
+    def stats(self) -> tuple[int, int]:
+        """Return the number of entries and their total size in bytes."""
+        sizes = []
+        for path in self._entries():
+            try:
+                sizes.append(path.stat().st_size)
+            except FileNotFoundError:
+                continue
+        return len(sizes), sum(sizes)
+
+    def clear(self):
+        """Remove all entries."""
+        for path in self._entries():
+            path.unlink(missing_ok=True)
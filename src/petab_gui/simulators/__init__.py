@@ -0,0 +1,73 @@
+"""Simulator backends for PEtab problems.
+
+Built-in backends are :class:`BasicoBackend` (COPASI) and
+:class:`ScipyBackend`. Further backends can be provided by other packages
+as :class:`SimulatorBackend` subclasses, registered under the entry point
+group ``petab_gui.simulators``, e.g. in ``pyproject.toml``::
+
+    [project.entry-points."petab_gui.simulators"]
+    my_simulator = "my_package.petab_gui_plugin:MySimulatorBackend"
+"""
+
+import logging
+from importlib.metadata import entry_points
+
+from .base import SimulatorBackend, required_capabilities
+from .basico_backend import BasicoBackend
+from .scipy_backend import ScipyBackend
+
+logger = logging.getLogger(__name__)
+
+#: Entry point group of simulator plugins
+ENTRY_POINT_GROUP = "petab_gui.simulators"
+#: Backend used unless configured otherwise
+DEFAULT_BACKEND = BasicoBackend.name
+
+_BUILTIN_BACKENDS = {
+    BasicoBackend.name: BasicoBackend,
+    ScipyBackend.name: ScipyBackend,
+}
+
+
+def backends() -> dict[str, type[SimulatorBackend]]:
+    """Return all registered backend classes by name.
+
+    Plugins that fail to load are logged and skipped.
+    """
+    registered = dict(_BUILTIN_BACKENDS)
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        if entry_point.name in registered:
+            continue
+        try:
+            registered[entry_point.name] = entry_point.load()
+        except Exception:
+            logger.exception(f"Error loading simulator {entry_point.name}")
+    return registered
+
+
+def get_backend(name: str) -> SimulatorBackend:
+    """Create the backend registered as ``name``.
+
+    Raises
+    ------
+    ValueError
+        If there is no such backend or it is not installed.
+    """
+    backend_class = backends().get(name)
+    if backend_class is None:
+        raise ValueError(f"Unknown simulator: {name}")
+    if not backend_class.is_available():
+        raise ValueError(f"Simulator {name} is not installed.")
+    return backend_class()
+
+
+__all__ = [
+    "BasicoBackend",
+    "DEFAULT_BACKEND",
+    "ENTRY_POINT_GROUP",
+    "ScipyBackend",
+    "SimulatorBackend",
+    "backends",
+    "get_backend",
+    "required_capabilities",
+]
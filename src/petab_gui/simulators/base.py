@@ -0,0 +1,184 @@
+"""Interface of simulator backends."""
+
+import numpy as np
+import pandas as pd
+import petab.v1 as petab
+
+
+class SimulatorBackend:
+    """Simulates PEtab problems with a specific simulator.
+
+    A backend is used in two steps: :meth:`prepare` loads a problem, e.g.
+    imports the model into the simulator, then :meth:`simulate` computes
+    its simulation table. Backends run in worker processes, so they are
+    created from their registered name, see :func:`get_backend`.
+
+    A prepared backend can be kept to simulate edited versions of the
+    problem: :meth:`update` only prepares the problem again if the model
+    changed, otherwise it calls :meth:`prepare_tables`.
+
+    Subclasses set :attr:`name`, :attr:`label` and :attr:`CAPABILITIES`
+    and implement :meth:`prepare` and :meth:`simulate`. :meth:`prepare`
+    stores the problem as ``_petab_problem``. Subclasses that can apply
+    table changes to a loaded model override :meth:`prepare_tables`.
+    """
+
+    #: Name the backend is registered and stored in the settings with
+    name = None
+    #: Human readable name for the settings dialog
+    label = None
+    #: Supported features, see :meth:`capabilities`
+    CAPABILITIES = {}
+
+    def __init__(self):
+        self._petab_problem = None
+        # SBML text of the model, and the problem it was loaded for
+        self._model_text = None
+        self._model_text_problem = None
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Whether the simulator is installed."""
+        return True
+
+    @classmethod
+    def capabilities(cls) -> dict[str, bool]:
+        """Return the features the backend supports.
+
+        Keys are
+
+        * ``"events"``: SBML events,
+        * ``"algebraic_rules"``: SBML algebraic rules,
+        * ``"preequilibration"``: preequilibration conditions,
+        * ``"steady_state"``: measurements at time ``inf``.
+
+        See :func:`required_capabilities` for the features of a problem.
+        """
+        return dict(cls.CAPABILITIES)
+
+    def prepare(self, petab_problem):
+        """Load the problem to simulate.
+
+        Raises
+        ------
+        ValueError
+            If the problem uses features the backend does not support.
+        """
+        raise NotImplementedError
+
+    def prepare_tables(self, petab_problem):
+        """Load a problem with the same model as the prepared one.
+
+        The default prepares the problem from scratch.
+        """
+        self.prepare(petab_problem)
+
+    def update(self, petab_problem):
+        """Load a changed version of the prepared problem.
+
+        Keeps the prepared model if the SBML text of the model did not
+        change, see :meth:`prepare_tables`.
+        """
+        model_text = _model_text(petab_problem)
+        if (
+            self._petab_problem is not None
+            and self._petab_problem is self._model_text_problem
+            and model_text == self._model_text
+        ):
+            self.prepare_tables(petab_problem)
+        else:
+            # A failing prepare must not leave the old problem behind
+            self._petab_problem = None
+            self.prepare(petab_problem)
+        self._model_text = model_text
+        self._model_text_problem = self._petab_problem
+
+    def simulate(self, report_progress=None):
+        """Simulate the prepared problem.
+
+        Parameters
+        ----------
+        report_progress : callable, optional
+            Called as ``report_progress(done, total, message)``. Backends
+            that finish some measurements before others pass these rows of
+            the simulation table as a fourth argument, indexed by their
+            position in the measurement table.
+
+        Returns
+        -------
+        pd.DataFrame
+            The simulation table, in the order of the measurement table.
+        """
+        raise NotImplementedError
+
+    def set_nominal_values(self, values: dict):
+        """Change nominal values of parameters of the prepared problem.
+
+        Used to simulate many parameter vectors of the same problem. The
+        default loads the changed problem with :meth:`update`, backends
+        that can set parameters more directly override this.
+
+        Parameters
+        ----------
+        values:
+            Nominal values by parameter ID, on linear scale.
+        """
+        parameter_df = self._petab_problem.parameter_df.copy()
+        parameter_df.loc[list(values), petab.C.NOMINAL_VALUE] = list(
+            values.values()
+        )
+        self.update(
+            petab.Problem(
+                condition_df=self._petab_problem.condition_df,
+                measurement_df=self._petab_problem.measurement_df,
+                observable_df=self._petab_problem.observable_df,
+                parameter_df=parameter_df,
+                model=self._petab_problem.model,
+            )
+        )
+
+    def cancel(self):
+        """Stop a running :meth:`simulate`.
+
+        Called in the worker process when the simulation is cancelled,
+        right before the process is terminated, see
+        :func:`~petab_gui.simulation.cancel_session`. Backends that start
+        processes or threads of their own or write temporary files stop or
+        remove them here. The default does nothing.
+        """
+
+    def close(self):
+        """Release the resources of the prepared problem."""
+        self._petab_problem = None
+
+
+def required_capabilities(petab_problem) -> set[str]:
+    """Features of :meth:`SimulatorBackend.capabilities` a problem uses."""
+    required = set()
+    sbml_model = getattr(petab_problem.model, "sbml_model", None)
+    if sbml_model is not None:
+        if sbml_model.getNumEvents():
+            required.add("events")
+        if any(rule.isAlgebraic() for rule in sbml_model.getListOfRules()):
+            required.add("algebraic_rules")
+    measurement_df = petab_problem.measurement_df
+    if measurement_df is not None and not measurement_df.empty:
+        preequilibration = measurement_df.get(
+            petab.C.PREEQUILIBRATION_CONDITION_ID
+        )
+        if (
+            preequilibration is not None
+            and (preequilibration.fillna("").astype(str) != "").any()
+        ):
+            required.add("preequilibration")
+        times = pd.to_numeric(measurement_df[petab.C.TIME], errors="coerce")
+        if np.isinf(times).any():
+            required.add("steady_state")
+    return required
+
+
+def _model_text(petab_problem) -> str | None:
+    """The SBML text of the model of a problem."""
+    if petab_problem.model is None:
+        return None
+    return petab_problem.model.to_sbml_str()
@@ -0,0 +1,182 @@
+"""Simulation with COPASI through basico."""
+
+import importlib.util
+import tempfile
+
+import libsbml
+import petab.v1 as petab
+
+from .base import SimulatorBackend
+
+
+class BasicoBackend(SimulatorBackend):
+    """Simulate with COPASI, using the PEtab support of basico.
+
+    Supports all models COPASI can import.
+
+    The problem is imported into COPASI on the first :meth:`simulate` and
+    kept loaded. Changed nominal values of model parameters are set on the
+    loaded model, other changes import the problem again.
+
+    COPASI names the imported parameters by their SBML name and does not
+    keep their SBML IDs, so parameters are named by their ID for the
+    import.
+    """
+
+    name = "basico"
+    label = "COPASI (basico)"
+    CAPABILITIES = {
+        "events": True,
+        "algebraic_rules": True,
+        "preequilibration": True,
+        "steady_state": True,
+    }
+
+    def __init__(self):
+        super().__init__()
+        self._simulator = None
+        self._working_dir = None
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Whether basico is installed."""
+        return importlib.util.find_spec("basico") is not None
+
+    def prepare(self, petab_problem):
+        """Load the problem, requires a nominalValue column."""
+        self.close()
+        self._petab_problem = petab_problem
+
+    def prepare_tables(self, petab_problem):
+        """Set changed nominal values on the loaded COPASI model."""
+        if self._simulator is not None:
+            values = self._changed_nominal_values(petab_problem)
+            if values is None or not self._set_model_values(values):
+                self.prepare(petab_problem)
+                return
+            self._simulator.petab_problem = petab_problem
+        self._petab_problem = petab_problem
+
+    def simulate(self, report_progress=None):
+        """Simulate the nominal parameters with COPASI."""
+        import basico
+        from basico.petab import PetabSimulator
+
+        def progress(done, total, message):
+            if report_progress is not None:
+                report_progress(done, total, message)
+
+        progress(
+            0,
+            1,
+            f"Simulate with basico: {basico.__version__}, "
+            f"COPASI: {basico.COPASI.__version__}",
+        )
+        if self._simulator is None:
+            self._working_dir = tempfile.TemporaryDirectory()
+            # settings is only current solution statistic for now:
+            settings = {"method": {"name": basico.PE.CURRENT_SOLUTION}}
+            self._simulator = PetabSimulator(
+                _with_id_names(self._petab_problem),
+                settings=settings,
+                working_dir=self._working_dir.name,
+            )
+        sim_df = self._simulator.simulate()
+        progress(1, 1, "Simulation finished.")
+        return sim_df
+
+    def close(self):
+        """Remove the model from COPASI and delete its files."""
+        if self._simulator is not None:
+            import basico
+
+            basico.remove_datamodel(self._simulator.model)
+            self._simulator = None
+        if self._working_dir is not None:
+            self._working_dir.cleanup()
+            self._working_dir = None
+        super().close()
+
+    def _changed_nominal_values(self, petab_problem) -> dict | None:
+        """Nominal values that differ from the loaded problem.
+
+        Returns ``None`` if anything but nominal values changed.
+        """
+        loaded = self._petab_problem
+        for table in ("measurement_df", "condition_df", "observable_df"):
+            old, new = getattr(loaded, table), getattr(petab_problem, table)
+            if (old is None) != (new is None) or (
+                old is not None and not old.equals(new)
+            ):
+                return None
+        old, new = loaded.parameter_df, petab_problem.parameter_df
+        if (
+            petab.C.NOMINAL_VALUE not in old
+            or petab.C.NOMINAL_VALUE not in new
+            or not old.index.equals(new.index)
+            or not old.drop(columns=petab.C.NOMINAL_VALUE).equals(
+                new.drop(columns=petab.C.NOMINAL_VALUE)
+            )
+        ):
+            return None
+        old_values = old[petab.C.NOMINAL_VALUE].astype(float)
+        new_values = new[petab.C.NOMINAL_VALUE].astype(float)
+        changed = (old_values != new_values) & ~(
+            old_values.isna() & new_values.isna()
+        )
+        return new_values[changed].to_dict()
+
+    def _set_model_values(self, values) -> bool:
+        """Set values of global quantities of the loaded model.
+
+        Returns ``False``, without changing the model, if a parameter is
+        not a global quantity.
+        """
+        import basico
+
+        model = self._simulator.model
+        # Named by their SBML ID, see _with_id_names
+        quantities = basico.get_parameters(model=model)
+        if quantities is None or not set(values) <= set(quantities.index):
+            return False
+        for parameter_id, value in values.items():
+            basico.set_parameters(
+                parameter_id, exact=True, initial_value=value, model=model
+            )
+        # The start values of estimated parameters
+        fit_items = basico.get_fit_parameters(model=model)
+        if fit_items is not None:
+            starts = {
+                quantities.loc[parameter_id, "display_name"]: float(value)
+                for parameter_id, value in values.items()
+            }
+            estimated = fit_items.index.isin(list(starts))
+            if estimated.any():
+                fit_items.loc[estimated, "start"] = fit_items.index[
+                    estimated
+                ].map(starts)
+                basico.set_fit_parameters(fit_items.reset_index(), model=model)
+        return True
+
+
+def _with_id_names(petab_problem):
+    """Copy of a problem whose SBML parameters are named by their ID."""
+    sbml_model = getattr(petab_problem.model, "sbml_model", None)
+    if sbml_model is None or all(
+        parameter.getName() in ("", parameter.getId())
+        for parameter in sbml_model.getListOfParameters()
+    ):
+        return petab_problem
+    document = libsbml.readSBMLFromString(petab_problem.model.to_sbml_str())
+    for parameter in document.getModel().getListOfParameters():
+        parameter.setName(parameter.getId())
+    return petab.Problem(
+        condition_df=petab_problem.condition_df,
+        measurement_df=petab_problem.measurement_df,
+        observable_df=petab_problem.observable_df,
+        parameter_df=petab_problem.parameter_df,
+        visualization_df=petab_problem.visualization_df,
+        model=petab.models.sbml_model.SbmlModel(
+            sbml_model=document.getModel(), sbml_document=document
+        ),
+    )
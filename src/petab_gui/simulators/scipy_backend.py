@@ -0,0 +1,594 @@
+"""Simulation of simple SBML models with SciPy.
+
+The reactions and rules of the SBML model are translated to ordinary
+differential equations with libsbml and sympy and integrated with
+:func:`scipy.integrate.solve_ivp`. Intended for small models without
+events, e.g. for quick local simulations and benchmarks without COPASI.
+"""
+
+import importlib.util
+
+import libsbml
+import numpy as np
+import pandas as pd
+import petab.v1 as petab
+import sympy as sp
+from petab.v1.math import sympify_petab
+
+from .base import SimulatorBackend
+
+#: Name of the time symbol in all expressions
+TIME = "time"
+#: Longest integration when searching a steady state
+STEADY_STATE_MAX_TIME = 1e8
+
+_UNSUPPORTED_MATH = {
+    getattr(libsbml, name): label
+    for name, label in (
+        ("AST_FUNCTION_DELAY", "delay"),
+        ("AST_FUNCTION_RATE_OF", "rateOf"),
+        ("AST_NAME_AVOGADRO", "avogadro"),
+    )
+    if hasattr(libsbml, name)
+}
+
+
+def _canonical(expr):
+    """Replace all symbols by plain symbols of the same name."""
+    return expr.xreplace({s: sp.Symbol(s.name) for s in expr.free_symbols})
+
+
+def _names(expr) -> set[str]:
+    return {s.name for s in expr.free_symbols}
+
+
+def _substitute(expr, values: dict):
+    """Replace the symbols named in ``values`` by their values."""
+    mapping = {
+        s: values[s.name] for s in expr.free_symbols if s.name in values
+    }
+    return expr.xreplace(mapping) if mapping else expr
+
+
+def _parse_math(math, context):
+    """Convert libsbml math to a sympy expression."""
+    if math is None:
+        raise ValueError(f"Missing math in {context}.")
+    math = math.deepCopy()
+    nodes = [math]
+    while nodes:
+        node = nodes.pop()
+        if node.getType() == libsbml.AST_NAME_TIME:
+            node.setName(TIME)
+        elif node.getType() in _UNSUPPORTED_MATH:
+            raise ValueError(
+                f"{_UNSUPPORTED_MATH[node.getType()]} in {context} is not "
+                f"supported."
+            )
+        nodes.extend(node.getChild(i) for i in range(node.getNumChildren()))
+    return _parse_formula(libsbml.formulaToL3String(math), context)
+
+
+def _parse_formula(formula, context):
+    try:
+        return _canonical(sp.sympify(sympify_petab(formula)))
+    except Exception as e:
+        raise ValueError(f"Cannot interpret {context}: {formula}") from e
+
+
+class _OdeModel:
+    """Differential equations of an SBML model.
+
+    Every species that is not defined by an assignment rule is a state,
+    in units of concentration unless it has only substance units. Boundary
+    and constant species are states without change.
+    """
+
+    def __init__(self, sbml_model):
+        self._check_supported(sbml_model)
+        #: Default values of the compartments and parameters
+        self.constants = {}
+        #: Initial values of the states, and of constants defined by
+        #: initial assignments, as expressions
+        self.initial = {}
+        #: Assignment rules, with nested rules resolved
+        self.assignments = {}
+        rates = {}
+
+        for compartment in sbml_model.getListOfCompartments():
+            self.constants[compartment.getId()] = (
+                compartment.getSize() if compartment.isSetSize() else 1.0
+            )
+        for parameter in sbml_model.getListOfParameters():
+            self.constants[parameter.getId()] = (
+                parameter.getValue() if parameter.isSetValue() else np.nan
+            )
+
+        species_compartment = {}
+        for species in sbml_model.getListOfSpecies():
+            species_id = species.getId()
+            compartment = sp.Symbol(species.getCompartment())
+            only_substance = species.getHasOnlySubstanceUnits()
+            if not only_substance:
+                species_compartment[species_id] = compartment
+            if species.isSetInitialAmount():
+                value = sp.Float(species.getInitialAmount())
+                if not only_substance:
+                    value /= compartment
+            elif species.isSetInitialConcentration():
+                value = sp.Float(species.getInitialConcentration())
+                if only_substance:
+                    value *= compartment
+            else:
+                value = sp.Float(0.0)
+            self.initial[species_id] = value
+            rates[species_id] = sp.Integer(0)
+
+        for rule in sbml_model.getListOfRules():
+            variable = rule.getVariable()
+            expr = _parse_math(rule.getMath(), f"rule for {variable}")
+            if rule.isAssignment():
+                self.assignments[variable] = expr
+                self.constants.pop(variable, None)
+                self.initial.pop(variable, None)
+                rates.pop(variable, None)
+            else:
+                if variable in self.constants:
+                    self.initial[variable] = sp.Float(
+                        self.constants.pop(variable)
+                    )
+                rates[variable] = expr
+        rate_rules = {
+            rule.getVariable()
+            for rule in sbml_model.getListOfRules()
+            if rule.isRate()
+        }
+
+        for reaction in sbml_model.getListOfReactions():
+            self._add_reaction(
+                reaction, rates, rate_rules, species_compartment, sbml_model
+            )
+
+        for assignment in sbml_model.getListOfInitialAssignments():
+            symbol = assignment.getSymbol()
+            self.initial[symbol] = _parse_math(
+                assignment.getMath(), f"initial assignment of {symbol}"
+            )
+
+        self._resolve_assignments()
+        self.state_ids = list(rates)
+        self.rates = [
+            _substitute(rates[state_id], self.assignments)
+            for state_id in self.state_ids
+        ]
+        self.initial = {
+            symbol: _substitute(expr, self.assignments)
+            for symbol, expr in self.initial.items()
+        }
+
+    @staticmethod
+    def _check_supported(sbml_model):
+        if sbml_model.getNumEvents():
+            raise ValueError("Models with events are not supported.")
+        for rule in sbml_model.getListOfRules():
+            if rule.isAlgebraic():
+                raise ValueError("Algebraic rules are not supported.")
+            if rule.isRate() and sbml_model.getCompartment(rule.getVariable()):
+                raise ValueError(
+                    "Compartments with rate rules are not supported."
+                )
+        for reaction in sbml_model.getListOfReactions():
+            if reaction.isSetFast() and reaction.getFast():
+                raise ValueError("Fast reactions are not supported.")
+
+    def _add_reaction(
+        self, reaction, rates, rate_rules, species_compartment, sbml_model
+    ):
+        """Add the change by a reaction to the rates of its species."""
+        kinetic_law = reaction.getKineticLaw()
+        if kinetic_law is None:
+            return
+        context = f"kinetic law of {reaction.getId()}"
+        rate = _parse_math(kinetic_law.getMath(), context)
+        # Local parameters shadow global symbols of the same name
+        rate = _substitute(
+            rate,
+            {
+                parameter.getId(): sp.Float(parameter.getValue())
+                for parameter in kinetic_law.getListOfParameters()
+            },
+        )
+        for references, sign in (
+            (reaction.getListOfReactants(), -1),
+            (reaction.getListOfProducts(), 1),
+        ):
+            for reference in references:
+                if reference.isSetStoichiometryMath() or (
+                    reference.isSetId()
+                    and (
+                        sbml_model.getRule(reference.getId())
+                        or sbml_model.getInitialAssignment(reference.getId())
+                    )
+                ):
+                    raise ValueError(
+                        f"Variable stoichiometry in {reaction.getId()} is "
+                        f"not supported."
+                    )
+                species_id = reference.getSpecies()
+                species = sbml_model.getSpecies(species_id)
+                if (
+                    species.getBoundaryCondition()
+                    or species.getConstant()
+                    or species_id in rate_rules
+                    or species_id in self.assignments
+                ):
+                    continue
+                stoichiometry = (
+                    reference.getStoichiometry()
+                    if reference.isSetStoichiometry()
+                    else 1.0
+                )
+                change = sign * stoichiometry * rate
+                if species_id in species_compartment:
+                    change /= species_compartment[species_id]
+                rates[species_id] += change
+
+    def _resolve_assignments(self):
+        """Substitute nested assignment rules."""
+        for _ in range(len(self.assignments) + 1):
+            resolved = {
+                variable: _substitute(expr, self.assignments)
+                for variable, expr in self.assignments.items()
+            }
+            if resolved == self.assignments:
+                return
+            self.assignments = resolved
+        raise ValueError("Assignment rules are cyclic.")
+
+
+class ScipyBackend(SimulatorBackend):
+    """Simulate SBML models without events with SciPy's ``solve_ivp``.
+
+    Supports reactions, assignment and rate rules, initial assignments and
+    function definitions. Steady states, for preequilibration and
+    measurements at time ``inf``, are found by integrating until the
+    states no longer change.
+
+    Parameters
+    ----------
+    method:
+        Integration method of :func:`scipy.integrate.solve_ivp`.
+    rtol, atol:
+        Relative and absolute tolerances of the integration.
+    """
+
+    name = "scipy"
+    label = "SciPy (solve_ivp)"
+    CAPABILITIES = {
+        "events": False,
+        "algebraic_rules": False,
+        "preequilibration": True,
+        "steady_state": True,
+    }
+
+    def __init__(self, method="LSODA", rtol=1e-8, atol=1e-12):
+        super().__init__()
+        self.method = method
+        self.rtol = rtol
+        self.atol = atol
+        self._model = None
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Whether SciPy is installed."""
+        return importlib.util.find_spec("scipy") is not None
+
+    def prepare(self, petab_problem):
+        """Translate the SBML model to differential equations."""
+        if petab_problem.model is None:
+            raise ValueError("The problem has no model.")
+        document = libsbml.readSBMLFromString(
+            petab_problem.model.to_sbml_str()
+        )
+        properties = libsbml.ConversionProperties()
+        properties.addOption("expandFunctionDefinitions", True)
+        if document.convert(properties) != libsbml.LIBSBML_OPERATION_SUCCESS:
+            raise ValueError("Cannot expand the function definitions.")
+        model = _OdeModel(document.getModel())
+
+        states = [sp.Symbol(state_id) for state_id in model.state_ids]
+        self._parameter_ids = sorted(
+            set().union(*(_names(rate) for rate in model.rates))
+            - set(model.state_ids)
+            - {TIME}
+        )
+        parameters = [sp.Symbol(name) for name in self._parameter_ids]
+        time = sp.Symbol(TIME)
+        self._rhs = sp.lambdify(
+            (time, states, parameters), model.rates, modules="numpy"
+        )
+        self._jacobian = sp.lambdify(
+            (time, states, parameters),
+            sp.Matrix(model.rates).jacobian(states),
+            modules="numpy",
+        )
+        self._model = model
+        self.prepare_tables(petab_problem)
+
+    def prepare_tables(self, petab_problem):
+        """Load the tables, keeping the translated model."""
+        self._observables = {
+            observable_id: _substitute(
+                _parse_formula(
+                    str(formula), f"formula of observable {observable_id}"
+                ),
+                self._model.assignments,
+            )
+            for observable_id, formula in petab_problem.observable_df[
+                petab.C.OBSERVABLE_FORMULA
+            ].items()
+        }
+        self._petab_problem = petab_problem
+        self._nominal_values = (
+            petab_problem.parameter_df[petab.C.NOMINAL_VALUE].to_dict()
+            if petab.C.NOMINAL_VALUE in petab_problem.parameter_df
+            else {}
+        )
+
+    def set_nominal_values(self, values: dict):
+        """Change nominal values, without translating the model again."""
+        self._nominal_values.update(values)
+
+    def simulate(self, report_progress=None):
+        """Simulate all condition pairs of the prepared problem."""
+        measurement_df = self._petab_problem.measurement_df.reset_index(
+            drop=True
+        )
+        sim_df = measurement_df.rename(
+            columns={petab.C.MEASUREMENT: petab.C.SIMULATION}
+        )
+        sim_df[petab.C.SIMULATION] = np.nan
+        if petab.C.PREEQUILIBRATION_CONDITION_ID in measurement_df:
+            preequilibration = (
+                measurement_df[petab.C.PREEQUILIBRATION_CONDITION_ID]
+                .fillna("")
+                .astype(str)
+            )
+        else:
+            preequilibration = pd.Series("", index=measurement_df.index)
+        groups = measurement_df.groupby(
+            [
+                preequilibration,
+                measurement_df[petab.C.SIMULATION_CONDITION_ID],
+            ],
+            sort=False,
+        ).indices
+        column = sim_df.columns.get_loc(petab.C.SIMULATION)
+        for done, ((preequilibration, simulation), rows) in enumerate(
+            groups.items(), start=1
+        ):
+            sim_df.iloc[rows, column] = self._simulate_condition(
+                preequilibration, simulation, measurement_df.iloc[rows]
+            )
+            if report_progress is not None:
+                report_progress(
+                    done,
+                    len(groups),
+                    f"Simulated condition {simulation}.",
+                    sim_df.iloc[rows],
+                )
+        return sim_df
+
+    def _condition(self, condition_id):
+        """Parameter values and state overrides of a condition.
+
+        Returns
+        -------
+        tuple[dict, dict]
+            The values of all non-state symbols and the initial values
+            the condition sets for states.
+        """
+        values = dict(self._model.constants)
+        values.update(self._nominal_values)
+        constants = {}
+        states = {}
+        condition_df = self._petab_problem.condition_df
+        if condition_df is not None and condition_id in condition_df.index:
+            for target, value in condition_df.loc[condition_id].items():
+                if target == petab.C.CONDITION_NAME:
+                    continue
+                value = self._resolve(value, values)
+                if np.isnan(value):
+                    continue
+                if target in self._model.state_ids:
+                    states[target] = value
+                else:
+                    constants[target] = value
+        values.update(constants)
+        # Initial assignments of constants, unless set by the tables
+        for symbol, expr in self._model.initial.items():
+            if (
+                symbol not in self._model.state_ids
+                and symbol not in self._nominal_values
+                and symbol not in constants
+            ):
+                values[symbol] = self._evaluate(expr, values)
+        return values, states
+
+    def _parameter_vector(self, values) -> list[float]:
+        """Values of the parameters of the differential equations."""
+        missing = [name for name in self._parameter_ids if name not in values]
+        if missing:
+            raise ValueError(f"No values for {missing}.")
+        return [values[name] for name in self._parameter_ids]
+
+    @staticmethod
+    def _resolve(value, values) -> float:
+        """Numeric value of a table cell holding a number or a symbol."""
+        if isinstance(value, str):
+            if value in values:
+                return float(values[value])
+            return float(value)
+        return float(value)
+
+    @staticmethod
+    def _evaluate(expr, values) -> float:
+        try:
+            return float(_substitute(expr, values))
+        except TypeError:
+            raise ValueError(
+                f"Cannot evaluate {expr}, undefined symbols: "
+                f"{sorted(_names(_substitute(expr, values)))}"
+            ) from None
+
+    def _initial_states(self, values, overrides):
+        """Initial state vector for the given parameter values."""
+        model = self._model
+        known = dict(values)
+        known[TIME] = 0.0
+        known.update(overrides)
+        pending = [
+            state_id for state_id in model.state_ids if state_id not in known
+        ]
+        # Initial assignments may refer to other states
+        for _ in range(len(pending) + 1):
+            remaining = []
+            for state_id in pending:
+                expr = _substitute(model.initial[state_id], known)
+                if expr.free_symbols:
+                    remaining.append(state_id)
+                else:
+                    known[state_id] = float(expr)
+            if not remaining:
+                break
+            pending = remaining
+        return np.array(
+            [
+                self._evaluate(model.initial[state_id], known)
+                if state_id not in known
+                else known[state_id]
+                for state_id in model.state_ids
+            ]
+        )
+
+    def _integrate(self, x0, parameters, t_end, t_eval=None):
+        from scipy.integrate import solve_ivp
+
+        def rhs(t, x):
+            return np.asarray(self._rhs(t, x, parameters), dtype=float)
+
+        def jacobian(t, x):
+            return np.asarray(self._jacobian(t, x, parameters), dtype=float)
+
+        result = solve_ivp(
+            rhs,
+            (0.0, t_end),
+            x0,
+            method=self.method,
+            t_eval=t_eval,
+            jac=jacobian,
+            rtol=self.rtol,
+            atol=self.atol,
+        )
+        if not result.success:
+            raise RuntimeError(f"Integration failed: {result.message}")
+        return result
+
+    def _steady_state(self, x0, parameters):
+        """Integrate until the states no longer change."""
+        t_end = 1.0
+        x = x0
+        while t_end <= STEADY_STATE_MAX_TIME:
+            x = self._integrate(x, parameters, t_end).y[:, -1]
+            change = np.asarray(self._rhs(t_end, x, parameters), dtype=float)
+            if np.all(np.abs(change) <= self.atol + self.rtol * np.abs(x)):
+                return x
+            t_end *= 10
+        raise RuntimeError("No steady state found.")
+
+    def _simulate_condition(self, preequilibration, simulation, rows_df):
+        """Simulate the measurements of one condition pair."""
+        values, overrides = self._condition(simulation)
+        parameters = self._parameter_vector(values)
+        if preequilibration:
+            pre_values, pre_overrides = self._condition(preequilibration)
+            x0 = self._steady_state(
+                self._initial_states(pre_values, pre_overrides),
+                self._parameter_vector(pre_values),
+            )
+            for state_id, value in overrides.items():
+                x0[self._model.state_ids.index(state_id)] = value
+        else:
+            x0 = self._initial_states(values, overrides)
+
+        times = rows_df[petab.C.TIME].to_numpy(dtype=float)
+        finite_times = np.unique(times[np.isfinite(times)])
+        states = np.empty((len(times), len(x0)))
+        if len(finite_times):
+            if finite_times[-1] > 0:
+                trajectory = self._integrate(
+                    x0, parameters, finite_times[-1], finite_times
+                ).y.T
+            else:
+                trajectory = x0[np.newaxis, :]
+            finite = np.isfinite(times)
+            states[finite] = trajectory[
+                np.searchsorted(finite_times, times[finite])
+            ]
+        if not np.isfinite(times).all():
+            states[~np.isfinite(times)] = self._steady_state(x0, parameters)
+
+        simulations = np.empty(len(rows_df))
+        overrides_column = rows_df.get(petab.C.OBSERVABLE_PARAMETERS)
+        keys = rows_df[petab.C.OBSERVABLE_ID].astype(str)
+        if overrides_column is not None:
+            keys = keys + "\t" + overrides_column.fillna("").astype(str)
+        for positions in rows_df.groupby(keys.to_numpy()).indices.values():
+            row = rows_df.iloc[positions[0]]
+            simulations[positions] = self._evaluate_observable(
+                row[petab.C.OBSERVABLE_ID],
+                row.get(petab.C.OBSERVABLE_PARAMETERS, np.nan),
+                times[positions],
+                states[positions],
+                values,
+            )
+        return simulations
+
+    def _evaluate_observable(
+        self, observable_id, observable_parameters, times, states, values
+    ):
+        """Evaluate an observable for the given states."""
+        values = dict(values)
+        if isinstance(observable_parameters, str) or not np.isnan(
+            observable_parameters
+        ):
+            for i, value in enumerate(
+                petab.split_parameter_replacement_list(observable_parameters),
+                start=1,
+            ):
+                values[f"observableParameter{i}_{observable_id}"] = (
+                    self._resolve(value, values)
+                )
+        expr = self._observables[observable_id]
+        names = sorted(_names(expr))
+        state_index = {
+            state_id: i for i, state_id in enumerate(self._model.state_ids)
+        }
+        arguments = []
+        for name in names:
+            if name == TIME:
+                arguments.append(times)
+            elif name in state_index:
+                arguments.append(states[:, state_index[name]])
+            elif name in values:
+                arguments.append(values[name])
+            else:
+                raise ValueError(
+                    f"Unknown symbol {name} in observable {observable_id}."
+                )
+        function = sp.lambdify(
+            [sp.Symbol(name) for name in names], expr, modules="numpy"
+        )
+        return np.broadcast_to(
+            np.asarray(function(*arguments), dtype=float), times.shape
+        )
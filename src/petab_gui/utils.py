@@ -157,6 +157,32 @@ def get_selected(
     return None
 
 
+def get_selected_rows(table_view: QTableView) -> np.ndarray:
+    """Get the unique selected row indices of a QTableView.
+
+    Reads the selection ranges instead of every selected index, so
+    selecting whole columns of large tables stays cheap.
+
+    Args:
+        table_view (QTableView): The table view to check.
+
+    Returns:
+        np.ndarray: Sorted unique row indices of the selection.
+    """
+    if not table_view or not isinstance(table_view, QTableView):
+        return np.empty(0, dtype=int)
+    selection_model = table_view.selectionModel()
+    if not selection_model:
+        return np.empty(0, dtype=int)
+    ranges = [
+        np.arange(selection_range.top(), selection_range.bottom() + 1)
+        for selection_range in selection_model.selection()
+    ]
+    if not ranges:
+        return np.empty(0, dtype=int)
+    return np.unique(np.concatenate(ranges))
+
+
 def get_selected_rectangles(table_view: QTableView) -> np.array:
     """Returns the selected cells in a rectangular view.
 
@@ -10,6 +10,7 @@ from PySide6.QtWidgets import (
     QLabel,
     QLineEdit,
     QPushButton,
+    QSpinBox,
     QTextBrowser,
     QVBoxLayout,
 )
@@ -163,6 +164,64 @@ class DoseTimeDialog(QDialog):
         return dose, time_text, preeq
 
 
+class EnsembleDialog(QDialog):
+    """Pick how to sample the parameter ensemble to simulate."""
+
+    METHODS = {
+        "latin_hypercube": "Latin hypercube",
+        "random": "Uniform random",
+        "grid": "Grid",
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Simulate Ensemble")
+        self._samples = QSpinBox(self)
+        self._samples.setRange(1, 1_000_000)
+        self._samples.setValue(100)
+        self._method = QComboBox(self)
+        for method, label in self.METHODS.items():
+            self._method.addItem(label, method)
+        self._seed = QSpinBox(self)
+        self._seed.setRange(-1, 2**31 - 1)
+        self._seed.setValue(-1)
+        self._seed.setSpecialValueText("Random")
+        info = QLabel(
+            "Estimated parameters are sampled uniformly between their "
+            "bounds, on their parameter scale.",
+            self,
+        )
+        info.setWordWrap(True)
+        ok = QPushButton("OK", self)
+        ok.clicked.connect(self.accept)
+        cancel = QPushButton("Cancel", self)
+        cancel.clicked.connect(self.reject)
+        lay = QVBoxLayout(self)
+        lay.addWidget(info)
+        for label, widget in (
+            ("Samples:", self._samples),
+            ("Sampling:", self._method),
+            ("Seed:", self._seed),
+        ):
+            row = QHBoxLayout()
+            row.addWidget(QLabel(label, self))
+            row.addWidget(widget)
+            lay.addLayout(row)
+        btns = QHBoxLayout()
+        btns.addWidget(cancel)
+        btns.addWidget(ok)
+        lay.addLayout(btns)
+
+    def get_result(self) -> tuple[int, str, int | None]:
+        """Return the number of samples, sampling method and seed."""
+        seed = self._seed.value()
+        return (
+            self._samples.value(),
+            self._method.currentData(),
+            None if seed < 0 else seed,
+        )
+
+
 class NextStepsPanel(QDialog):
     """Non-modal panel showing possible next steps after saving."""
 
@@ -0,0 +1,236 @@
+"""Headless export of the measurement plots to image files.
+
+Renders the plots the plot dock shows, one file per observable, per
+simulation condition, per visualization table plot and for the residuals,
+without a display. Rendering uses the Agg based functions of
+:mod:`.plot_rendering` and is fanned out over a process pool.
+"""
+
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import petab.v1 as petab
+
+from .plot_rendering import render_data_figure, render_residual_set
+
+logger = logging.getLogger(__name__)
+
+#: File formats supported by the export
+EXPORT_FORMATS = ("png", "svg", "pdf")
+
+
+class PlotJob:
+    """One figure to render and save.
+
+    Carries only the table rows needed for the figure, so jobs are cheap
+    to send to worker processes.
+    """
+
+    def __init__(self, kind, name, tables, group_by=None):
+        self.kind = kind
+        self.name = name
+        self.tables = tables
+        self.group_by = group_by
+
+    @property
+    def stem(self) -> str:
+        """File name without suffix, e.g. ``observable_pSTAT5A_rel``."""
+        return f"{self.kind}_{_safe_name(self.name)}"
+
+
+def _safe_name(name) -> str:
+    """Make an ID or title usable as part of a file name."""
+    return re.sub(r"[^\w.-]+", "_", str(name))
+
+
+def _subset(df, column, value):
+    if df is None or column not in df:
+        return df
+    return df[df[column] == value]
+
+
+def collect_plot_jobs(
+    problem: petab.Problem, simulation_df=None
+) -> list[PlotJob]:
+    """Split a problem into one job per exported figure.
+
+    Parameters
+    ----------
+    problem:
+        The PEtab problem to plot.
+    simulation_df:
+        Optional simulation table. Enables the simulation lines and the
+        residual figures.
+    """
+    meas_df = problem.measurement_df
+    cond_df = problem.condition_df
+    if meas_df is None or meas_df.empty or cond_df is None:
+        return []
+
+    jobs = []
+    for observable_id in meas_df[petab.C.OBSERVABLE_ID].unique():
+        jobs.append(
+            PlotJob(
+                "observable",
+                observable_id,
+                {
+                    "cond_df": cond_df,
+                    "meas_df": _subset(
+                        meas_df, petab.C.OBSERVABLE_ID, observable_id
+                    ),
+                    "sim_df": _subset(
+                        simulation_df, petab.C.OBSERVABLE_ID, observable_id
+                    ),
+                },
+                group_by="observable",
+            )
+        )
+    for condition_id in meas_df[petab.C.SIMULATION_CONDITION_ID].unique():
+        jobs.append(
+            PlotJob(
+                "condition",
+                condition_id,
+                {
+                    "cond_df": cond_df,
+                    "meas_df": _subset(
+                        meas_df, petab.C.SIMULATION_CONDITION_ID, condition_id
+                    ),
+                    "sim_df": _subset(
+                        simulation_df,
+                        petab.C.SIMULATION_CONDITION_ID,
+                        condition_id,
+                    ),
+                },
+                group_by="simulation",
+            )
+        )
+    vis_df = problem.visualization_df
+    if vis_df is not None and not vis_df.empty:
+        for plot_id in vis_df[petab.C.PLOT_ID].unique():
+            jobs.append(
+                PlotJob(
+                    "plot",
+                    plot_id,
+                    {
+                        "vis_df": _subset(vis_df, petab.C.PLOT_ID, plot_id),
+                        "cond_df": cond_df,
+                        "meas_df": meas_df,
+                        "sim_df": simulation_df,
+                    },
+                    group_by="vis_df",
+                )
+            )
+    if simulation_df is not None and not simulation_df.empty:
+        jobs.append(
+            PlotJob(
+                "residuals",
+                "all",
+                {
+                    "meas_df": meas_df,
+                    "sim_df": simulation_df,
+                    "observable_df": problem.observable_df,
+                    "parameter_df": problem.parameter_df,
+                },
+            )
+        )
+    return jobs
+
+
+def render_plot_job(job: PlotJob, output_dir, formats, dpi=150) -> list[Path]:
+    """Render one job and save it in all requested formats.
+
+    Residual jobs produce one file per residual figure, named after its
+    title.
+
+    Returns
+    -------
+    list[Path]
+        The written files.
+    """
+    if job.kind == "residuals":
+        figures = [
+            (_safe_name(title).lower(), fig)
+            for title, fig in render_residual_set(**job.tables).residuals
+        ]
+    else:
+        fig = render_data_figure(
+            job.tables.get("vis_df"),
+            job.tables["cond_df"],
+            job.tables["meas_df"],
+            job.tables["sim_df"],
+            job.group_by,
+        )
+        figures = [] if fig is None else [(job.stem, fig)]
+
+    written = []
+    for stem, fig in figures:
+        for format_ in formats:
+            path = Path(output_dir) / f"{stem}.{format_}"
+            fig.savefig(path, format=format_, dpi=dpi)
+            written.append(path)
+    return written
+
+
+def export_plots(
+    problem: petab.Problem,
+    output_dir,
+    formats=("png",),
+    simulation_df=None,
+    max_workers=None,
+    dpi=150,
+) -> list[Path]:
+    """Render all plots of a problem to files.
+
+    Parameters
+    ----------
+    problem:
+        The PEtab problem to plot.
+    output_dir:
+        Directory to write to, created if missing.
+    formats:
+        Any of :data:`EXPORT_FORMATS`.
+    simulation_df:
+        Optional simulation table, see :func:`collect_plot_jobs`.
+    max_workers:
+        Number of worker processes. Defaults to the number of CPUs; ``1``
+        renders in the calling process.
+    dpi:
+        Resolution of raster formats.
+
+    Returns
+    -------
+    list[Path]
+        The written files. Figures that fail to render are logged and
+        skipped.
+    """
+    unsupported = set(formats) - set(EXPORT_FORMATS)
+    if unsupported:
+        raise ValueError(f"Unsupported export formats: {unsupported}")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    jobs = collect_plot_jobs(problem, simulation_df)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    written = []
+    if max_workers == 1 or len(jobs) <= 1:
+        for job in jobs:
+            try:
+                written.extend(render_plot_job(job, output_dir, formats, dpi))
+            except Exception:
+                logger.exception(f"Error exporting {job.stem}")
+        return written
+
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+        futures = [
+            pool.submit(render_plot_job, job, output_dir, formats, dpi)
+            for job in jobs
+        ]
+        for job, future in zip(jobs, futures, strict=True):
+            try:
+                written.extend(future.result())
+            except Exception:
+                logger.exception(f"Error exporting {job.stem}")
+    return written
@@ -0,0 +1,912 @@
+"""Off-screen rendering of the measurement plots.
+
+Everything in this module uses the object-oriented matplotlib API together
+with the Agg canvas only. No pyplot state and no Qt widget is touched, so the
+functions can safely run on a worker thread. The GUI thread merely attaches
+the resulting figures to ``FigureCanvasQTAgg`` widgets.
+"""
+
+import hashlib
+import logging
+import numbers
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import petab.v1 as petab
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.container import ErrorbarContainer
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from petab.v1.visualize.plotter import MPLPlotter
+from petab.v1.visualize.plotting import VisSpecParser
+
+logger = logging.getLogger(__name__)
+
+#: Pixel tolerance used for picking plotted points
+PICK_RADIUS = 5
+#: Lines with more points than this are downsampled for drawing
+DOWNSAMPLE_MIN_POINTS = 5000
+
+# Full resolution data of downsampled lines, keyed by the Line2D
+_full_line_data = weakref.WeakKeyDictionary()
+
+
+class FigurePlotter(MPLPlotter):
+    """MPLPlotter drawing into a standalone Figure instead of pyplot.
+
+    ``MPLPlotter.generate_figure`` creates its figure via ``plt.subplots``,
+    which registers it with the (Qt) pyplot backend and must therefore run
+    on the GUI thread. This subclass builds the same layout on a plain
+    :class:`~matplotlib.figure.Figure`.
+    """
+
+    def generate_figure(self, subplot_dir=None, format_="png") -> Figure:
+        num_subplots = self.figure.num_subplots
+        num_row = int(np.round(np.sqrt(num_subplots)))
+        num_col = int(np.ceil(num_subplots / num_row))
+
+        fig = Figure(figsize=self.figure.size)
+        axes = fig.subplots(num_row, num_col, squeeze=False)
+        fig.set_layout_engine("tight")
+        for ax in axes.flat[num_subplots:]:
+            ax.remove()
+
+        for subplot, ax in zip(self.figure.subplots, axes.flat, strict=False):
+            try:
+                self.generate_subplot(fig, ax, subplot)
+            except Exception as e:
+                raise RuntimeError(
+                    f"Error plotting {getattr(subplot, petab.C.PLOT_ID)}."
+                ) from e
+        return fig
+
+
+class PlotSet:
+    """All figures rendered for one state of the tables.
+
+    Attributes
+    ----------
+    figure: Figure | None
+        The overview figure with one axes per plot. ``None`` if there is
+        nothing to plot.
+    residuals: list[tuple[str, Figure]]
+        Residual and goodness-of-fit figures, with their tab titles.
+    observable_to_subplot: dict[str, int]
+        Maps observable IDs to the index of the axes they are drawn in.
+    subplot_figures: dict[int, Figure]
+        Standalone copies of the axes of :attr:`figure`, by axes index.
+        Made when first needed, see :meth:`subplot_figure`.
+    complete: bool
+        Whether rendering finished, i.e. was not cancelled.
+    """
+
+    def __init__(self, figure=None):
+        self.figure = figure
+        self.residuals = []
+        self.observable_to_subplot = {}
+        self.subplot_figures = {}
+        self.complete = False
+
+    def figures(self) -> list[Figure]:
+        """All figures of the set.
+
+        These are the overview, subplot and residual figures.
+        """
+        figures = [*self.subplot_figures.values()]
+        figures.extend(fig for _, fig in self.residuals)
+        if self.figure is not None:
+            figures.insert(0, self.figure)
+        return figures
+
+    def subplot_figure(self, subplot_idx) -> Figure:
+        """Return a standalone copy of one axes of :attr:`figure`.
+
+        The copy is made on the first call and kept with the set, so that
+        showing the set again from the cache does not copy the axes again.
+        """
+        sub_fig = self.subplot_figures.get(subplot_idx)
+        if sub_fig is None:
+            sub_fig = copy_axes_to_figure(self.figure.axes[subplot_idx])
+            self.subplot_figures[subplot_idx] = sub_fig
+        return sub_fig
+
+    def estimate_nbytes(self) -> int:
+        """Rough estimate of the memory held by the figures of the set.
+
+        Accounts for the Agg pixel buffer and the plotted data, which
+        dominate the size of a figure.
+        """
+        nbytes = 0
+        for fig in self.figures():
+            width, height = fig.get_size_inches() * fig.dpi
+            nbytes += int(width * height) * 4
+            for ax in fig.axes:
+                for line in ax.get_lines():
+                    x, y = full_line_data(line)
+                    nbytes += 8 * (len(x) + len(y))
+                for collection in ax.collections:
+                    nbytes += np.asarray(collection.get_offsets()).nbytes
+                    nbytes += sum(
+                        path.vertices.nbytes for path in collection.get_paths()
+                    )
+        return nbytes
+
+
+class PlotPointIndex:
+    """Hash index from plotted points to the table rows they stem from.
+
+    Keys are ``(observableId, time, value)`` with time and value rounded to
+    ``decimals`` decimals, so lookups tolerate floating point noise of the
+    plotted coordinates.
+
+    Parameters
+    ----------
+    df:
+        The plotted table. Row positions in ``df`` are returned by
+        :meth:`rows`.
+    value_column:
+        The plotted y column, i.e. ``measurement`` or ``simulation``.
+    decimals:
+        Number of decimals to round time and value to.
+    """
+
+    def __init__(self, df: pd.DataFrame, value_column: str, decimals=9):
+        self.decimals = decimals
+        self._rows = {}
+        columns = [petab.C.OBSERVABLE_ID, petab.C.TIME, value_column]
+        if df is None or df.empty or not set(columns).issubset(df.columns):
+            return
+        keys = pd.DataFrame(
+            {
+                "obs": df[petab.C.OBSERVABLE_ID].to_numpy(),
+                "x": self._round(df[petab.C.TIME]),
+                "y": self._round(df[value_column]),
+            }
+        )
+        self._rows = keys.groupby(["obs", "x", "y"], sort=False).indices
+
+    def _round(self, values):
+        values = pd.to_numeric(pd.Series(values), errors="coerce")
+        return np.round(values.to_numpy(dtype=float), self.decimals)
+
+    def rows(self, observable_id, x, y) -> list[int]:
+        """Return the rows plotted at ``(x, y)`` for an observable."""
+        x, y = self._round([x, y])
+        key = (observable_id, x, y)
+        if key in self._rows:
+            return self._rows[key].tolist()
+        # The rounded coordinates may lie on a rounding boundary
+        step = 10.0**-self.decimals
+        for dx in (-step, 0, step):
+            for dy in (-step, 0, step):
+                x_near, y_near = self._round([x + dx, y + dy])
+                key = (observable_id, x_near, y_near)
+                if key in self._rows:
+                    return self._rows[key].tolist()
+        return []
+
+
+def fingerprint_df(df: pd.DataFrame | None) -> str:
+    """Content hash of a DataFrame, including index and column names."""
+    if df is None:
+        return "None"
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((list(df.columns), df.index.names)).encode())
+    try:
+        row_hashes = pd.util.hash_pandas_object(df, index=True)
+        digest.update(row_hashes.to_numpy().tobytes())
+    except TypeError:
+        # unhashable cell content, e.g. lists
+        digest.update(df.to_csv().encode())
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """LRU cache of rendered plot sets with a memory cap.
+
+    Keys identify the rendered content, e.g. table fingerprints and the
+    grouping option. Sizes are estimated via
+    :meth:`PlotSet.estimate_nbytes`.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (plot_set, nbytes)
+        self._nbytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def get(self, key) -> PlotSet | None:
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key][0]
+
+    def put(self, key, plot_set: PlotSet):
+        """Store a plot set, evicting least recently used entries."""
+        if key in self._entries:
+            self._nbytes -= self._entries.pop(key)[1]
+        nbytes = plot_set.estimate_nbytes()
+        if nbytes > self.max_bytes:
+            return
+        self._entries[key] = (plot_set, nbytes)
+        self._nbytes += nbytes
+        self._evict()
+
+    def refresh(self, plot_set: PlotSet):
+        """Estimate the size of a stored plot set again.
+
+        Used after figures were added to the set, e.g. by
+        :meth:`PlotSet.subplot_figure`.
+        """
+        for key, (stored, nbytes) in list(self._entries.items()):
+            if stored is plot_set:
+                new_nbytes = plot_set.estimate_nbytes()
+                self._entries[key] = (plot_set, new_nbytes)
+                self._nbytes += new_nbytes - nbytes
+        self._evict()
+
+    def set_max_bytes(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def clear(self):
+        self._entries.clear()
+        self._nbytes = 0
+
+    def _evict(self):
+        while self._nbytes > self.max_bytes and self._entries:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self._nbytes -= nbytes
+
+
+def _label_to_observable(label: str) -> str | None:
+    """Extract the observable ID from a petab legend label.
+
+    Labels look like ``"observableId"``, ``"datasetId observableId"`` or
+    ``"datasetId observableId simulation"``.
+    """
+    label_parts = label.split()
+    if not label_parts:
+        return None
+    if label_parts[-1] == "simulation":
+        return label_parts[-2] if len(label_parts) >= 2 else label_parts[0]
+    return label_parts[-1]
+
+
+def map_observables_to_subplots(fig: Figure) -> dict[str, int]:
+    """Map observable IDs to the index of the axes they are plotted in.
+
+    When grouped by condition or dataset, one subplot can hold multiple
+    observables, hence all legend labels are inspected. Axes without a
+    legend are keyed by their title.
+    """
+    observable_to_subplot = {}
+    for idx, ax in enumerate(fig.axes):
+        _, legend_labels = ax.get_legend_handles_labels()
+        if not legend_labels:
+            observable_to_subplot[ax.get_title() or f"subplot_{idx}"] = idx
+            continue
+        for legend_label in legend_labels:
+            obs_id = _label_to_observable(legend_label)
+            if obs_id is not None:
+                observable_to_subplot[obs_id] = idx
+    return observable_to_subplot
+
+
+def enable_picking(fig: Figure):
+    """Make all lines and error bar data lines of a figure pickable."""
+    for ax in fig.axes:
+        for line in ax.get_lines():
+            line.set_picker(True)
+            line.set_pickradius(PICK_RADIUS)
+        for container in ax.containers:
+            if isinstance(container, ErrorbarContainer) and (
+                len(container.lines) > 0 and container.lines[0] is not None
+            ):
+                container.lines[0].set_picker(True)
+                container.lines[0].set_pickradius(PICK_RADIUS)
+
+
+def minmax_indices(x, y, x_min, x_max, n_buckets):
+    """Indices of the points needed to draw a line at a given resolution.
+
+    The visible x range is split into ``n_buckets`` columns (one per pixel)
+    and only the first, last, minimal and maximal point of each column is
+    kept, which preserves the visual envelope of the line. The first point
+    left and right of the visible range is kept as well, so the line does
+    not end at the axes border.
+
+    Parameters
+    ----------
+    x, y:
+        The line data. ``x`` must be sorted in ascending order.
+    x_min, x_max:
+        The visible x range.
+    n_buckets:
+        Number of columns the visible range is drawn in.
+
+    Returns
+    -------
+    np.ndarray
+        Sorted indices into ``x`` and ``y``. All returned points are points
+        of the original line.
+    """
+    n_points = len(x)
+    start = max(np.searchsorted(x, x_min, side="left") - 1, 0)
+    stop = min(np.searchsorted(x, x_max, side="right") + 1, n_points)
+    visible = np.arange(start, stop)
+    if len(visible) <= 4 * n_buckets or x_max <= x_min:
+        return visible
+
+    buckets = (x[visible] - x_min) / (x_max - x_min) * n_buckets
+    buckets = np.clip(buckets.astype(int), -1, n_buckets)
+    # sort by bucket, then by y; first and last entry per bucket are the
+    # minimum and maximum
+    order = np.lexsort((y[visible], buckets))
+    sorted_buckets = buckets[order]
+    is_first = np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]]
+    is_last = np.r_[sorted_buckets[1:] != sorted_buckets[:-1], True]
+    # first and last point by x per bucket
+    is_x_first = np.r_[True, buckets[1:] != buckets[:-1]]
+    is_x_last = np.r_[buckets[1:] != buckets[:-1], True]
+    keep = np.concatenate(
+        [
+            order[is_first | is_last],
+            np.flatnonzero(is_x_first | is_x_last),
+        ]
+    )
+    return visible[np.unique(keep)]
+
+
+def full_line_data(line) -> tuple[np.ndarray, np.ndarray]:
+    """Return the full resolution data of a possibly downsampled line."""
+    if line in _full_line_data:
+        return _full_line_data[line]
+    return line.get_xdata(), line.get_ydata()
+
+
+def _downsample_axes(ax):
+    """Redraw the downsampled lines of an axes for its current x range."""
+    x_min, x_max = sorted(ax.get_xlim())
+    n_buckets = max(int(ax.bbox.width), 1)
+    for line in ax.get_lines():
+        if line not in _full_line_data:
+            continue
+        x, y = _full_line_data[line]
+        indices = minmax_indices(x, y, x_min, x_max, n_buckets)
+        line.set_data(x[indices], y[indices])
+
+
+def _downsample_figure(event):
+    """Redraw the downsampled lines of a resized figure for its new width."""
+    for ax in event.canvas.figure.axes:
+        if any(line in _full_line_data for line in ax.get_lines()):
+            _downsample_axes(ax)
+
+
+def downsample_dense_lines(fig: Figure):
+    """Reduce dense lines of a figure to what the axes width can show.
+
+    Lines with more than :data:`DOWNSAMPLE_MIN_POINTS` points are replaced by
+    a min/max-per-pixel reduction (see :func:`minmax_indices`). The
+    reduction is recomputed whenever the x limits change, e.g. by zooming
+    or panning with the navigation toolbar, and when the canvas is resized.
+    The full data stays available through :func:`full_line_data`.
+    """
+    any_dense = False
+    for ax in fig.axes:
+        dense = False
+        for line in ax.get_lines():
+            x = np.asarray(line.get_xdata(), dtype=float)
+            y = np.asarray(line.get_ydata(), dtype=float)
+            if len(x) <= DOWNSAMPLE_MIN_POINTS or len(x) != len(y):
+                continue
+            if np.any(np.diff(x) < 0):
+                if line.get_linestyle() not in ("None", "", " "):
+                    # Reordering would change the drawn polyline
+                    continue
+                order = np.argsort(x, kind="stable")
+                x, y = x[order], y[order]
+            _full_line_data[line] = (x, y)
+            dense = True
+        if dense:
+            _downsample_axes(ax)
+            ax.callbacks.connect("xlim_changed", _downsample_axes)
+            any_dense = True
+    if any_dense:
+        # Registered with the figure, so it survives swapping the canvas
+        fig.canvas.mpl_connect("resize_event", _downsample_figure)
+
+
+def copy_axes_to_figure(ax) -> Figure:
+    """Copy the legend entries of an axes into a new standalone figure."""
+    sub_fig = Figure()
+    sub_ax = sub_fig.subplots()
+    handles, labels = ax.get_legend_handles_labels()
+    for handle, label in zip(handles, labels, strict=False):
+        if isinstance(handle, ErrorbarContainer):
+            line = handle.lines[0]
+        elif isinstance(handle, Line2D):
+            line = handle
+        else:
+            continue
+        sub_ax.plot(
+            *full_line_data(line),
+            label=label,
+            linestyle=line.get_linestyle(),
+            marker=line.get_marker(),
+            color=line.get_color(),
+            alpha=line.get_alpha(),
+            picker=True,
+            pickradius=PICK_RADIUS,
+        )
+    sub_ax.set_title(ax.get_title())
+    sub_ax.set_xlabel(ax.get_xlabel())
+    sub_ax.set_ylabel(ax.get_ylabel())
+    sub_ax.legend()
+    sub_fig.tight_layout()
+    downsample_dense_lines(sub_fig)
+    return sub_fig
+
+
+def render_data_figure(vis_df, cond_df, meas_df, sim_df, group_by):
+    """Render the overview figure of measurements and simulations.
+
+    Parameters
+    ----------
+    vis_df, cond_df, meas_df, sim_df:
+        The visualization, condition, measurement and simulation tables.
+        ``sim_df`` may be ``None``.
+    group_by:
+        One of ``"observable"``, ``"dataset"``, ``"simulation"`` or
+        ``"vis_df"``. The latter uses the visualization table and falls back
+        to grouping by observable if the table is empty or invalid.
+
+    Returns
+    -------
+    Figure | None
+        The rendered figure, or ``None`` if there is nothing to plot.
+    """
+    if meas_df is None or meas_df.empty or cond_df is None or cond_df.empty:
+        return None
+
+    if group_by == "vis_df":
+        if vis_df is not None and not vis_df.empty:
+            try:
+                vis_spec_parser = VisSpecParser(cond_df, meas_df, sim_df)
+                figure, data_provider = vis_spec_parser.parse_from_vis_spec(
+                    vis_df
+                )
+                return FigurePlotter(figure, data_provider).generate_figure()
+            except Exception:
+                logger.exception("Invalid Visualisation DF")
+        # fallback to observable grouping
+        group_by = "observable"
+
+    vis_spec_parser = VisSpecParser(cond_df, meas_df, sim_df)
+    figure, data_provider = vis_spec_parser.parse_from_id_list(
+        None, group_by, petab.C.MEAN_AND_SD
+    )
+    fig = FigurePlotter(figure, data_provider).generate_figure()
+    fig.subplots_adjust(
+        left=0.12, bottom=0.15, right=0.95, top=0.9, wspace=0.3, hspace=0.4
+    )
+    return fig
+
+
+def _scale_values(values: np.ndarray, transformations) -> np.ndarray:
+    """Vectorized :func:`petab.scale` with one transformation per value."""
+    transformations = np.asarray(transformations, dtype=object)
+    scaled = values.astype(float, copy=True)
+    log = transformations == petab.C.LOG
+    scaled[log] = np.log(values[log])
+    log10 = transformations == petab.C.LOG10
+    with np.errstate(divide="ignore"):
+        scaled[log10] = np.log10(values[log10])
+    return scaled
+
+
+def _noise_values(residual_df, observable_df, parameter_df) -> np.ndarray:
+    """Evaluate the noise formulas of all measurements.
+
+    Each formula is substituted once per observable and noise parameter
+    override, and evaluated for all their (unscaled) simulations at once.
+    """
+    import sympy as sp
+    from petab.v1.calculate import get_symbolic_noise_formulas
+
+    noise_formulas = get_symbolic_noise_formulas(observable_df)
+    parameter_values = (
+        parameter_df[petab.C.NOMINAL_VALUE]
+        if parameter_df is not None
+        else pd.Series(dtype=float)
+    )
+    general_overrides = {
+        sp.Symbol(parameter_id, real=True): value
+        for parameter_id, value in parameter_values.items()
+    }
+
+    group_cols = [petab.C.OBSERVABLE_ID]
+    if petab.C.NOISE_PARAMETERS in residual_df:
+        group_cols.append(petab.C.NOISE_PARAMETERS)
+    simulations = residual_df[petab.C.SIMULATION].to_numpy(dtype=float)
+    noise = np.empty(len(residual_df))
+    groups = residual_df.groupby(group_cols, sort=False, dropna=False)
+    for key, positions in groups.indices.items():
+        key = key if isinstance(key, tuple) else (key,)
+        observable_id = key[0]
+        noise_formula = noise_formulas.get(observable_id)
+        if noise_formula is None:
+            raise ValueError(f"No noise formula for {observable_id}.")
+        noise_parameters = petab.split_parameter_replacement_list(
+            key[1] if len(key) > 1 else None
+        )
+        overrides = {
+            sp.Symbol(
+                f"noiseParameter{i_par + 1}_{observable_id}", real=True
+            ): (parameter_values[value] if isinstance(value, str) else value)
+            for i_par, value in enumerate(noise_parameters)
+        }
+        noise_value = noise_formula.subs(overrides).subs(general_overrides)
+        observable = sp.Symbol(observable_id, real=True)
+        if noise_value.free_symbols - {observable}:
+            raise ValueError(
+                f"Cannot replace all parameters in noise formula "
+                f"{noise_value} for observable {observable_id}."
+            )
+        evaluate = sp.lambdify(observable, noise_value, "numpy")
+        noise[positions] = np.broadcast_to(
+            np.asarray(evaluate(simulations[positions]), dtype=float),
+            len(positions),
+        )
+    return noise
+
+
+def _match_values(column: pd.Series) -> pd.Series:
+    """Values of a table column that are equal where petab finds them equal.
+
+    Numbers are compared by value, e.g. ``1`` equals ``1.0``, but never
+    equal strings, e.g. ``"1"``.
+    """
+    if pd.api.types.is_numeric_dtype(column):
+        return column.astype(float).astype(object)
+    return column.map(
+        lambda value: float(value)
+        if isinstance(value, numbers.Real)
+        else value
+    ).astype(object)
+
+
+def compute_residuals(
+    meas_df, sim_df, observable_df, parameter_df
+) -> pd.DataFrame:
+    """Compute the scaled, normalized residuals of all measurements.
+
+    Gives the same residuals as :func:`petab.calculate_residuals`, but
+    matches measurements to simulations with a single join, instead of
+    scanning the simulation table once per measurement. Like petab, it
+    compares all columns both tables share, treats empty measurement cells
+    as wildcards, takes the first match if all matching simulation rows are
+    identical and raises otherwise. Only measurements with empty cells are
+    looked up row by row.
+
+    Returns
+    -------
+    pd.DataFrame
+        The measurement table with a positional index and additional
+        ``simulation`` and ``residual`` columns.
+    """
+    meas = meas_df.reset_index(drop=True)
+    keys = [col for col in meas.columns if col in sim_df.columns]
+    # petab only raises if the matching simulation rows differ
+    sims = sim_df.drop_duplicates().reset_index(drop=True)
+    sim_keys = pd.DataFrame({col: _match_values(sims[col]) for col in keys})
+    sim_values = pd.to_numeric(
+        sims[petab.C.SIMULATION], errors="coerce"
+    ).to_numpy(dtype=float)
+    meas_keys = pd.DataFrame({col: _match_values(meas[col]) for col in keys})
+    empty = meas[keys].isna() | (meas[keys] == "")
+
+    def matching_row(pos, candidates):
+        if len(candidates) == 0:
+            raise ValueError(
+                f"Could not find simulation for measurement "
+                f"{meas.iloc[pos].to_dict()}."
+            )
+        if len(candidates) > 1:
+            raise ValueError(
+                f"Multiple different simulations found for measurement "
+                f"{meas.iloc[pos].to_dict()}."
+            )
+        return candidates[0]
+
+    sim_rows = np.empty(len(meas), dtype=int)
+    complete = np.flatnonzero(~empty.any(axis=1).to_numpy())
+    matched = (
+        meas_keys.iloc[complete]
+        .assign(_pos=complete)
+        .merge(sim_keys.assign(_row=np.arange(len(sims))), on=keys)
+    )
+    n_matches = matched["_pos"].value_counts().reindex(complete, fill_value=0)
+    for pos in n_matches.index[n_matches != 1]:
+        matching_row(pos, matched["_row"][matched["_pos"] == pos].tolist())
+    sim_rows[matched["_pos"].to_numpy()] = matched["_row"].to_numpy()
+
+    # Empty measurement cells match any simulation, resolve those rows
+    # one by one like petab does
+    for pos in np.flatnonzero(empty.any(axis=1).to_numpy()):
+        mask = np.ones(len(sims), dtype=bool)
+        for col in keys:
+            if not empty[col].iat[pos]:
+                mask &= (sim_keys[col] == meas_keys[col].iat[pos]).to_numpy()
+        sim_rows[pos] = matching_row(pos, np.flatnonzero(mask))
+
+    residual_df = meas.copy()
+    residual_df[petab.C.SIMULATION] = sim_values[sim_rows]
+    measurements = pd.to_numeric(
+        meas[petab.C.MEASUREMENT], errors="coerce"
+    ).to_numpy(dtype=float)
+    simulations = residual_df[petab.C.SIMULATION].to_numpy(dtype=float)
+    if petab.C.OBSERVABLE_TRANSFORMATION in observable_df:
+        transformations = meas[petab.C.OBSERVABLE_ID].map(
+            observable_df[petab.C.OBSERVABLE_TRANSFORMATION]
+        )
+    else:
+        transformations = np.full(len(meas), petab.C.LIN, dtype=object)
+    residuals = _scale_values(measurements, transformations) - _scale_values(
+        simulations, transformations
+    )
+    residuals /= _noise_values(residual_df, observable_df, parameter_df)
+    residual_df[petab.C.RESIDUAL] = residuals
+    return residual_df
+
+
+def _normal_lin_observables(observable_df) -> pd.Index:
+    """IDs of the observables with additive normal noise."""
+    mask = pd.Series(True, index=observable_df.index)
+    if petab.C.NOISE_DISTRIBUTION in observable_df:
+        mask &= observable_df[petab.C.NOISE_DISTRIBUTION] == petab.C.NORMAL
+        if petab.C.OBSERVABLE_TRANSFORMATION in observable_df:
+            mask &= (
+                observable_df[petab.C.OBSERVABLE_TRANSFORMATION] == petab.C.LIN
+            )
+    return observable_df.index[mask]
+
+
+def _plot_residuals_vs_simulation(residual_df, observable_df, axes):
+    """Plot residuals versus simulation values.
+
+    The plot of :func:`petab.visualize.plot_residuals_vs_simulation`, which
+    computes the residuals itself with :func:`petab.calculate_residuals`.
+    This draws the residuals of :func:`compute_residuals` instead. Only
+    measurements with additive normal noise are shown.
+    """
+    from scipy import stats
+
+    observable_ids = _normal_lin_observables(observable_df)
+    if observable_ids.empty:
+        raise ValueError(
+            "Residuals plot is only applicable for normal "
+            "additive noise assumption"
+        )
+    normal = residual_df[
+        residual_df[petab.C.OBSERVABLE_ID].isin(observable_ids)
+    ]
+    simulations = normal[petab.C.SIMULATION]
+    residuals = normal[petab.C.RESIDUAL]
+
+    ks_result = stats.kstest(residuals, stats.norm.cdf)
+    axes[0].hlines(
+        y=0,
+        xmin=simulations.min(),
+        xmax=simulations.max(),
+        ls="--",
+        color="gray",
+    )
+    axes[0].scatter(simulations, residuals)
+    axes[0].text(
+        0.15,
+        0.85,
+        f"Kolmogorov-Smirnov test results:\n"
+        f"statistic: {ks_result[0]:.2f}\n"
+        f"pvalue: {ks_result[1]:.2e} ",
+        transform=axes[0].transAxes,
+    )
+    axes[0].set_xlabel("simulated values")
+    axes[0].set_ylabel("residuals")
+
+    axes[1].hist(residuals, density=True, orientation="horizontal")
+    axes[1].set_xlabel("distribution")
+
+    ymin, ymax = axes[0].get_ylim()
+    ylim = max(abs(ymin), abs(ymax))
+    axes[0].set_ylim(-ylim, ylim)
+    axes[1].tick_params(
+        left=False, labelleft=False, right=True, labelright=True
+    )
+
+
+def _plot_goodness_of_fit(residual_df, ax):
+    """Plot measurements versus simulations.
+
+    The plot of :func:`petab.visualize.plot_goodness_of_fit`, drawn from
+    the residuals of :func:`compute_residuals` like
+    :func:`_plot_residuals_vs_simulation`.
+    """
+    from scipy import stats
+
+    simulations = residual_df[petab.C.SIMULATION]
+    measurements = pd.to_numeric(
+        residual_df[petab.C.MEASUREMENT], errors="coerce"
+    )
+    slope, intercept, r_value, p_value, _ = stats.linregress(
+        simulations, measurements
+    )
+    ax.scatter(simulations, measurements)
+
+    ax.axis("square")
+    xlim = ax.get_xlim()
+    ylim = ax.get_ylim()
+    lim = [min([xlim[0], ylim[0]]), max([xlim[1], ylim[1]])]
+    ax.set_xlim(lim)
+    ax.set_ylim(lim)
+    x = np.linspace(lim, 100)
+    ax.plot(x, x, linestyle="--", color="gray")
+    ax.plot(x, intercept + slope * x, "r", label="fitted line")
+
+    mean_abs_residual = np.mean(np.abs(residual_df[petab.C.RESIDUAL]))
+    ax.text(
+        0.1,
+        0.70,
+        f"$R^2$: {r_value**2:.2f}\n"
+        f"slope: {slope:.2f}\n"
+        f"intercept: {intercept:.2f}\n"
+        f"p-value: {p_value:.2e}\n"
+        f"mean absolute residual: {mean_abs_residual:.2e}\n",
+        transform=ax.transAxes,
+    )
+    ax.set_title("Goodness of fit")
+    ax.set_xlabel("Simulated value")
+    ax.set_ylabel("Measurement")
+
+
+def render_residual_figures(
+    residual_df, observable_df
+) -> list[tuple[str, Figure]]:
+    """Render the residual and goodness-of-fit figures.
+
+    Both figures are drawn from the same residuals, see
+    :func:`compute_residuals`.
+    """
+    figures = []
+    fig_res = Figure(constrained_layout=True)
+    axes = fig_res.subplots(1, 2, sharey=True, width_ratios=[2, 1])
+    try:
+        _plot_residuals_vs_simulation(residual_df, observable_df, axes)
+        figures.append(("Residuals vs Simulation", fig_res))
+    except ValueError:
+        logger.exception("Error plotting residuals")
+    fig_fit = Figure()
+    ax_fit = fig_fit.subplots()
+    fig_fit.subplots_adjust(left=0.05, right=0.98, bottom=0.05, top=0.98)
+    _plot_goodness_of_fit(residual_df, ax_fit)
+    figures.append(("Goodness of Fit", fig_fit))
+    return figures
+
+
+def render_residual_set(
+    meas_df, sim_df, observable_df, parameter_df
+) -> PlotSet:
+    """Compute residuals once and render both residual figures.
+
+    The returned :class:`PlotSet` has no overview figure, only
+    :attr:`PlotSet.residuals`.
+    """
+    plot_set = PlotSet()
+    residual_df = compute_residuals(
+        meas_df, sim_df, observable_df, parameter_df
+    )
+    for title, fig in render_residual_figures(residual_df, observable_df):
+        rasterize(fig)
+        plot_set.residuals.append((title, fig))
+    plot_set.complete = True
+    return plot_set
+
+
+def render_ensemble_figure(band_df) -> Figure:
+    """Plot the simulation band of an ensemble, one subplot per observable.
+
+    Each condition is drawn as its median, with the band between the lower
+    and upper quantile shaded, see
+    :meth:`petab_gui.ensemble.EnsembleStore.band`.
+    """
+    observable_ids = band_df[petab.C.OBSERVABLE_ID].unique()
+    num_row = max(1, int(np.round(np.sqrt(len(observable_ids)))))
+    num_col = max(1, int(np.ceil(len(observable_ids) / num_row)))
+    fig = Figure()
+    axes = fig.subplots(num_row, num_col, squeeze=False)
+    fig.set_layout_engine("tight")
+    for ax in axes.flat[len(observable_ids) :]:
+        ax.remove()
+
+    finite = band_df[np.isfinite(band_df[petab.C.TIME])]
+    for ax, observable_id in zip(axes.flat, observable_ids, strict=False):
+        observable_df = finite[finite[petab.C.OBSERVABLE_ID] == observable_id]
+        for condition_id, condition_df in observable_df.groupby(
+            petab.C.SIMULATION_CONDITION_ID, sort=False
+        ):
+            condition_df = condition_df.sort_values(petab.C.TIME)
+            (line,) = ax.plot(
+                condition_df[petab.C.TIME],
+                condition_df["median"],
+                label=condition_id,
+            )
+            ax.fill_between(
+                condition_df[petab.C.TIME],
+                condition_df["lower"],
+                condition_df["upper"],
+                color=line.get_color(),
+                alpha=0.25,
+                linewidth=0,
+            )
+        ax.set_title(observable_id)
+        ax.set_xlabel("Time")
+        if ax.lines:
+            ax.legend()
+    return fig
+
+
+def rasterize(fig: Figure):
+    """Draw a figure once with Agg, resolving layout and text extents."""
+    FigureCanvasAgg(fig).draw()
+
+
+def render_plot_set(
+    vis_df,
+    cond_df,
+    meas_df,
+    sim_df,
+    group_by,
+    is_cancelled=None,
+) -> PlotSet:
+    """Render the figures shown in the plot dock.
+
+    The per-subplot figures are not part of the result; they are derived
+    from the overview axes via :func:`copy_axes_to_figure` once their tab
+    is shown. Residual figures are rendered separately by
+    :func:`render_residual_set`, as they depend on other tables.
+
+    Parameters
+    ----------
+    vis_df, cond_df, meas_df, sim_df, group_by:
+        See :func:`render_data_figure`.
+    is_cancelled: callable, optional
+        Polled between the rendering steps. If it returns ``True``, rendering
+        stops early and an incomplete :class:`PlotSet` is returned.
+    """
+
+    def cancelled():
+        return is_cancelled is not None and is_cancelled()
+
+    plot_set = PlotSet(
+        render_data_figure(vis_df, cond_df, meas_df, sim_df, group_by)
+    )
+    if plot_set.figure is None:
+        plot_set.complete = True
+        return plot_set
+    if cancelled():
+        return plot_set
+
+    enable_picking(plot_set.figure)
+    downsample_dense_lines(plot_set.figure)
+    plot_set.observable_to_subplot = map_observables_to_subplots(
+        plot_set.figure
+    )
+    rasterize(plot_set.figure)
+    plot_set.complete = True
+    return plot_set
@@ -1,12 +1,24 @@
 """Widget for viewing the SBML model."""
 
+import re
+
 import qtawesome as qta
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QRegularExpression, Qt, QTimer
+from PySide6.QtGui import (
+    QColor,
+    QFont,
+    QSyntaxHighlighter,
+    QTextBlockUserData,
+    QTextCharFormat,
+    QTextCursor,
+    QTextFormat,
+)
 from PySide6.QtWidgets import (
     QLabel,
     QPlainTextEdit,
     QPushButton,
     QSplitter,
+    QTextEdit,
     QVBoxLayout,
     QWidget,
 )
@@ -14,6 +26,339 @@ from PySide6.QtWidgets import (
 from ..models.tooltips import ANTIMONY_VIEW_TOOLTIP, SBML_VIEW_TOOLTIP
 from ..resources.whats_this import WHATS_THIS
 
+#: Texts with at least this many characters are loaded in chunks
+LARGE_DOCUMENT_SIZE = 250_000
+#: Number of lines inserted per event loop iteration while loading
+LOAD_CHUNK_LINES = 5_000
+#: listOf* sections of large documents with more lines are collapsed
+FOLD_MIN_LINES = 200
+
+#: Start and end of SBML listOf* sections
+_LIST_OF_TAG = re.compile(r"<(/?)(listOf\w+)\b[^>]*?(/?)>")
+
+
+def _char_format(color, bold=False, italic=False):
+    """Text format for highlighting."""
+    text_format = QTextCharFormat()
+    text_format.setForeground(QColor(color))
+    if bold:
+        text_format.setFontWeight(QFont.Bold)
+    text_format.setFontItalic(italic)
+    return text_format
+
+
+class _Lexed(QTextBlockUserData):
+    """Marks blocks that were highlighted."""
+
+
+class ModelHighlighter(QSyntaxHighlighter):
+    """Syntax highlighting for SBML or Antimony.
+
+    Qt only highlights blocks that were inserted or edited. In large
+    documents, highlighting is further restricted to blocks that were
+    shown or edited after loading, see :meth:`ModelTextEdit.set_model_text`,
+    so loading does not lex the whole document.
+
+    Parameters
+    ----------
+    document: QTextDocument
+        The document to highlight.
+    language: str
+        ``"sbml"`` or ``"antimony"``.
+    """
+
+    #: Block state inside a multi-line comment
+    IN_COMMENT = 1
+
+    def __init__(self, document, language):
+        super().__init__(document)
+        self.lexing = True
+        comment = _char_format("gray", italic=True)
+        if language == "sbml":
+            self._rules = [
+                (
+                    QRegularExpression(r"</?[\w:]+|/?>"),
+                    _char_format("#1a5fb4"),
+                ),
+                (QRegularExpression(r"[\w:]+(?==)"), _char_format("#a347ba")),
+                (QRegularExpression(r'"[^"]*"'), _char_format("#26a269")),
+            ]
+            self._comment_start = QRegularExpression("<!--")
+            self._comment_end = QRegularExpression("-->")
+            self._line_comment = None
+        else:
+            keywords = (
+                "model|end|function|unit|species|compartment|var|const"
+                "|in|at|after|is|import|has|substanceOnly"
+            )
+            self._rules = [
+                (
+                    QRegularExpression(rf"\b({keywords})\b"),
+                    _char_format("#1a5fb4", bold=True),
+                ),
+                (
+                    QRegularExpression(r"->|=>|:=|="),
+                    _char_format("#a347ba", bold=True),
+                ),
+                (
+                    QRegularExpression(r"\b\d+(\.\d*)?([eE][+-]?\d+)?\b"),
+                    _char_format("#26a269"),
+                ),
+                (QRegularExpression(r'"[^"]*"'), _char_format("#c64600")),
+            ]
+            self._comment_start = QRegularExpression(r"/\*")
+            self._comment_end = QRegularExpression(r"\*/")
+            self._line_comment = QRegularExpression(r"//.*")
+        self._comment_format = comment
+
+    def is_lexed(self, block) -> bool:
+        """Whether ``block`` was highlighted."""
+        return isinstance(block.userData(), _Lexed)
+
+    def highlightBlock(self, text):
+        """Highlight one block, continuing comments of the previous one."""
+        if not self.lexing:
+            # Same state as a lexed block outside of comments, so that
+            # lexing a block later does not re-highlight the following ones
+            self.setCurrentBlockState(0)
+            return
+        for expression, text_format in self._rules:
+            matches = expression.globalMatch(text)
+            while matches.hasNext():
+                match = matches.next()
+                self.setFormat(
+                    match.capturedStart(), match.capturedLength(), text_format
+                )
+        if self._line_comment is not None:
+            match = self._line_comment.match(text)
+            if match.hasMatch():
+                self.setFormat(
+                    match.capturedStart(),
+                    match.capturedLength(),
+                    self._comment_format,
+                )
+        self._highlight_comments(text)
+        self.setCurrentBlockUserData(_Lexed())
+
+    def _highlight_comments(self, text):
+        """Highlight comments that may span several blocks."""
+        self.setCurrentBlockState(0)
+        start = 0
+        if self.previousBlockState() != self.IN_COMMENT:
+            match = self._comment_start.match(text)
+            start = match.capturedStart() if match.hasMatch() else -1
+        while start >= 0:
+            end_match = self._comment_end.match(text, start)
+            if end_match.hasMatch():
+                length = end_match.capturedEnd() - start
+            else:
+                self.setCurrentBlockState(self.IN_COMMENT)
+                length = len(text) - start
+            self.setFormat(start, length, self._comment_format)
+            match = self._comment_start.match(text, start + length)
+            start = match.capturedStart() if match.hasMatch() else -1
+
+
+class ModelTextEdit(QPlainTextEdit):
+    """Editor for SBML or Antimony with a large-document mode.
+
+    Texts of at least :data:`LARGE_DOCUMENT_SIZE` characters are loaded
+    in chunks of :data:`LOAD_CHUNK_LINES` lines, keeping the GUI
+    responsive. The editor is read-only while loading. Only visible and
+    edited blocks are highlighted, and in SBML, listOf* sections of more
+    than :data:`FOLD_MIN_LINES` lines are collapsed. Double-clicking the
+    first line of a section expands or collapses it.
+
+    Parameters
+    ----------
+    language: str
+        ``"sbml"`` or ``"antimony"``.
+    """
+
+    def __init__(self, language, parent=None):
+        super().__init__(parent)
+        self._language = language
+        self.highlighter = ModelHighlighter(self.document(), language)
+        # The text being loaded and the lines still to insert
+        self._text = None
+        self._lines = []
+        self._line = 0
+        # Collapsible sections as (first block, last block, collapsed)
+        self._sections = []
+        self._highlighting = False
+        self._load_timer = QTimer(self)
+        self._load_timer.setInterval(0)
+        self._load_timer.timeout.connect(self._load_chunk)
+        self.updateRequest.connect(self._highlight_visible)
+
+    def set_model_text(self, text: str):
+        """Show ``text``, in chunks if it is large."""
+        self._load_timer.stop()
+        self._text = None
+        self._sections = []
+        self.setExtraSelections([])
+        if len(text) < LARGE_DOCUMENT_SIZE:
+            self._lines = []
+            self.highlighter.lexing = True
+            self.setReadOnly(False)
+            # Loading a large text may have been interrupted
+            self.setUndoRedoEnabled(True)
+            self.setPlainText(text)
+            return
+        self._text = text
+        self._lines = text.splitlines(keepends=True)
+        self._line = 0
+        self.highlighter.lexing = False
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.clear()
+        self._load_timer.start()
+
+    def model_text(self) -> str:
+        """The full text, also while loading or with collapsed sections."""
+        if self._text is not None:
+            return self._text
+        return self.toPlainText()
+
+    def expand_all(self):
+        """Expand all collapsed sections."""
+        for index in range(len(self._sections)):
+            self._set_collapsed(index, False)
+        self._update_section_marks()
+
+    def collapse_all(self):
+        """Collapse all large sections."""
+        for index in range(len(self._sections)):
+            self._set_collapsed(index, True)
+        self._update_section_marks()
+
+    def has_sections(self) -> bool:
+        """Whether the text has collapsible sections."""
+        return bool(self._sections)
+
+    def _load_chunk(self):
+        """Append the next lines of the text being loaded."""
+        chunk = "".join(
+            self._lines[self._line : self._line + LOAD_CHUNK_LINES]
+        )
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(chunk)
+        self._line += LOAD_CHUNK_LINES
+        if self._line < len(self._lines):
+            return
+        self._load_timer.stop()
+        text = self._text
+        self._text = None
+        self._lines = []
+        self.setUndoRedoEnabled(True)
+        self.setReadOnly(False)
+        self.highlighter.lexing = True
+        if self._language == "sbml":
+            self._find_sections(text)
+            self.collapse_all()
+        self._highlight_visible()
+
+    def _find_sections(self, text):
+        """Find listOf* sections with at least FOLD_MIN_LINES lines."""
+        document = self.document()
+        open_sections = []
+        line = 0
+        position = 0
+        for match in _LIST_OF_TAG.finditer(text):
+            line += text.count("\n", position, match.start())
+            position = match.start()
+            closing, _, self_closing = match.groups()
+            if self_closing:
+                continue
+            if not closing:
+                open_sections.append(line)
+                continue
+            if not open_sections:
+                continue
+            first = open_sections.pop()
+            # Nested sections of collapsed ones stay as they are
+            if line - first >= FOLD_MIN_LINES and not open_sections:
+                self._sections.append(
+                    [
+                        document.findBlockByNumber(first),
+                        document.findBlockByNumber(line),
+                        False,
+                    ]
+                )
+
+    def _set_collapsed(self, index, collapsed):
+        """Hide or show the lines of a section between its tags."""
+        first, last, _ = self._sections[index]
+        if not (first.isValid() and last.isValid()):
+            return
+        self._sections[index][2] = collapsed
+        block = first.next()
+        while block.isValid() and block != last:
+            block.setVisible(not collapsed)
+            block = block.next()
+        self.document().markContentsDirty(
+            first.position(), last.position() - first.position()
+        )
+        self.viewport().update()
+
+    def _update_section_marks(self):
+        """Mark the first lines of collapsed sections."""
+        selections = []
+        for first, _, collapsed in self._sections:
+            if not (collapsed and first.isValid()):
+                continue
+            selection = QTextEdit.ExtraSelection()
+            selection.format.setBackground(QColor("#e8e8e8"))
+            selection.format.setProperty(QTextFormat.FullWidthSelection, True)
+            selection.cursor = QTextCursor(first)
+            selections.append(selection)
+        self.setExtraSelections(selections)
+
+    def _highlight_visible(self, rect=None, dy=0):
+        """Highlight shown blocks that were not highlighted yet.
+
+        Connected to ``updateRequest``, only handles scrolling and updates
+        of the whole viewport, not e.g. the blinking cursor.
+        """
+        viewport = self.viewport().rect()
+        if (
+            not self.highlighter.lexing
+            or self._highlighting
+            or (rect is not None and not dy and not rect.contains(viewport))
+        ):
+            return
+        # The hidden lines of collapsed sections are skipped
+        collapsed = {
+            first.blockNumber(): last
+            for first, last, is_collapsed in self._sections
+            if is_collapsed and first.isValid() and last.isValid()
+        }
+        # Highlighting requests updates itself
+        self._highlighting = True
+        try:
+            block = self.firstVisibleBlock()
+            offset = self.contentOffset()
+            while block.isValid():
+                geometry = self.blockBoundingGeometry(block)
+                if geometry.translated(offset).top() > viewport.bottom():
+                    break
+                if not self.highlighter.is_lexed(block):
+                    self.highlighter.rehighlightBlock(block)
+                block = collapsed.get(block.blockNumber(), block.next())
+        finally:
+            self._highlighting = False
+
+    def mouseDoubleClickEvent(self, event):
+        """Expand or collapse the section starting at the clicked line."""
+        block = self.cursorForPosition(event.position().toPoint()).block()
+        for index, (first, _, collapsed) in enumerate(self._sections):
+            if first.isValid() and first == block:
+                self._set_collapsed(index, not collapsed)
+                self._update_section_marks()
+                return
+        super().mouseDoubleClickEvent(event)
+
 
 class SbmlViewer(QWidget):
     """Widget for viewing the SBML model."""
@@ -36,7 +381,7 @@ class SbmlViewer(QWidget):
         sbml_layout = QVBoxLayout()
         sbml_label = QLabel("SBML Model")
         sbml_layout.addWidget(sbml_label)
-        self.sbml_text_edit = QPlainTextEdit()
+        self.sbml_text_edit = ModelTextEdit("sbml")
         self.sbml_text_edit.setToolTip(SBML_VIEW_TOOLTIP)
         self.sbml_text_edit.setWhatsThis(
             WHATS_THIS["sbml_view"]["sbml_editor"]
@@ -56,7 +401,7 @@ class SbmlViewer(QWidget):
         antimony_layout = QVBoxLayout()
         antimony_label = QLabel("Antimony Model")
         antimony_layout.addWidget(antimony_label)
-        self.antimony_text_edit = QPlainTextEdit()
+        self.antimony_text_edit = ModelTextEdit("antimony")
         self.antimony_text_edit.setToolTip(ANTIMONY_VIEW_TOOLTIP)
         self.sbml_text_edit.setWhatsThis(
             WHATS_THIS["sbml_view"]["antimony_editor"]
@@ -98,6 +443,7 @@ class SbmlViewer(QWidget):
 
         menu = self.sbml_text_edit.createStandardContextMenu()
         menu.addSeparator()
+        self._add_section_actions(menu, self.sbml_text_edit)
 
         # Add export SBML option
         if self.save_sbml_action:
@@ -121,6 +467,7 @@ class SbmlViewer(QWidget):
 
         menu = self.antimony_text_edit.createStandardContextMenu()
         menu.addSeparator()
+        self._add_section_actions(menu, self.antimony_text_edit)
 
         # Add export SBML option
         if self.save_sbml_action:
@@ -144,3 +491,12 @@ class SbmlViewer(QWidget):
             )
 
         menu.exec(self.antimony_text_edit.mapToGlobal(position))
+
+    @staticmethod
+    def _add_section_actions(menu, text_edit):
+        """Add actions to expand and collapse the sections of a text."""
+        if not text_edit.has_sections():
+            return
+        menu.addAction("Expand All Sections", text_edit.expand_all)
+        menu.addAction("Collapse Large Sections", text_edit.collapse_all)
+        menu.addSeparator()
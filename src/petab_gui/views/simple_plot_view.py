@@ -1,13 +1,26 @@
 import logging
+import weakref
 from collections import defaultdict
+from functools import partial
 
+import numpy as np
+import pandas as pd
 import petab.v1.C as PETAB_C
 import qtawesome as qta
 from matplotlib import pyplot as plt
+from matplotlib.backend_bases import ResizeEvent
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qtagg import NavigationToolbar2QT
-from matplotlib.container import ErrorbarContainer
-from PySide6.QtCore import QObject, QRunnable, Qt, QThreadPool, QTimer, Signal
+from matplotlib.figure import Figure
+from PySide6.QtCore import (
+    QObject,
+    QRunnable,
+    QSignalBlocker,
+    Qt,
+    QThreadPool,
+    QTimer,
+    Signal,
+)
 from PySide6.QtGui import QAction
 from PySide6.QtWidgets import (
     QDockWidget,
@@ -18,36 +31,94 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
+from ..C import DEFAULT_PLOT_CACHE_SIZE_MB, PLOT_CACHE_SIZE_KEY
+from ..settings_manager import settings_manager
+from .plot_rendering import (
+    PlotPointIndex,
+    PlotSet,
+    RenderCache,
+    fingerprint_df,
+    render_ensemble_figure,
+    render_plot_set,
+    render_residual_set,
+)
 from .utils import proxy_to_dataframe
 
 logger = logging.getLogger(__name__)
 
 
 class PlotWorkerSignals(QObject):
-    finished = Signal(object)  # Emits final Figure
+    # render generation, data PlotSet, residual PlotSet
+    finished = Signal(int, object, object)
 
 
 class PlotWorker(QRunnable):
-    def __init__(self, vis_df, cond_df, meas_df, sim_df, group_by):
+    """Render the figures of the plot dock off the GUI thread.
+
+    The worker only uses the Agg backend (see :mod:`.plot_rendering`). Each
+    worker carries the generation it was started for, so the plotter can
+    drop results that were overtaken by newer data.
+
+    The data figure and the residual figures are rendered independently,
+    as they depend on different tables. Either part is skipped (and
+    reported as ``None``) if the plotter has it cached already.
+    """
+
+    def __init__(
+        self,
+        generation,
+        vis_df,
+        cond_df,
+        meas_df,
+        sim_df,
+        group_by,
+        render_data=True,
+        residual_tables=None,
+        is_stale=None,
+    ):
         super().__init__()
+        self.generation = generation
         self.vis_df = vis_df
         self.cond_df = cond_df
         self.meas_df = meas_df
         self.sim_df = sim_df
         self.group_by = group_by
+        self.render_data = render_data
+        self.residual_tables = residual_tables
+        self.is_stale = is_stale
         self.signals = PlotWorkerSignals()
 
     def run(self):
-        # Move all Matplotlib plotting to the GUI thread. Only prepare payload.
         sim_df = self.sim_df if not self.sim_df.empty else None
-        payload = {
-            "vis_df": self.vis_df,
-            "cond_df": self.cond_df,
-            "meas_df": self.meas_df,
-            "sim_df": sim_df,
-            "group_by": self.group_by,
-        }
-        self.signals.finished.emit(payload)
+        plot_set = None
+        if self.render_data:
+            try:
+                plot_set = render_plot_set(
+                    self.vis_df,
+                    self.cond_df,
+                    self.meas_df,
+                    sim_df,
+                    self.group_by,
+                    is_cancelled=self.is_stale,
+                )
+            except Exception:
+                logger.exception("Error rendering plots")
+                plot_set = PlotSet()
+        residual_set = None
+        stale = self.is_stale is not None and self.is_stale()
+        if self.residual_tables is not None and not stale:
+            try:
+                residual_set = render_residual_set(
+                    sim_df=self.sim_df, **self.residual_tables
+                )
+            except Exception:
+                logger.exception("Error plotting residuals")
+                residual_set = PlotSet()
+        try:
+            self.signals.finished.emit(self.generation, plot_set, residual_set)
+        except RuntimeError:
+            # The plotter was deleted while rendering, e.g. on exit
+            pass
 
 
 class PlotWidget(FigureCanvas):
@@ -74,12 +145,25 @@ class MeasurementPlotter(QDockWidget):
         self.layout.setSpacing(2)
         self.setWidget(self.dock_widget)
         self.tab_widget = QTabWidget()
+        self.tab_widget.currentChanged.connect(self._materialize_tab)
         self.layout.addWidget(self.tab_widget)
         self.update_timer = QTimer(self)
         self.update_timer.setSingleShot(True)
         self.update_timer.timeout.connect(self.plot_it)
         self.observable_to_subplot = {}
         self.no_plotting_rn = False
+        # Quantiles of the last ensemble simulation, see set_ensemble
+        self._ensemble_band = None
+
+        # Rendering happens on a dedicated single-thread pool. Every request
+        # bumps the generation; results of older generations are dropped.
+        self._render_pool = QThreadPool(self)
+        self._render_pool.setMaxThreadCount(1)
+        self._render_generation = 0
+        # Keep workers (and their signal objects) alive until they report
+        self._render_workers = {}
+        # Cache keys of the latest render request
+        self._pending_render_keys = None
 
         # DataFrame caching system for performance optimization
         self._df_cache = {
@@ -94,15 +178,39 @@ class MeasurementPlotter(QDockWidget):
             "conditions": False,
             "visualization": False,
         }
+        self._df_fingerprint = {}
+        # Plotted point -> proxy row lookup, built from the cached tables
+        self._point_index = {}
+
+        # Rendered plot sets, keyed by table fingerprints and grouping
+        self._render_cache = RenderCache(self._render_cache_max_bytes())
+        settings_manager.settings_changed.connect(self._on_settings_changed)
+
+    @staticmethod
+    def _render_cache_max_bytes():
+        return (
+            settings_manager.get_value(
+                PLOT_CACHE_SIZE_KEY, DEFAULT_PLOT_CACHE_SIZE_MB, int
+            )
+            * 1024**2
+        )
+
+    def _on_settings_changed(self, key):
+        if key == PLOT_CACHE_SIZE_KEY:
+            self._render_cache.set_max_bytes(self._render_cache_max_bytes())
 
     def _invalidate_cache(self, table_name):
         """Invalidate cache for specific table."""
         self._cache_valid[table_name] = False
+        self._point_index.pop(table_name, None)
 
     def _get_cached_df(self, table_name, proxy_model):
         """Get cached DataFrame or convert if invalid."""
         if not self._cache_valid[table_name]:
             self._df_cache[table_name] = proxy_to_dataframe(proxy_model)
+            self._df_fingerprint[table_name] = fingerprint_df(
+                self._df_cache[table_name]
+            )
             self._cache_valid[table_name] = True
         return self._df_cache[table_name]
 
@@ -116,6 +224,9 @@ class MeasurementPlotter(QDockWidget):
         proxy.dataChanged.connect(on_data_change)
         proxy.rowsInserted.connect(on_data_change)
         proxy.rowsRemoved.connect(on_data_change)
+        # Sorting changes the row order the cache and row index rely on
+        proxy.layoutChanged.connect(on_data_change)
+        proxy.modelReset.connect(on_data_change)
 
     def initialize(
         self, meas_proxy, sim_proxy, cond_proxy, vis_proxy, petab_model
@@ -129,9 +240,10 @@ class MeasurementPlotter(QDockWidget):
         # Clear all cache when reinitializing
         for key in self._cache_valid:
             self._cache_valid[key] = False
+        self._ensemble_band = None
 
         # Connect cache invalidation and data changes
-        self.options_manager.option_changed.connect(self._debounced_plot)
+        self.options_manager.option_changed.connect(self._plot_if_cached)
 
         # Connect proxy signals for all tables
         self._connect_proxy_signals(self.meas_proxy, "measurements")
@@ -139,7 +251,7 @@ class MeasurementPlotter(QDockWidget):
         self._connect_proxy_signals(self.sim_proxy, "simulations")
         self._connect_proxy_signals(self.vis_proxy, "visualization")
 
-        self.visibilityChanged.connect(self._debounced_plot)
+        self.visibilityChanged.connect(self._plot_if_cached)
 
         self.plot_it()
 
@@ -157,275 +269,339 @@ class MeasurementPlotter(QDockWidget):
         simulations_df = self._get_cached_df("simulations", self.sim_proxy)
         conditions_df = self._get_cached_df("conditions", self.cond_proxy)
         visualisation_df = self._get_cached_df("visualization", self.vis_proxy)
-        group_by = self.options_manager.get_option()
-        # group_by different value in petab.visualize
-        if group_by == "condition":
-            group_by = "simulation"
+        group_by = self._group_by()
 
+        cache_key = self._render_cache_key(group_by)
+        residual_tables = self._residual_tables(simulations_df)
+        residual_key = self._residual_cache_key(
+            residual_tables, simulations_df
+        )
+        render_keys = (cache_key, residual_key)
+        if (
+            self._render_generation in self._render_workers
+            and self._pending_render_keys == render_keys
+        ):
+            # The running render is already made of the current tables
+            return
+        self._pending_render_keys = render_keys
+        self._render_generation += 1
+        generation = self._render_generation
+        # Requests that have not started yet are outdated already
+        self._render_pool.clear()
+
+        cached = self._render_cache.get(cache_key)
+        cached_residuals = None
+        if residual_key is not None:
+            cached_residuals = self._render_cache.get(residual_key)
+        if cached is not None and (
+            residual_key is None or cached_residuals is not None
+        ):
+            self._update_tabs(cached, cached_residuals)
+            return
+
+        if cached_residuals is not None:
+            residual_tables = None
+        elif residual_tables is not None:
+            # Copies, as the tables are read on the render thread
+            residual_tables = {
+                name: df.copy() for name, df in residual_tables.items()
+            }
         worker = PlotWorker(
+            generation,
             visualisation_df,
             conditions_df,
             measurements_df,
             simulations_df,
             group_by,
+            render_data=cached is None,
+            residual_tables=residual_tables,
+            is_stale=lambda: generation != self._render_generation,
         )
-        worker.signals.finished.connect(self._render_on_main_thread)
-        QThreadPool.globalInstance().start(worker)
+        worker.signals.finished.connect(
+            partial(
+                self._render_on_main_thread,
+                cache_key=cache_key,
+                residual_key=residual_key,
+            )
+        )
+        self._render_workers[generation] = worker
+        self._render_pool.start(worker)
+
+    def _group_by(self):
+        group_by = self.options_manager.get_option()
+        # group_by different value in petab.visualize
+        if group_by == "condition":
+            group_by = "simulation"
+        return group_by
 
-    def _render_on_main_thread(self, payload):
-        import petab.v1.visualize as petab_vis
+    def _plot_if_cached(self, *args):
+        """Show cached figures at once, debounce renders.
 
-        # GUI-thread plotting
-        plt.close("all")
-        meas_df = payload.get("meas_df")
-        cond_df = payload.get("cond_df")
-        if (
-            meas_df is None
-            or meas_df.empty
-            or cond_df is None
-            or not len(cond_df) > 0
-        ):
-            self._update_tabs(None)
-            return
-        sim_df = payload.get("sim_df")
-        group_by = payload.get("group_by")
-        if group_by == "vis_df":
-            vis_df = payload.get("vis_df")
-            if vis_df is not None and not vis_df.empty:
-                try:
-                    petab_vis.plot_with_vis_spec(
-                        vis_df, cond_df, meas_df, sim_df
-                    )
-                    fig = plt.gcf()
-                    self._update_tabs(fig)
-                    return
-                except Exception:
-                    logger.exception("Invalid Visualisation DF")
-            # fallback to observable grouping
-            plt.close("all")
-            petab_vis.plot_without_vis_spec(
-                cond_df,
-                measurements_df=meas_df,
-                simulations_df=sim_df,
-                group_by="observable",
-            )
+        Used when switching the grouping or showing the dock, where the
+        figures are often cached already.
+        """
+        cached = all(self._cache_valid.values()) and (
+            self._render_cache.get(self._render_cache_key(self._group_by()))
+            is not None
+        )
+        if cached:
+            self.update_timer.stop()
+            self.plot_it()
         else:
-            plt.close("all")
-            petab_vis.plot_without_vis_spec(
-                cond_df,
-                measurements_df=meas_df,
-                simulations_df=sim_df,
-                group_by=group_by,
-            )
-        fig = plt.gcf()
-        fig.subplots_adjust(
-            left=0.12, bottom=0.15, right=0.95, top=0.9, wspace=0.3, hspace=0.4
+            self._debounced_plot()
+
+    def _residual_tables(self, simulations_df):
+        """Tables of the PEtab model needed for the residual plots.
+
+        Returns ``None`` if residuals cannot be plotted.
+        """
+        if not self.petab_model or simulations_df.empty:
+            return None
+        return {
+            "meas_df": self.petab_model.measurement.get_df(),
+            "observable_df": self.petab_model.observable.get_df(),
+            "parameter_df": self.petab_model.parameter.get_df(),
+        }
+
+    @staticmethod
+    def _residual_cache_key(residual_tables, simulations_df):
+        """Identify residuals by the fingerprints of the tables they use.
+
+        Unrelated edits, e.g. of the visualization or condition table, keep
+        the key and thus the cached residual figures.
+        """
+        if residual_tables is None:
+            return None
+        return (
+            "residuals",
+            fingerprint_df(simulations_df),
+            *(fingerprint_df(df) for df in residual_tables.values()),
         )
-        self._update_tabs(fig)
 
-    def _update_tabs(self, fig: plt.Figure):
-        # Save current tab index before clearing
-        current_tab_index = self.tab_widget.currentIndex()
+    def _render_cache_key(self, group_by):
+        """Identify a render by the fingerprints of its inputs.
 
-        # Clean previous tabs
-        self.tab_widget.clear()
-        # Clear Highlighter
+        The visualization table only matters when plotting with it, so
+        editing it does not evict renders of the other groupings.
+        """
+        tables = ["measurements", "simulations", "conditions"]
+        if group_by == "vis_df":
+            tables.append("visualization")
+        return (group_by, *(self._df_fingerprint[table] for table in tables))
+
+    def _render_on_main_thread(
+        self,
+        generation,
+        plot_set,
+        residual_set,
+        cache_key=None,
+        residual_key=None,
+    ):
+        """Swap a finished render into the tab widget.
+
+        Parts the worker skipped (``None``) are taken from the cache.
+        """
+        # Older workers have reported or were dropped from the queue
+        for finished in [g for g in self._render_workers if g <= generation]:
+            del self._render_workers[finished]
+        # Even outdated renders are valid for the data they were made of
+        if plot_set is None:
+            plot_set = self._render_cache.get(cache_key)
+        elif cache_key is not None and plot_set.complete:
+            self._render_cache.put(cache_key, plot_set)
+        if residual_set is None and residual_key is not None:
+            residual_set = self._render_cache.get(residual_key)
+        elif residual_set is not None and residual_set.complete:
+            self._render_cache.put(residual_key, residual_set)
+        if generation != self._render_generation or plot_set is None:
+            # Newer data arrived while rendering, a fresher render follows
+            return
+        self._update_tabs(plot_set, residual_set)
+
+    def _update_tabs(self, plot_set: PlotSet, residual_set=None):
+        # Highlights are re-registered when the new figures are shown
         self.highlighter.clear_highlight()
-        if fig is None:
+        if plot_set.figure is None:
             # Fallback: show one empty plot tab
-            empty_fig, _ = plt.subplots()
-            empty_canvas = FigureCanvas(empty_fig)
-            empty_toolbar = CustomNavigationToolbar(empty_canvas, self)
-
-            tab = QWidget()
-            layout = QVBoxLayout(tab)
-            layout.setContentsMargins(0, 0, 0, 0)
-            layout.setSpacing(2)
-            layout.addWidget(empty_toolbar)
-            layout.addWidget(empty_canvas)
-
-            self.tab_widget.addTab(tab, "All Plots")
+            empty_fig = Figure()
+            empty_fig.subplots()
+            self._set_tabs(
+                [("All Plots", lambda: empty_fig, None), *self._ensemble_tab()]
+            )
             return
 
-        # Full figure tab - capture canvas and connect picking for all axes
-        main_canvas = create_plot_tab(fig, self, plot_title="All Plots")
+        self.observable_to_subplot = plot_set.observable_to_subplot
+        fig = plot_set.figure
 
-        # Enable picker on all lines and containers in the original figure
-        for ax in fig.axes:
-            # Handle regular lines (simulations, etc.)
-            for line in ax.get_lines():
-                line.set_picker(True)
-                line.set_pickradius(5)  # 5 pixels tolerance for clicking
-
-            # Handle error bar containers (measurements, etc.)
-            for container in ax.containers:
-                if isinstance(container, ErrorbarContainer) and (
-                    len(container.lines) > 0 and container.lines[0] is not None
-                ):
-                    container.lines[0].set_picker(True)
-                    container.lines[0].set_pickradius(5)
-
-        self.highlighter.connect_picking(main_canvas)
+        def build_main_figure():
+            for idx, ax in enumerate(fig.axes):
+                self.highlighter.register_subplot(ax, idx)
+            return fig
 
+        # Full figure tab - connect picking for all axes
+        tabs = [
+            ("All Plots", build_main_figure, self.highlighter.connect_canvas)
+        ]
         # One tab per Axes
-        for idx, ax in enumerate(fig.axes):
-            # Create a new figure and copy Axes content
-            sub_fig, sub_ax = plt.subplots(constrained_layout=False)
-            handles, labels = ax.get_legend_handles_labels()
-            for handle, label in zip(handles, labels, strict=False):
-                if isinstance(handle, ErrorbarContainer):
-                    line = handle.lines[0]
-                elif isinstance(handle, plt.Line2D):
-                    line = handle
-                else:
-                    continue
-                new_line = sub_ax.plot(
-                    line.get_xdata(),
-                    line.get_ydata(),
-                    label=label,
-                    linestyle=line.get_linestyle(),
-                    marker=line.get_marker(),
-                    color=line.get_color(),
-                    alpha=line.get_alpha(),
-                    picker=True,
-                )[0]
-                new_line.set_pickradius(5)  # 5 pixels tolerance for clicking
-            sub_ax.set_title(ax.get_title())
-            sub_ax.set_xlabel(ax.get_xlabel())
-            sub_ax.set_ylabel(ax.get_ylabel())
-            sub_ax.legend()
-            sub_fig.tight_layout()
-
-            sub_canvas = create_plot_tab(
-                sub_fig,
-                self,
-                plot_title=f"Subplot {idx + 1}",
-            )
-
-            # Map subplot to observable IDs
-            # When grouped by condition/dataset, one subplot can have
-            # multiple observables. Extract all observable IDs from legend
-            # labels
-            subplot_title = (
-                ax.get_title() if ax.get_title() else f"subplot_{idx}"
+        tabs.extend(
+            (
+                f"Subplot {idx + 1}",
+                partial(self._build_subplot_figure, plot_set, idx),
+                self.highlighter.connect_canvas,
             )
-            _, legend_labels = ax.get_legend_handles_labels()
-
-            if legend_labels:
-                # Extract observable ID from each legend label
-                for legend_label in legend_labels:
-                    label_parts = legend_label.split()
-                    if len(label_parts) == 0:
-                        continue
-                    # Extract observable ID (last part before "simulation"
-                    # if present)
-                    if label_parts[-1] == "simulation":
-                        obs_id = (
-                            label_parts[-2]
-                            if len(label_parts) >= 2
-                            else label_parts[0]
-                        )
-                    else:
-                        obs_id = label_parts[-1]
-                    # Map this observable to this subplot index
-                    self.observable_to_subplot[obs_id] = idx
-            else:
-                # No legend, use title as fallback
-                self.observable_to_subplot[subplot_title] = idx
-            self.highlighter.register_subplot(ax, idx)
-            # Register subplot canvas
-            self.highlighter.register_subplot(sub_ax, idx)
-            # Also register the original ax from the full figure (main tab)
-            self.highlighter.connect_picking(sub_canvas)
+            for idx in range(len(fig.axes))
+        )
         # Plot residuals if necessary
-        self.plot_residuals()
+        if residual_set is not None:
+            tabs.extend(
+                (title, lambda fig=fig: fig, None)
+                for title, fig in residual_set.residuals
+            )
+        tabs.extend(self._ensemble_tab())
+        self._set_tabs(tabs)
+
+    def set_ensemble(self, band_df):
+        """Show the simulation band of an ensemble in its own tab.
+
+        Parameters
+        ----------
+        band_df : pd.DataFrame | None
+            Quantiles per measurement, see
+            :meth:`petab_gui.ensemble.EnsembleStore.band`. ``None`` removes
+            the tab.
+        """
+        self._ensemble_band = band_df
+        self.plot_it()
 
-        # Restore the previously selected tab (if valid)
-        if 0 <= current_tab_index < self.tab_widget.count():
-            self.tab_widget.setCurrentIndex(current_tab_index)
+    def _ensemble_tab(self):
+        """The ensemble tab, if an ensemble was simulated."""
+        if self._ensemble_band is None:
+            return []
+        band_df = self._ensemble_band
+        return [("Ensemble", lambda: render_ensemble_figure(band_df), None)]
+
+    def _set_tabs(self, tabs):
+        """Show new figures, reusing the existing tabs and canvases.
+
+        Tabs are placeholders; figures are only built and swapped into the
+        tab's canvas once a tab is shown (see _materialize_tab). Tabs are
+        only created or deleted if their number changes.
+
+        Parameters
+        ----------
+        tabs : list[tuple[str, callable, callable | None]]
+            Title, figure factory and canvas hook of each tab, see
+            :class:`LazyPlotTab`.
+        """
+        with QSignalBlocker(self.tab_widget):
+            for index, (title, build_figure, on_canvas) in enumerate(tabs):
+                if index < self.tab_widget.count():
+                    self.tab_widget.widget(index).reset(
+                        build_figure, on_canvas
+                    )
+                    self.tab_widget.setTabText(index, title)
+                else:
+                    self.tab_widget.addTab(
+                        LazyPlotTab(build_figure, on_canvas), title
+                    )
+            while self.tab_widget.count() > len(tabs):
+                tab = self.tab_widget.widget(self.tab_widget.count() - 1)
+                self.tab_widget.removeTab(self.tab_widget.count() - 1)
+                tab.deleteLater()
+        self._materialize_tab(self.tab_widget.currentIndex())
+
+    def _materialize_tab(self, index):
+        """Build figure and canvas of a tab, if not done already."""
+        tab = self.tab_widget.widget(index)
+        if isinstance(tab, LazyPlotTab):
+            tab.materialize(self)
+
+    def _build_subplot_figure(self, plot_set, subplot_idx):
+        """Show one axes of the full figure as a standalone figure.
+
+        The figure is copied once per plot set and then kept with it.
+        """
+        is_new = subplot_idx not in plot_set.subplot_figures
+        sub_fig = plot_set.subplot_figure(subplot_idx)
+        if is_new:
+            # The copy adds to the size of the cached plot set
+            self._render_cache.refresh(plot_set)
+        self.highlighter.register_subplot(sub_fig.axes[0], subplot_idx)
+        return sub_fig
+
+    def rows_for_point(self, x, y, observable_id, data_type="measurement"):
+        """Return the proxy rows of a plotted point.
+
+        Parameters
+        ----------
+        x, y:
+            Coordinates of the plotted point, i.e. time and value.
+        observable_id:
+            The observable the point belongs to.
+        data_type:
+            ``"measurement"`` or ``"simulation"``.
+        """
+        if data_type == "simulation":
+            table_name, proxy = "simulations", self.sim_proxy
+        else:
+            table_name, proxy = "measurements", self.meas_proxy
+        if proxy is None:
+            return []
+        if table_name not in self._point_index:
+            # rows of the cached DataFrame are the rows of the proxy
+            self._point_index[table_name] = PlotPointIndex(
+                self._get_cached_df(table_name, proxy), data_type
+            )
+        return self._point_index[table_name].rows(observable_id, x, y)
 
     def highlight_from_selection(
-        self, selected_rows: list[int], proxy=None, y_axis_col="measurement"
+        self, selected_rows, proxy=None, y_axis_col="measurement"
     ):
+        """Highlight the plotted points of the selected table rows.
+
+        Parameters
+        ----------
+        selected_rows : array-like of int
+            Selected row indices of ``proxy``.
+        proxy : QSortFilterProxyModel, optional
+            Proxy of the selected table, defaults to the measurement proxy.
+        y_axis_col : str, optional
+            Column holding the plotted values (default: "measurement").
+        """
         proxy = proxy or self.meas_proxy
         if not proxy:
             return
 
-        x_axis_col = PETAB_C.TIME
-        observable_col = PETAB_C.OBSERVABLE_ID
-
-        def column_index(name):
-            for col in range(proxy.columnCount()):
-                if proxy.headerData(col, Qt.Horizontal) == name:
-                    return col
-            raise ValueError(f"Column '{name}' not found in proxy.")
-
-        x_col = column_index(x_axis_col)
-        y_col = column_index(y_axis_col)
-        obs_col = column_index(observable_col)
-
-        grouped_points = {}  # subplot_idx → list of (x, y)
+        if proxy is self.sim_proxy:
+            df = self._get_cached_df("simulations", proxy)
+        elif proxy is self.meas_proxy:
+            df = self._get_cached_df("measurements", proxy)
+        else:
+            df = proxy_to_dataframe(proxy)
+        columns = [PETAB_C.OBSERVABLE_ID, PETAB_C.TIME, y_axis_col]
+        if df.empty or not set(columns).issubset(df.columns):
+            return
 
-        for row in selected_rows:
-            x = proxy.index(row, x_col).data()
-            y = proxy.index(row, y_col).data()
-            try:
-                x = float(x)
-                y = float(y)
-            except ValueError:
-                pass
-            obs = proxy.index(row, obs_col).data()
+        rows = np.unique(np.fromiter(selected_rows, dtype=int))
+        # Drops the "New row..." placeholder
+        rows = rows[(rows >= 0) & (rows < len(df))]
+        selected = df[columns].iloc[rows]
+        points = (
+            selected[[PETAB_C.TIME, y_axis_col]]
+            .apply(pd.to_numeric, errors="coerce")
+            .to_numpy(dtype=float)
+        )
+        groups = selected.groupby(PETAB_C.OBSERVABLE_ID, sort=False).indices
+        for obs, positions in groups.items():
             subplot_idx = self.observable_to_subplot.get(obs)
             if subplot_idx is not None:
-                grouped_points.setdefault(subplot_idx, []).append((x, y))
-
-        for subplot_idx, points in grouped_points.items():
-            self.highlighter.update_highlight(subplot_idx, points)
+                self.highlighter.update_highlight(
+                    subplot_idx, points[positions]
+                )
 
     def _debounced_plot(self):
         self.update_timer.start(1000)
 
-    def plot_residuals(self):
-        """Plot residuals between measurements and simulations."""
-        if not self.petab_model or not self.sim_proxy:
-            return
-        if not self.isVisible():
-            # If the dock is not visible, do not plot
-            return
-
-        problem = self.petab_model.current_petab_problem
-        # Reuse cached DataFrame instead of converting again
-        simulations_df = self._get_cached_df("simulations", self.sim_proxy)
-
-        if simulations_df.empty:
-            return
-
-        from petab.v1.visualize.plot_residuals import (
-            plot_goodness_of_fit,
-            plot_residuals_vs_simulation,
-        )
-
-        fig_res, axes = plt.subplots(
-            1, 2, sharey=True, constrained_layout=True, width_ratios=[2, 1]
-        )
-        try:
-            plot_residuals_vs_simulation(
-                problem,
-                simulations_df,
-                axes=axes,
-            )
-            create_plot_tab(fig_res, self, "Residuals vs Simulation")
-        except ValueError:
-            logger.exception("Error plotting residuals")
-        fig_fit, axes_fit = plt.subplots(constrained_layout=False)
-        fig_fit.subplots_adjust(left=0.05, right=0.98, bottom=0.05, top=0.98)
-        plot_goodness_of_fit(
-            problem,
-            simulations_df,
-            ax=axes_fit,
-        )
-        create_plot_tab(fig_fit, self, "Goodness of Fit")
-
     def disable_plotting(self, disable: bool):
         """Set self.no_plotting_rn to enable/disable plotting."""
         self.no_plotting_rn = disable
@@ -440,29 +616,89 @@ class MeasurementHighlighter:
         )  # (subplot index) → scatter artist
         # (subplot index, observableId, x, y) → row index
         self.point_index_map = {}
+        # (subplot index) → highlighted points, applied to subplots that
+        # are registered after the selection was made
+        self.highlighted_points = {}
+        # canvas → background without highlights, cached at each full draw
+        self._backgrounds = weakref.WeakKeyDictionary()
         self.click_callback = None
 
     def clear_highlight(self):
+        # Figures may be shown again from the render cache, so remove the
+        # highlight artists instead of only forgetting them
+        for scatters in self.highlight_scatters.values():
+            for scatter in scatters:
+                if scatter.axes is not None:
+                    scatter.remove()
         self.highlight_scatters = defaultdict(list)
+        self.highlighted_points = {}
 
     def register_subplot(self, ax, subplot_idx):
+        # Highlights are animated artists: full redraws skip them and they
+        # are blitted over the cached background of their canvas instead
         scatter = ax.scatter(
-            [], [], s=80, edgecolors="black", facecolors="none", zorder=5
+            [],
+            [],
+            s=80,
+            edgecolors="black",
+            facecolors="none",
+            zorder=5,
+            animated=True,
         )
+        points = self.highlighted_points.get(subplot_idx)
+        if points is not None and len(points):
+            scatter.set_offsets(points)
         self.highlight_scatters[subplot_idx].append(scatter)
 
-    def update_highlight(self, subplot_idx, points: list[tuple[float, float]]):
-        """Update highlighted points on one subplot."""
-        for scatter in self.highlight_scatters.get(subplot_idx, []):
-            if points:
-                x, y = zip(*points, strict=False)
-                scatter.set_offsets(list(zip(x, y, strict=False)))
-            else:
-                scatter.set_offsets([])
-            scatter.figure.canvas.draw_idle()
+    def update_highlight(self, subplot_idx, points):
+        """Update highlighted points on one subplot.
 
-    def connect_picking(self, canvas):
-        canvas.mpl_connect("pick_event", self._on_pick)
+        ``points`` is an (n, 2) array-like of (x, y) pairs. Only the
+        highlight artists are redrawn, the rest of the figure is restored
+        from the background cached at the last full draw.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.highlighted_points[subplot_idx] = points
+        figures = set()
+        for scatter in self.highlight_scatters.get(subplot_idx, []):
+            scatter.set_offsets(points)
+            figures.add(scatter.figure)
+        for figure in figures:
+            if figure.canvas.figure is figure:
+                self._blit(figure.canvas)
+
+    def connect_canvas(self, canvas) -> list[int]:
+        """Connect picking and highlight blitting to a canvas.
+
+        Returns the callback IDs, see :class:`LazyPlotTab`.
+        """
+        # A background cached for the previous figure must not be restored
+        self._backgrounds.pop(canvas, None)
+        return [
+            canvas.mpl_connect("pick_event", self._on_pick),
+            canvas.mpl_connect("draw_event", self._on_draw),
+        ]
+
+    def _on_draw(self, event):
+        """Cache the static background and draw the highlights on top."""
+        canvas = event.canvas
+        self._backgrounds[canvas] = canvas.copy_from_bbox(canvas.figure.bbox)
+        self._draw_highlights(canvas.figure)
+
+    def _draw_highlights(self, figure):
+        for scatters in self.highlight_scatters.values():
+            for scatter in scatters:
+                if scatter.figure is figure:
+                    figure.draw_artist(scatter)
+
+    def _blit(self, canvas):
+        background = self._backgrounds.get(canvas)
+        if background is None:
+            # Not drawn yet, highlights are drawn with the first full draw
+            return
+        canvas.restore_region(background)
+        self._draw_highlights(canvas.figure)
+        canvas.blit(canvas.figure.bbox)
 
     def _on_pick(self, event):
         if not callable(self.click_callback):
@@ -582,19 +818,111 @@ class CustomNavigationToolbar(NavigationToolbar2QT):
                 )
 
 
+def _fill_plot_tab(tab: QWidget, figure, plotter) -> FigureCanvas:
+    """Add a canvas for the figure and its toolbar to a tab widget."""
+    # A new canvas scales the current dpi to the device pixel ratio
+    figure.set_dpi(_logical_dpi(figure))
+    canvas = FigureCanvas(figure)
+    toolbar = CustomNavigationToolbar(canvas, plotter)
+    layout = tab.layout()
+    layout.addWidget(toolbar)
+    layout.addWidget(canvas)
+    return canvas
+
+
+#: dpi of the shown figures, before scaling them to the device pixel
+#: ratio of the screen
+_logical_dpis = weakref.WeakKeyDictionary()
+
+
+def _logical_dpi(figure: Figure) -> float:
+    """Return the dpi of a figure before it was first shown on a canvas."""
+    return _logical_dpis.setdefault(figure, figure.dpi)
+
+
+def _swap_figure(canvas: FigureCanvas, figure: Figure):
+    """Show another figure on an existing canvas."""
+    figure.set_canvas(canvas)
+    canvas.figure = figure
+    # Scale for high-DPI screens like a new canvas would
+    ratio = canvas.device_pixel_ratio
+    figure.set_dpi(_logical_dpi(figure) * ratio)
+    # Fit the figure to the canvas, like resizing the canvas does
+    figure.set_size_inches(
+        canvas.width() * ratio / figure.dpi,
+        canvas.height() * ratio / figure.dpi,
+        forward=False,
+    )
+    canvas.callbacks.process(
+        "resize_event", ResizeEvent("resize_event", canvas)
+    )
+    canvas.draw_idle()
+    if canvas.toolbar is not None:
+        # Forget zoom and pan history of the previous figure
+        canvas.toolbar.update()
+
+
+class LazyPlotTab(QWidget):
+    """Plot tab that builds its figure when first shown.
+
+    The tab, its canvas and toolbar are reused across refreshes: after
+    :meth:`reset`, the next :meth:`materialize` swaps the new figure into
+    the existing canvas.
+
+    Parameters
+    ----------
+    build_figure : callable
+        Returns the figure to show.
+    on_canvas : callable, optional
+        Called with the canvas whenever a new figure is shown on it.
+        Returns the matplotlib callback IDs it connected, which are
+        disconnected again before the next figure is shown.
+    """
+
+    def __init__(self, build_figure, on_canvas=None, parent=None):
+        super().__init__(parent)
+        self._build_figure = build_figure
+        self._on_canvas = on_canvas
+        self._figure_outdated = True
+        self._callback_ids = []
+        self.canvas = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(2)
+
+    def reset(self, build_figure, on_canvas=None):
+        """Show the figure of ``build_figure`` on the next materialize."""
+        self._build_figure = build_figure
+        self._on_canvas = on_canvas
+        self._figure_outdated = True
+
+    def materialize(self, plotter) -> FigureCanvas:
+        if not self._figure_outdated:
+            return self.canvas
+        figure = self._build_figure()
+        if self.canvas is None:
+            self.canvas = _fill_plot_tab(self, figure, plotter)
+        else:
+            # Callbacks live on the figure, which may be shown again later
+            for cid in self._callback_ids:
+                self.canvas.mpl_disconnect(cid)
+            _swap_figure(self.canvas, figure)
+        self._callback_ids = []
+        if self._on_canvas is not None:
+            self._callback_ids = self._on_canvas(self.canvas)
+        self._figure_outdated = False
+        return self.canvas
+
+
 def create_plot_tab(
     figure, plotter: MeasurementPlotter, plot_title: str = "New Plot"
 ) -> FigureCanvas:
     """Create a new tab with the given figure and plotter."""
-    canvas = FigureCanvas(figure)
-    toolbar = CustomNavigationToolbar(canvas, plotter)
-
     tab = QWidget()
     layout = QVBoxLayout(tab)
     layout.setContentsMargins(0, 0, 0, 0)
     layout.setSpacing(2)
-    layout.addWidget(toolbar)
-    layout.addWidget(canvas)
+    canvas = _fill_plot_tab(tab, figure, plotter)
 
     plotter.tab_widget.addTab(tab, plot_title)
     return canvas
@@ -1,5 +1,11 @@
 import petab.v1 as petab
-from PySide6.QtCore import QItemSelectionModel, QPropertyAnimation, QRect, Qt
+from PySide6.QtCore import (
+    QItemSelectionModel,
+    QPropertyAnimation,
+    QRect,
+    QStringListModel,
+    Qt,
+)
 from PySide6.QtGui import QColor, QGuiApplication
 from PySide6.QtWidgets import (
     QComboBox,
@@ -257,26 +263,33 @@ class ParameterIdSuggestionDelegate(QStyledItemDelegate):
     def createEditor(self, parent, option, index):
         """Create an editor for the parameterId column."""
         editor = QLineEdit(parent)
+        completer = QCompleter(parent)
+        completer.setModel(QStringListModel(completer))
+        completer.setCompletionMode(QCompleter.PopupCompletion)
+        completer.setModelSorting(QCompleter.CaseSensitivelySortedModel)
+        editor.setCompleter(completer)
 
-        # Get unique suggestions from the specified column
-        curr_model = self.sbml_model.get_current_sbml_model()
-        suggestions = None
-        if curr_model:  # only if model is valid
-            suggestions = curr_model.get_valid_parameters_for_parameter_table()
-            # substract the current parameter ids except for the current row
-            row = index.row()
-            selected_parameter_id = self.par_model.get_value_from_column(
-                petab.C.PARAMETER_ID, row
+        symbol_index = self.sbml_model.get_symbol_index()
+        if symbol_index is None:  # only if model is valid
+            return editor
+        # substract the current parameter ids except for the current row
+        row = index.row()
+        selected_parameter_id = self.par_model.get_value_from_column(
+            petab.C.PARAMETER_ID, row
+        )
+        taken = set(self.par_model.get_df().index) - {selected_parameter_id}
+
+        def update_suggestions(text):
+            # Only the symbols starting with the typed text are looked up,
+            # the completer filters them further while typing
+            suggestions = symbol_index.complete(
+                text, symbol_index.parameter_table_ids
+            )
+            completer.model().setStringList(
+                [symbol for symbol in suggestions if symbol not in taken]
             )
-            current_parameter_ids = self.par_model.get_df().index.tolist()
-            if selected_parameter_id in current_parameter_ids:
-                current_parameter_ids.remove(selected_parameter_id)
-            suggestions = list(set(suggestions) - set(current_parameter_ids))
 
-        # Set up the completer with the unique values
-        completer = QCompleter(suggestions, parent)
-        completer.setCompletionMode(QCompleter.PopupCompletion)
-        editor.setCompleter(completer)
+        editor.textEdited.connect(update_suggestions)
 
         return editor
 
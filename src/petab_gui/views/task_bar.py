@@ -159,6 +159,7 @@ class ToolMenu(BasicMenu):
         self.menu.addAction(actions["clear_log"])
         self.menu.addSeparator()
         self.menu.addAction(actions["simulate"])
+        self.menu.addAction(actions["simulate_ensemble"])
 
 
 class TaskBar:
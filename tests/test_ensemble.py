@@ -0,0 +1,174 @@
+"""Tests for ensemble simulations in petab_gui.ensemble."""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import petab.v1 as petab
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from petab_gui.ensemble import EnsembleStore, run_ensemble, sample_parameters
+
+EXAMPLE_YAML = (
+    Path(__file__).parent.parent
+    / "src"
+    / "petab_gui"
+    / "example"
+    / "Simple_Conversion"
+    / "problem.yaml"
+)
+
+
+def make_parameter_df():
+    """Two estimated parameters on different scales and a fixed one."""
+    return pd.DataFrame(
+        {
+            petab.C.PARAMETER_ID: ["k_lin", "k_log", "fixed"],
+            petab.C.PARAMETER_SCALE: ["lin", "log10", "lin"],
+            petab.C.LOWER_BOUND: [1.0, 1e-3, 0.0],
+            petab.C.UPPER_BOUND: [2.0, 1e3, 1.0],
+            petab.C.NOMINAL_VALUE: [1.5, 1.0, 0.5],
+            petab.C.ESTIMATE: [1, 1, 0],
+        }
+    ).set_index(petab.C.PARAMETER_ID)
+
+
+class TestSampleParameters(unittest.TestCase):
+    """Test drawing parameter vectors within the bounds."""
+
+    def test_within_bounds(self):
+        """Test only estimated parameters are sampled within bounds."""
+        samples = sample_parameters(make_parameter_df(), 200, seed=0)
+        self.assertEqual(list(samples.columns), ["k_lin", "k_log"])
+        self.assertEqual(len(samples), 200)
+        self.assertTrue(samples["k_lin"].between(1, 2).all())
+        self.assertTrue(samples["k_log"].between(1e-3, 1e3).all())
+        # Uniform on log10 scale, so about half the samples are below 1
+        self.assertAlmostEqual((samples["k_log"] < 1).mean(), 0.5, delta=0.1)
+
+    def test_seed(self):
+        """Test samples are reproducible with a seed."""
+        for method in ("latin_hypercube", "random"):
+            pd.testing.assert_frame_equal(
+                sample_parameters(make_parameter_df(), 10, method, seed=1),
+                sample_parameters(make_parameter_df(), 10, method, seed=1),
+            )
+
+    def test_grid(self):
+        """Test the grid has the same points per parameter."""
+        samples = sample_parameters(make_parameter_df(), 10, "grid")
+        self.assertEqual(len(samples), 9)
+        np.testing.assert_allclose(
+            np.unique(np.log10(samples["k_log"])), [-2, 0, 2]
+        )
+
+    def test_invalid(self):
+        """Test missing estimated parameters and invalid bounds raise."""
+        parameter_df = make_parameter_df()
+        parameter_df[petab.C.ESTIMATE] = 0
+        with self.assertRaises(ValueError):
+            sample_parameters(parameter_df, 10)
+        parameter_df = make_parameter_df()
+        parameter_df.loc["k_log", petab.C.LOWER_BOUND] = 0
+        with self.assertRaisesRegex(ValueError, "k_log"):
+            sample_parameters(parameter_df, 10)
+
+
+class TestEnsembleStore(unittest.TestCase):
+    """Test storing simulations and computing their band."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_band(self):
+        """Test quantiles per measurement, skipping failed samples."""
+        measurement_df = pd.DataFrame(
+            {
+                petab.C.OBSERVABLE_ID: ["obs", "obs"],
+                petab.C.SIMULATION_CONDITION_ID: ["c0", "c0"],
+                petab.C.TIME: [0.0, 1.0],
+                petab.C.MEASUREMENT: [1.0, 2.0],
+            }
+        )
+        samples = pd.DataFrame({"k": np.arange(102.0)})
+        store = EnsembleStore.create(
+            self.directory.name, samples, measurement_df
+        )
+        store.simulations[:101] = np.arange(101.0)[:, None] * [1, 2]
+        store.simulations.flush()
+        store.close()
+
+        store = EnsembleStore(self.directory.name)
+        self.assertEqual(store.n_failed, 1)
+        band_df = store.band(0.1, 0.9)
+        self.assertNotIn(petab.C.MEASUREMENT, band_df)
+        np.testing.assert_allclose(band_df["lower"], [10, 20])
+        np.testing.assert_allclose(band_df["median"], [50, 100])
+        np.testing.assert_allclose(band_df["upper"], [90, 180])
+        store.close()
+
+
+class TestRunEnsemble(unittest.TestCase):
+    """Test simulating an ensemble of the A -> B conversion example."""
+
+    def test_matches_analytic_solution(self):
+        """Test each sample is simulated with its parameter values."""
+        problem = petab.Problem.from_yaml(EXAMPLE_YAML)
+        samples = pd.DataFrame({"k_conversion": [0.1, 0.2, 0.5]})
+        with tempfile.TemporaryDirectory() as directory:
+            run_ensemble(
+                problem,
+                samples=samples,
+                directory=directory,
+                max_workers=1,
+                backend="scipy",
+            )
+            store = EnsembleStore(directory)
+            measurement_df = problem.measurement_df
+            a = 10 * np.exp(
+                -samples.to_numpy() * measurement_df[petab.C.TIME].to_numpy()
+            )
+            expected = np.where(
+                measurement_df[petab.C.OBSERVABLE_ID] == "obs_A", a, 10 - a
+            )
+            np.testing.assert_allclose(
+                store.simulations, expected, rtol=1e-6, atol=1e-9
+            )
+            self.assertEqual(store.n_failed, 0)
+            self.assertEqual(store.errors, [])
+            store.close()
+
+    def test_failed_samples(self):
+        """Test failed samples are NaN and the first error is kept."""
+        problem = petab.Problem.from_yaml(EXAMPLE_YAML)
+        measurement_df = problem.measurement_df.copy()
+        # A growing A has no steady state
+        measurement_df[petab.C.TIME] = np.inf
+        problem.measurement_df = measurement_df
+        samples = pd.DataFrame({"k_conversion": [0.1, -0.1, -0.2]})
+        with tempfile.TemporaryDirectory() as directory:
+            run_ensemble(
+                problem,
+                samples=samples,
+                directory=directory,
+                max_workers=1,
+                backend="scipy",
+            )
+            store = EnsembleStore(directory)
+            self.assertEqual(store.n_failed, 2)
+            self.assertFalse(np.isnan(store.simulations[0]).any())
+            self.assertEqual(len(store.errors), 1)
+            sample, message = store.errors[0]
+            self.assertEqual(sample, 1)
+            self.assertTrue(message.startswith("ValueError: "))
+            store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
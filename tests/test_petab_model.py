@@ -0,0 +1,81 @@
+"""Tests for the current PEtab problem of petab_model.py."""
+
+import sys
+import unittest
+from pathlib import Path
+
+import petab.v1 as petab
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from PySide6.QtCore import Qt
+
+from petab_gui.models import PEtabModel
+
+EXAMPLE_YAML = (
+    Path(__file__).parent.parent
+    / "src"
+    / "petab_gui"
+    / "example"
+    / "Boehm"
+    / "problem.yaml"
+)
+
+
+class TestCurrentProblem(unittest.TestCase):
+    """Test the current problem is rebuilt only after edits."""
+
+    def setUp(self):
+        self.model = PEtabModel.from_petab_yaml(str(EXAMPLE_YAML))
+
+    def edit_cell(self, table, value, role=Qt.DisplayRole):
+        """Set the first cell of a table and notify like the table does."""
+        table_model = getattr(self.model, table)
+        table_model.get_df().iloc[0, 0] = value
+        index = table_model.index(0, 1)
+        table_model.dataChanged.emit(index, index, [role])
+
+    def test_same_problem_without_edits(self):
+        """Test repeated accesses return the same problem."""
+        problem = self.model.current_petab_problem
+        self.assertIs(self.model.current_petab_problem, problem)
+        self.assertIs(self.model.get_problem_copy(), self.model._problem_copy)
+        self.edit_cell("parameter", "x", role=Qt.BackgroundRole)
+        self.assertIs(self.model.current_petab_problem, problem)
+
+    def test_rebuilt_after_edit(self):
+        """Test edits of a table or the SBML text give a new problem."""
+        problem = self.model.current_petab_problem
+        self.edit_cell("parameter", "p1")
+        edited = self.model.current_petab_problem
+        self.assertIsNot(edited, problem)
+        # Unchanged components are re-used
+        self.assertIs(edited.model, problem.model)
+
+        sbml_text = self.model.sbml.sbml_text
+        self.model.sbml.sbml_text = sbml_text.replace(
+            'id="Boehm_JProteomeRes2014"', 'id="renamed"'
+        )
+        self.assertIsNot(self.model.current_petab_problem.model, edited.model)
+        self.assertEqual(
+            self.model.current_petab_problem.model.model_id, "renamed"
+        )
+
+    def test_copy_unaffected_by_edits(self):
+        """Test the copy for workers keeps the tables it was made with."""
+        copy = self.model.get_problem_copy()
+        first_value = copy.parameter_df.iloc[0, 0]
+        self.edit_cell("parameter", "p1")
+        self.assertEqual(copy.parameter_df.iloc[0, 0], first_value)
+        self.assertEqual(
+            self.model.current_petab_problem.parameter_df.iloc[0, 0], "p1"
+        )
+        new_copy = self.model.get_problem_copy()
+        self.assertIsNot(new_copy, copy)
+        self.assertEqual(new_copy.parameter_df.iloc[0, 0], "p1")
+        self.assertIsInstance(new_copy, petab.Problem)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Tests for the headless plot export in plot_export.py."""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+import petab.v1 as petab
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from petab_gui.views.plot_export import collect_plot_jobs, export_plots
+
+EXAMPLE_YAML = (
+    Path(__file__).parent.parent
+    / "src"
+    / "petab_gui"
+    / "example"
+    / "Boehm"
+    / "problem.yaml"
+)
+
+
+class TestPlotExport(unittest.TestCase):
+    """Test exporting all plots of a problem to files."""
+
+    def setUp(self):
+        """Load the Boehm example with simulations and a vis table."""
+        self.problem = petab.Problem.from_yaml(EXAMPLE_YAML)
+        meas_df = self.problem.measurement_df
+        self.sim_df = meas_df.rename(
+            columns={petab.C.MEASUREMENT: petab.C.SIMULATION}
+        )
+        self.problem.visualization_df = pd.DataFrame(
+            {
+                petab.C.PLOT_ID: ["plot1", "plot1", "plot2"],
+                petab.C.Y_VALUES: meas_df[petab.C.OBSERVABLE_ID]
+                .unique()
+                .tolist(),
+            }
+        )
+        self.observables = meas_df[petab.C.OBSERVABLE_ID].unique()
+        self.conditions = meas_df[petab.C.SIMULATION_CONDITION_ID].unique()
+
+    def test_collect_plot_jobs(self):
+        """Test one job per observable, condition, vis plot and residuals."""
+        jobs = collect_plot_jobs(self.problem, self.sim_df)
+        self.assertEqual(
+            sorted(job.stem for job in jobs),
+            sorted(
+                [f"observable_{obs}" for obs in self.observables]
+                + [f"condition_{cond}" for cond in self.conditions]
+                + ["plot_plot1", "plot_plot2", "residuals_all"]
+            ),
+        )
+        for job in jobs:
+            if job.kind == "observable":
+                self.assertEqual(
+                    job.tables["meas_df"][petab.C.OBSERVABLE_ID].unique(),
+                    [job.name],
+                )
+
+    def test_without_simulations(self):
+        """Test residuals are only exported with simulations."""
+        jobs = collect_plot_jobs(self.problem)
+        self.assertNotIn("residuals", [job.kind for job in jobs])
+
+    def test_export_plots(self):
+        """Test every job writes a file in every format."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            written = export_plots(
+                self.problem,
+                tmpdir,
+                formats=["png", "svg"],
+                simulation_df=self.sim_df,
+                max_workers=1,
+            )
+            self.assertEqual(sorted(written), sorted(Path(tmpdir).iterdir()))
+        stems = {path.stem for path in written}
+        self.assertIn("plot_plot2", stems)
+        self.assertIn("goodness_of_fit", stems)
+        self.assertEqual(len(written), 2 * len(stems))
+
+    def test_export_plots_in_parallel(self):
+        """Test worker processes write the same files as the serial run."""
+        written = {}
+        for max_workers in (1, 2):
+            with tempfile.TemporaryDirectory() as tmpdir:
+                paths = export_plots(
+                    self.problem,
+                    tmpdir,
+                    simulation_df=self.sim_df,
+                    max_workers=max_workers,
+                )
+                self.assertTrue(all(path.stat().st_size for path in paths))
+            written[max_workers] = [path.name for path in paths]
+        self.assertEqual(written[2], written[1])
+
+    def test_unsupported_format(self):
+        """Test unsupported formats are rejected."""
+        with self.assertRaises(ValueError):
+            export_plots(self.problem, "unused", formats=["bmp"])
+
+
+if __name__ == "__main__":
+    unittest.main()
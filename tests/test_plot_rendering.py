@@ -0,0 +1,384 @@
+"""Tests for the off-screen plot rendering in plot_rendering.py."""
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import petab.v1 as petab
+from matplotlib.backend_bases import ResizeEvent
+from matplotlib.figure import Figure
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from petab_gui.views.plot_rendering import (
+    PlotPointIndex,
+    PlotSet,
+    RenderCache,
+    compute_residuals,
+    copy_axes_to_figure,
+    downsample_dense_lines,
+    fingerprint_df,
+    full_line_data,
+    map_observables_to_subplots,
+    minmax_indices,
+    render_plot_set,
+    render_residual_set,
+)
+
+EXAMPLE_YAML = (
+    Path(__file__).parent.parent
+    / "src"
+    / "petab_gui"
+    / "example"
+    / "Boehm"
+    / "problem.yaml"
+)
+
+
+class TestRenderPlotSet(unittest.TestCase):
+    """Test rendering of the plot dock figures without Qt."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the Boehm example problem once."""
+        cls.problem = petab.Problem.from_yaml(EXAMPLE_YAML)
+
+    def test_render_by_observable(self):
+        """Test one subplot per observable is rendered."""
+        plot_set = render_plot_set(
+            None,
+            self.problem.condition_df,
+            self.problem.measurement_df,
+            None,
+            "observable",
+        )
+        n_observables = self.problem.measurement_df[
+            petab.C.OBSERVABLE_ID
+        ].nunique()
+        self.assertIsNotNone(plot_set.figure)
+        self.assertEqual(len(plot_set.figure.axes), n_observables)
+        self.assertEqual(plot_set.residuals, [])
+        self.assertEqual(
+            set(plot_set.observable_to_subplot),
+            set(self.problem.measurement_df[petab.C.OBSERVABLE_ID]),
+        )
+
+    def test_copy_axes_to_figure(self):
+        """Test a subplot copy keeps the title and legend entries."""
+        plot_set = render_plot_set(
+            None,
+            self.problem.condition_df,
+            self.problem.measurement_df,
+            None,
+            "observable",
+        )
+        ax = plot_set.figure.axes[0]
+        sub_fig = copy_axes_to_figure(ax)
+        self.assertEqual(sub_fig.axes[0].get_title(), ax.get_title())
+        self.assertEqual(
+            sub_fig.axes[0].get_legend_handles_labels()[1],
+            ax.get_legend_handles_labels()[1],
+        )
+
+    def test_render_without_measurements(self):
+        """Test an empty plot set is returned if there is nothing to plot."""
+        plot_set = render_plot_set(
+            None,
+            self.problem.condition_df,
+            self.problem.measurement_df.iloc[0:0],
+            None,
+            "observable",
+        )
+        self.assertIsNone(plot_set.figure)
+        self.assertEqual(plot_set.observable_to_subplot, {})
+
+    def test_cancelled_render_stops_early(self):
+        """Test a cancelled render skips the observable mapping."""
+        plot_set = render_plot_set(
+            None,
+            self.problem.condition_df,
+            self.problem.measurement_df,
+            None,
+            "observable",
+            is_cancelled=lambda: True,
+        )
+        self.assertIsNotNone(plot_set.figure)
+        self.assertEqual(plot_set.observable_to_subplot, {})
+
+    def test_vis_df_fallback(self):
+        """Test an invalid visualization table falls back to observables."""
+        plot_set = render_plot_set(
+            None,
+            self.problem.condition_df,
+            self.problem.measurement_df,
+            None,
+            "vis_df",
+        )
+        self.assertEqual(
+            map_observables_to_subplots(plot_set.figure),
+            plot_set.observable_to_subplot,
+        )
+
+
+class TestDownsampling(unittest.TestCase):
+    """Test the min/max downsampling of dense lines."""
+
+    def setUp(self):
+        """Create a dense noisy time course."""
+        rng = np.random.default_rng(0)
+        self.x = np.linspace(0, 100, 100_000)
+        self.y = np.sin(self.x) + rng.random(len(self.x))
+
+    def test_minmax_indices_keep_extrema(self):
+        """Test extrema survive and only original points are returned."""
+        indices = minmax_indices(self.x, self.y, 0, 100, 500)
+        self.assertLess(len(indices), 4 * 500 + 2)
+        self.assertEqual(self.y[indices].max(), self.y.max())
+        self.assertEqual(self.y[indices].min(), self.y.min())
+        self.assertTrue(np.all(np.diff(indices) > 0))
+
+    def test_minmax_indices_sparse_data_unchanged(self):
+        """Test lines with few visible points are not reduced."""
+        indices = minmax_indices(self.x[:100], self.y[:100], 0, 100, 500)
+        np.testing.assert_array_equal(indices, np.arange(100))
+
+    def test_zoom_recomputes_reduction(self):
+        """Test changing the x limits re-reduces to the visible range."""
+        fig = Figure()
+        ax = fig.subplots()
+        (line,) = ax.plot(self.x, self.y)
+        downsample_dense_lines(fig)
+        self.assertLess(len(line.get_xdata()), len(self.x))
+        np.testing.assert_array_equal(full_line_data(line)[0], self.x)
+
+        ax.set_xlim(10, 11)
+        xdata = line.get_xdata()
+        self.assertLessEqual(xdata[0], 10)
+        self.assertGreaterEqual(xdata[1], 10)
+        self.assertGreaterEqual(xdata[-1], 11)
+        self.assertLessEqual(xdata[-2], 11)
+        self.assertTrue(np.isin(xdata, self.x).all())
+
+    def test_resize_recomputes_reduction(self):
+        """Test enlarging the canvas re-reduces to the new width."""
+        fig = Figure(figsize=(2, 2), dpi=100)
+        ax = fig.subplots()
+        (line,) = ax.plot(self.x, self.y)
+        downsample_dense_lines(fig)
+        n_small = len(line.get_xdata())
+
+        fig.set_size_inches(10, 2)
+        fig.canvas.callbacks.process(
+            "resize_event", ResizeEvent("resize_event", fig.canvas)
+        )
+        self.assertGreater(len(line.get_xdata()), n_small)
+
+
+class TestRenderCache(unittest.TestCase):
+    """Test the LRU cache of rendered plot sets."""
+
+    @staticmethod
+    def _plot_set():
+        fig = Figure(figsize=(1, 1), dpi=100)
+        fig.subplots().plot([0, 1], [0, 1])
+        return PlotSet(fig)
+
+    def test_fingerprint_df(self):
+        """Test fingerprints change with content but not with copies."""
+        df = petab.Problem.from_yaml(EXAMPLE_YAML).measurement_df
+        self.assertEqual(fingerprint_df(df), fingerprint_df(df.copy()))
+        changed = df.copy()
+        changed.loc[0, petab.C.MEASUREMENT] += 1
+        self.assertNotEqual(fingerprint_df(df), fingerprint_df(changed))
+
+    def test_lru_eviction(self):
+        """Test least recently used entries are evicted over the cap."""
+        nbytes = self._plot_set().estimate_nbytes()
+        cache = RenderCache(max_bytes=2 * nbytes)
+        cache.put("a", self._plot_set())
+        cache.put("b", self._plot_set())
+        self.assertIsNotNone(cache.get("a"))
+        cache.put("c", self._plot_set())
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertEqual(cache.nbytes, 2 * nbytes)
+
+        cache.set_max_bytes(0)
+        self.assertEqual(cache.nbytes, 0)
+        self.assertIsNone(cache.get("a"))
+
+    def test_subplot_figures(self):
+        """Test subplot copies are kept and counted for the cache size."""
+        plot_set = self._plot_set()
+        plot_set.figure.axes[0].lines[0].set_label("obs")
+        cache = RenderCache(max_bytes=10**9)
+        cache.put("a", plot_set)
+        nbytes = cache.nbytes
+
+        sub_fig = plot_set.subplot_figure(0)
+        self.assertIs(plot_set.subplot_figure(0), sub_fig)
+        self.assertIn(sub_fig, plot_set.figures())
+        cache.refresh(plot_set)
+        self.assertEqual(cache.nbytes, plot_set.estimate_nbytes())
+        self.assertGreater(cache.nbytes, nbytes)
+
+
+class TestPlotPointIndex(unittest.TestCase):
+    """Test the plotted point to table row index."""
+
+    def setUp(self):
+        """Create the index for the Boehm measurements."""
+        self.df = petab.Problem.from_yaml(EXAMPLE_YAML).measurement_df
+        self.index = PlotPointIndex(self.df, petab.C.MEASUREMENT)
+
+    def test_lookup_all_rows(self):
+        """Test every row is found from its own coordinates."""
+        for row, (obs, time, value) in enumerate(
+            self.df[
+                [petab.C.OBSERVABLE_ID, petab.C.TIME, petab.C.MEASUREMENT]
+            ].itertuples(index=False)
+        ):
+            self.assertIn(row, self.index.rows(obs, time, value))
+
+    def test_lookup_tolerates_noise(self):
+        """Test coordinates are matched despite floating point noise."""
+        obs, time, value = self.df.iloc[3][
+            [petab.C.OBSERVABLE_ID, petab.C.TIME, petab.C.MEASUREMENT]
+        ]
+        self.assertIn(3, self.index.rows(obs, time + 1e-12, value - 1e-12))
+        self.assertEqual(self.index.rows(obs, time, value + 1), [])
+        self.assertEqual(self.index.rows("unknown", time, value), [])
+
+    def test_missing_columns(self):
+        """Test an index over a table without the value column is empty."""
+        index = PlotPointIndex(self.df, petab.C.SIMULATION)
+        self.assertEqual(index.rows("obs", 0, 0), [])
+
+
+class TestResiduals(unittest.TestCase):
+    """Test the vectorized residual computation."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create shuffled simulations for the Boehm measurements."""
+        cls.problem = petab.Problem.from_yaml(EXAMPLE_YAML)
+        meas_df = cls.problem.measurement_df
+        sim_df = meas_df.rename(
+            columns={petab.C.MEASUREMENT: petab.C.SIMULATION}
+        )
+        sim_df[petab.C.SIMULATION] = 1.1 * meas_df[petab.C.MEASUREMENT] + 0.3
+        cls.sim_df = sim_df.sample(frac=1, random_state=0)
+
+    def assert_residuals_match_petab(
+        self, meas_df, observable_df, sim_df=None
+    ):
+        if sim_df is None:
+            sim_df = self.sim_df
+        expected = petab.calculate_residuals(
+            meas_df, sim_df, observable_df, self.problem.parameter_df
+        )[0]
+        actual = compute_residuals(
+            meas_df, sim_df, observable_df, self.problem.parameter_df
+        )
+        np.testing.assert_allclose(
+            actual[petab.C.RESIDUAL], expected[petab.C.RESIDUAL]
+        )
+
+    def test_matches_petab(self):
+        """Test residuals equal petab's, independent of simulation order."""
+        self.assert_residuals_match_petab(
+            self.problem.measurement_df, self.problem.observable_df
+        )
+
+    def test_log_transformation(self):
+        """Test transformed observables are scaled before subtracting."""
+        observable_df = self.problem.observable_df.copy()
+        observable_df[petab.C.OBSERVABLE_TRANSFORMATION] = petab.C.LOG10
+        self.assert_residuals_match_petab(
+            self.problem.measurement_df, observable_df
+        )
+
+    def test_empty_cells_match_any_simulation(self):
+        """Test empty measurement cells act as wildcards."""
+        meas_df = self.problem.measurement_df.copy()
+        meas_df[petab.C.DATASET_ID] = ""
+        self.assert_residuals_match_petab(meas_df, self.problem.observable_df)
+
+    def test_numeric_key_columns(self):
+        """Test numbers match by value, but not numeric strings."""
+        meas_df = self.problem.measurement_df.copy()
+        meas_df[petab.C.REPLICATE_ID] = np.arange(len(meas_df)) % 3
+        sim_df = self.sim_df.copy()
+        sim_df[petab.C.REPLICATE_ID] = (
+            meas_df[petab.C.REPLICATE_ID].loc[sim_df.index].astype(float)
+        )
+        self.assert_residuals_match_petab(
+            meas_df, self.problem.observable_df, sim_df
+        )
+
+        sim_df[petab.C.REPLICATE_ID] = sim_df[petab.C.REPLICATE_ID].astype(str)
+        for residuals in (petab.calculate_residuals, compute_residuals):
+            with (
+                self.subTest(residuals=residuals.__name__),
+                self.assertRaises(ValueError),
+            ):
+                residuals(
+                    meas_df,
+                    sim_df,
+                    self.problem.observable_df,
+                    self.problem.parameter_df,
+                )
+
+    def test_duplicate_simulations(self):
+        """Test identical matches are used, different ones raise."""
+        sim_df = pd.concat([self.sim_df, self.sim_df.iloc[:1]])
+        self.assert_residuals_match_petab(
+            self.problem.measurement_df, self.problem.observable_df, sim_df
+        )
+        sim_df.iloc[-1, sim_df.columns.get_loc(petab.C.SIMULATION)] += 1
+        for residuals in (petab.calculate_residuals, compute_residuals):
+            with (
+                self.subTest(residuals=residuals.__name__),
+                self.assertRaises(ValueError),
+            ):
+                residuals(
+                    self.problem.measurement_df,
+                    sim_df,
+                    self.problem.observable_df,
+                    self.problem.parameter_df,
+                )
+
+    def test_missing_simulation(self):
+        """Test measurements without simulation raise."""
+        with self.assertRaises(ValueError):
+            compute_residuals(
+                self.problem.measurement_df,
+                self.sim_df.iloc[1:],
+                self.problem.observable_df,
+                self.problem.parameter_df,
+            )
+
+    def test_render_residual_set(self):
+        """Test both residual figures are rendered."""
+        residual_set = render_residual_set(
+            self.problem.measurement_df,
+            self.sim_df,
+            self.problem.observable_df,
+            self.problem.parameter_df,
+        )
+        self.assertTrue(residual_set.complete)
+        self.assertEqual(
+            [title for title, _ in residual_set.residuals],
+            ["Residuals vs Simulation", "Goodness of Fit"],
+        )
+        fit_fig = residual_set.residuals[1][1]
+        text = fit_fig.axes[0].texts[0].get_text()
+        self.assertIn("mean absolute residual", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,283 @@
+"""Tests for the SBML model of the SBML viewer and its conversions."""
+
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import libsbml
+import petab.v1 as petab
+
+# Widgets need a platform, also without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pandas as pd
+from PySide6.QtCore import QModelIndex
+from PySide6.QtTest import QTest
+from PySide6.QtWidgets import QApplication, QStyleOptionViewItem, QWidget
+
+from petab_gui.controllers.sbml_controller import SbmlController
+from petab_gui.controllers.simulation_runner import SimulationRunner
+from petab_gui.models.sbml_model import SbmlViewerModel
+from petab_gui.models.sbml_symbols import SbmlSymbolIndex
+from petab_gui.models.sbml_utils import (
+    antimony_to_sbml,
+    convert_model_text,
+    read_sbml_header,
+)
+from petab_gui.views.sbml_view import SbmlViewer
+from petab_gui.views.table_view import ParameterIdSuggestionDelegate
+
+_qapp = QApplication.instance() or QApplication([])
+
+EXAMPLE_YAML = (
+    Path(__file__).parent.parent
+    / "src"
+    / "petab_gui"
+    / "example"
+    / "Simple_Conversion"
+    / "problem.yaml"
+)
+
+
+class TestParsedModelCache(unittest.TestCase):
+    """Test the SBML text is parsed once per change."""
+
+    def setUp(self):
+        problem = petab.Problem.from_yaml(EXAMPLE_YAML)
+        self.sbml = SbmlViewerModel(problem.model)
+
+    def test_shared_until_text_changes(self):
+        """Test the parsed model is shared until the text changes."""
+        sbml_model = self.sbml.get_current_sbml_model()
+        self.assertIs(self.sbml.get_current_sbml_model(), sbml_model)
+        self.sbml.sbml_text = self.sbml.sbml_text.replace(
+            'id="SimpleConversion"', 'id="Renamed"'
+        )
+        renamed = self.sbml.get_current_sbml_model()
+        self.assertIsNot(renamed, sbml_model)
+        self.assertEqual(renamed.model_id, "Renamed")
+
+    def test_compared_by_text(self):
+        """Test the parsed model is only shared for an equal text."""
+        sbml_model = self.sbml.get_current_sbml_model()
+        # An equal text in a new string object
+        self.sbml.sbml_text = "".join(list(self.sbml.sbml_text))
+        self.assertIs(self.sbml.get_current_sbml_model(), sbml_model)
+
+        # A changed text with the same hash
+        renamed = self.sbml.sbml_text.replace(
+            'id="SimpleConversion"', 'id="Renamed"'
+        )
+        self.sbml._parsed_hash = hash(renamed)
+        self.sbml.sbml_text = renamed
+        self.assertEqual(
+            self.sbml.get_current_sbml_model().model_id, "Renamed"
+        )
+
+    def test_invalidated_by_conversion(self):
+        """Test converting the Antimony text parses the new SBML text."""
+        sbml_model = self.sbml.get_current_sbml_model()
+        self.sbml.antimony_text = self.sbml.antimony_text.replace(
+            "k_conversion = 0.1", "k_conversion = 0.2"
+        )
+        self.sbml.convert_antimony_to_sbml()
+        self.assertIsNot(self.sbml.get_current_sbml_model(), sbml_model)
+        self.assertEqual(self.sbml.get_initial_values()["k_conversion"], 0.2)
+        self.assertEqual(self.sbml.model_id, "SimpleConversion")
+
+
+class TestInitialValues(unittest.TestCase):
+    """Test reading initial values from the SBML model."""
+
+    def setUp(self):
+        problem = petab.Problem.from_yaml(EXAMPLE_YAML)
+        self.sbml = SbmlViewerModel(problem.model)
+
+    def test_all_entities(self):
+        """Test parameters, species and compartments are covered."""
+        self.assertEqual(
+            self.sbml.get_initial_values(),
+            {
+                "default_compartment": 1.0,
+                "A": 10.0,
+                "B": 0.0,
+                "k_conversion": 0.1,
+            },
+        )
+
+    def test_updated_with_text(self):
+        """Test values are read again once the SBML text changed."""
+        values = self.sbml.get_initial_values()
+        self.assertIs(self.sbml.get_initial_values(), values)
+        self.sbml.sbml_text = self.sbml.sbml_text.replace(
+            'value="0.1"', 'value="0.5"'
+        )
+        self.assertEqual(self.sbml.get_initial_values()["k_conversion"], 0.5)
+        self.sbml.sbml_text = ""
+        self.assertIsNone(self.sbml.get_initial_values())
+
+
+class TestSbmlHeader(unittest.TestCase):
+    """Test reading the header of SBML documents."""
+
+    def setUp(self):
+        problem = petab.Problem.from_yaml(EXAMPLE_YAML)
+        self.sbml_text = problem.model.to_sbml_str()
+
+    def test_header(self):
+        """Test level, version, ID and name of the model are read."""
+        header = read_sbml_header(self.sbml_text)
+        self.assertEqual(
+            header,
+            {"level": 3, "version": 2, "id": "SimpleConversion", "name": ""},
+        )
+
+    def test_stops_at_model(self):
+        """Test the document after the model start tag is not parsed."""
+        end = self.sbml_text.index("<listOfCompartments>")
+        truncated = self.sbml_text[:end] + "<not closed" * 10_000
+        self.assertEqual(read_sbml_header(truncated)["id"], "SimpleConversion")
+
+    def test_fallback(self):
+        """Test documents the XML parser cannot read are left to libsbml."""
+        self.assertIsNone(read_sbml_header("not SBML"))
+        self.assertIsNone(read_sbml_header(""))
+
+    def test_model_id(self):
+        """Test the viewer model takes its model ID from the header."""
+        sbml = SbmlViewerModel(None)
+        self.assertEqual(sbml.model_id, "New_File")
+        sbml.set_sbml_from_antimony(self.sbml_text)
+        self.assertEqual(sbml.model_id, "SimpleConversion")
+        self.assertEqual(sbml.header["level"], 3)
+
+
+class TestSymbolIndex(unittest.TestCase):
+    """Test the symbol index of an SBML model."""
+
+    def setUp(self):
+        sbml_text = antimony_to_sbml(
+            "model m\n"
+            " compartment cell = 1\n"
+            " species A in cell = 3\n"
+            " k_on = 1; k_off = 2; kd := k_off / k_on\n"
+            "end"
+        )
+        self.document = libsbml.readSBMLFromString(sbml_text)
+        self.index = SbmlSymbolIndex(self.document.getModel())
+
+    def test_kinds(self):
+        """Test the sets per kind of symbol."""
+        self.assertEqual(self.index.species, {"A"})
+        self.assertEqual(self.index.compartments, {"cell"})
+        self.assertEqual(self.index.assignment_targets, {"kd"})
+        self.assertEqual(self.index.parameter_table_ids, {"k_on", "k_off"})
+        self.assertEqual(
+            self.index.condition_table_ids,
+            {"cell", "A", "k_on", "k_off", "kd"},
+        )
+        self.assertIn("kd", self.index)
+        self.assertNotIn("k", self.index)
+
+    def test_complete(self):
+        """Test the prefix lookup."""
+        self.assertEqual(self.index.complete("k"), ["k_off", "k_on", "kd"])
+        self.assertEqual(self.index.complete("k_o"), ["k_off", "k_on"])
+        self.assertEqual(self.index.complete("x"), [])
+        self.assertEqual(
+            self.index.complete("k", self.index.parameter_table_ids),
+            ["k_off", "k_on"],
+        )
+
+    def test_parameter_id_suggestions(self):
+        """Test the parameter ID editor suggests symbols by prefix."""
+        sbml_model = mock.Mock(get_symbol_index=lambda: self.index)
+        par_model = mock.Mock(
+            get_df=lambda: pd.DataFrame(index=["k_off", "k_on"]),
+            get_value_from_column=lambda column, row: "k_on",
+        )
+        delegate = ParameterIdSuggestionDelegate(par_model, sbml_model)
+        parent = QWidget()
+        self.addCleanup(parent.deleteLater)
+        editor = delegate.createEditor(
+            parent, QStyleOptionViewItem(), QModelIndex()
+        )
+        with mock.patch.object(
+            self.index, "complete", wraps=self.index.complete
+        ) as complete:
+            QTest.keyClicks(editor, "k_")
+        complete.assert_called_with("k_", self.index.parameter_table_ids)
+        # k_off is the ID of another row
+        self.assertEqual(editor.completer().model().stringList(), ["k_on"])
+
+    def test_per_revision(self):
+        """Test the viewer model builds the index once per SBML text."""
+        sbml = SbmlViewerModel(petab.Problem.from_yaml(EXAMPLE_YAML).model)
+        index = sbml.get_symbol_index()
+        self.assertIs(sbml.get_symbol_index(), index)
+        self.assertEqual(index.parameter_table_ids, {"k_conversion"})
+        sbml.sbml_text = sbml.sbml_text.replace("k_conversion", "k_conv")
+        self.assertEqual(
+            sbml.get_symbol_index().parameter_table_ids, {"k_conv"}
+        )
+
+
+class TestConversion(unittest.TestCase):
+    """Test converting models in a worker process."""
+
+    def convert(self, text, to_sbml):
+        """Convert ``text`` with a runner, return the emitted signal."""
+        runner = SimulationRunner()
+        self.addCleanup(runner.shutdown)
+        events = []
+        runner.finished.connect(lambda text: events.append(("result", text)))
+        runner.failed.connect(lambda error: events.append(("error", error)))
+        runner.run(convert_model_text, text, to_sbml)
+        start = time.time()
+        while not events and time.time() - start < 60:
+            _qapp.processEvents()
+            time.sleep(0.01)
+        self.assertEqual(len(events), 1)
+        return events[0]
+
+    def test_antimony_to_sbml(self):
+        """Test the SBML text is delivered back to the GUI process."""
+        kind, sbml_text = self.convert("model m\n k = 0.5\nend", True)
+        self.assertEqual(kind, "result")
+        self.assertIn('id="k"', sbml_text)
+
+    def test_error(self):
+        """Test invalid Antimony is reported as error."""
+        kind, error = self.convert("model m\n k = = 1\nend", True)
+        self.assertEqual(kind, "error")
+        self.assertIn("Antimony", error)
+
+    def test_superseded(self):
+        """Test a newer request cancels the running conversion."""
+        view = SbmlViewer()
+        self.addCleanup(view.deleteLater)
+        controller = SbmlController(
+            view, SbmlViewerModel(None), mock.Mock(), None
+        )
+        # The controller owns the runner, it must outlive the cleanup
+        self.addCleanup(lambda: controller.converter.shutdown())
+        controller.request_conversion("model m\n k = 1\nend", True)
+        controller._conversion_timer.stop()
+        controller._start_conversion()
+        process = controller.converter._process
+        self.assertTrue(controller.is_converting())
+
+        controller.request_conversion("model m\n k2 = 2\nend", True)
+        controller.flush_conversion()
+        self.assertFalse(process.is_alive())
+        self.assertIn('id="k2"', controller.model.sbml_text)
+        self.assertNotIn('id="k"', controller.model.sbml_text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+"""Tests for the model editor of sbml_view.py."""
+
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+
+# Widgets need a platform, also without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from PySide6.QtWidgets import QApplication
+
+from petab_gui.views.sbml_view import (
+    FOLD_MIN_LINES,
+    LARGE_DOCUMENT_SIZE,
+    LOAD_CHUNK_LINES,
+    ModelTextEdit,
+)
+
+_qapp = QApplication.instance() or QApplication([])
+
+
+def sbml_text(n_species, n_reactions=0):
+    """SBML-like text with listOf* sections of the given sizes."""
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        "<sbml>",
+        '  <model id="m">',
+        "    <listOfCompartments>",
+        '      <compartment id="c"/>',
+        "    </listOfCompartments>",
+        "    <listOfSpecies>",
+    ]
+    lines += [
+        f'      <species id="s{i}" compartment="c" initialAmount="1"/>'
+        for i in range(n_species)
+    ]
+    lines += ["    </listOfSpecies>", "    <listOfRules/>"]
+    lines.append("    <listOfReactions>")
+    for i in range(n_reactions):
+        lines += [
+            f'      <reaction id="r{i}">',
+            "        <listOfReactants>",
+            f'          <speciesReference species="s{i}"/>',
+            "        </listOfReactants>",
+            "      </reaction>",
+        ]
+    lines += ["    </listOfReactions>", "  </model>", "</sbml>", ""]
+    return "\n".join(lines)
+
+
+class TestModelTextEdit(unittest.TestCase):
+    """Test loading large texts and collapsing their sections."""
+
+    def setUp(self):
+        self.editor = ModelTextEdit("sbml")
+        self.addCleanup(self.editor.deleteLater)
+
+    def load(self, text, timeout=60):
+        """Show ``text`` and process events until it is loaded."""
+        self.editor.set_model_text(text)
+        start = time.time()
+        while self.editor.isReadOnly() and time.time() - start < timeout:
+            _qapp.processEvents()
+        self.assertFalse(self.editor.isReadOnly(), "Timed out loading")
+
+    def block_text(self, block):
+        """The text of a block without indentation."""
+        return block.text().strip()
+
+    def test_find_sections(self):
+        """Test only large, outermost listOf* sections are collapsible."""
+        text = sbml_text(FOLD_MIN_LINES, n_reactions=FOLD_MIN_LINES)
+        self.editor.set_model_text(text)
+        # Small texts are not split into sections
+        self.assertFalse(self.editor.has_sections())
+
+        self.editor._find_sections(text)
+        sections = [
+            (self.block_text(first), self.block_text(last))
+            for first, last, _ in self.editor._sections
+        ]
+        # Not the small listOfCompartments, the empty listOfRules or the
+        # listOfReactants nested in listOfReactions
+        self.assertEqual(
+            sections,
+            [
+                ("<listOfSpecies>", "</listOfSpecies>"),
+                ("<listOfReactions>", "</listOfReactions>"),
+            ],
+        )
+
+    def test_model_text_while_loading(self):
+        """Test the full text is returned before it is shown fully."""
+        text = sbml_text(LOAD_CHUNK_LINES + 1000)
+        self.assertGreaterEqual(len(text), LARGE_DOCUMENT_SIZE)
+        self.editor.set_model_text(text)
+        self.assertTrue(self.editor.isReadOnly())
+        _qapp.processEvents()
+        # Only the first chunk was inserted
+        self.assertLess(len(self.editor.toPlainText()), len(text))
+        self.assertEqual(self.editor.model_text(), text)
+
+        self.load(text)
+        self.assertEqual(self.editor.model_text(), text)
+        self.assertEqual(self.editor.toPlainText(), text)
+
+    def test_small_text_while_loading(self):
+        """Test a small text replacing a loading one can be undone."""
+        self.editor.set_model_text(sbml_text(LOAD_CHUNK_LINES + 1000))
+        _qapp.processEvents()
+        text = sbml_text(10)
+        self.editor.set_model_text(text)
+        self.assertFalse(self.editor.isReadOnly())
+        self.assertTrue(self.editor.isUndoRedoEnabled())
+        _qapp.processEvents()
+        self.assertEqual(self.editor.toPlainText(), text)
+
+        self.editor.insertPlainText("edit")
+        self.editor.undo()
+        self.assertEqual(self.editor.toPlainText(), text)
+
+    def test_collapse_expand(self):
+        """Test large sections are collapsed after loading and toggle."""
+        text = sbml_text(LOAD_CHUNK_LINES + 1000)
+        self.load(text)
+        self.assertTrue(self.editor.has_sections())
+        first, last, collapsed = self.editor._sections[0]
+        self.assertTrue(collapsed)
+        self.assertEqual(self.block_text(first), "<listOfSpecies>")
+        self.assertTrue(first.isVisible())
+        self.assertTrue(last.isVisible())
+        self.assertFalse(first.next().isVisible())
+        self.assertEqual(len(self.editor.extraSelections()), 1)
+
+        self.editor.expand_all()
+        self.assertTrue(first.next().isVisible())
+        self.assertTrue(last.previous().isVisible())
+        self.assertEqual(self.editor.extraSelections(), [])
+
+        self.editor.collapse_all()
+        self.assertFalse(first.next().isVisible())
+        self.assertFalse(last.previous().isVisible())
+        self.assertEqual(len(self.editor.extraSelections()), 1)
+        # Collapsing does not change the text
+        self.assertEqual(self.editor.model_text(), text)
+
+
+if __name__ == "__main__":
+    unittest.main()
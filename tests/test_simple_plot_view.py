@@ -0,0 +1,306 @@
+"""Tests for the plot tabs of simple_plot_view.py."""
+
+import os
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+# Widgets need a platform, also without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
+from matplotlib.figure import Figure
+from PySide6.QtCore import QItemSelection, QItemSelectionModel
+from PySide6.QtWidgets import QApplication, QTableView, QWidget
+
+from petab_gui.controllers.plot_coordinator import PlotCoordinator
+from petab_gui.models.pandas_table_model import (
+    MeasurementModel,
+    PandasTableFilterProxy,
+)
+from petab_gui.utils import get_selected_rows
+from petab_gui.views.plot_rendering import PlotSet, copy_axes_to_figure
+from petab_gui.views.simple_plot_view import (
+    LazyPlotTab,
+    MeasurementHighlighter,
+    MeasurementPlotter,
+)
+
+_qapp = QApplication.instance() or QApplication([])
+
+
+class TestLazyPlotTab(unittest.TestCase):
+    """Test showing cached figures on new and reused canvases."""
+
+    def setUp(self):
+        self.plotter = QWidget()
+        self.addCleanup(self.plotter.deleteLater)
+
+    @staticmethod
+    def _figure():
+        fig = Figure(figsize=(2, 2), dpi=100)
+        fig.subplots().plot([0, 1], [0, 1])
+        return fig
+
+    def test_device_pixel_ratio_applied_once(self):
+        """Test a cached figure is scaled once in a new and reused canvas."""
+        cached, other = self._figure(), self._figure()
+        tab = LazyPlotTab(lambda: cached)
+        self.addCleanup(tab.deleteLater)
+
+        # First shown in a new canvas, on a screen with ratio 2
+        canvas = tab.materialize(self.plotter)
+        canvas._set_device_pixel_ratio(2)
+        self.assertEqual(cached.dpi, 200)
+
+        tab.reset(lambda: other)
+        self.assertIs(tab.materialize(self.plotter), canvas)
+        self.assertEqual(other.dpi, 200)
+
+        # Shown again in the reused canvas
+        tab.reset(lambda: cached)
+        self.assertIs(tab.materialize(self.plotter), canvas)
+        self.assertIs(canvas.figure, cached)
+        self.assertEqual(cached.dpi, 200)
+
+        # And in a new canvas of another tab
+        new_tab = LazyPlotTab(lambda: cached)
+        self.addCleanup(new_tab.deleteLater)
+        new_canvas = new_tab.materialize(self.plotter)
+        new_canvas._set_device_pixel_ratio(2)
+        self.assertEqual(cached.dpi, 200)
+
+
+class TestMeasurementPlotter(unittest.TestCase):
+    """Test switching the grouping of the plots."""
+
+    def setUp(self):
+        self.plotter = MeasurementPlotter()
+        self.addCleanup(self.plotter.deleteLater)
+        for table in self.plotter._cache_valid:
+            self.plotter._cache_valid[table] = True
+            self.plotter._df_fingerprint[table] = f"{table} fingerprint"
+
+    def test_cached_grouping_plotted_at_once(self):
+        """Test only groupings without cached figures are debounced."""
+        plotter = self.plotter
+        plotter.options_manager.set_option("observable")
+        plotter._render_cache.put(
+            plotter._render_cache_key("observable"), PlotSet(Figure())
+        )
+        with (
+            mock.patch.object(plotter, "plot_it") as plot_it,
+            mock.patch.object(plotter, "_debounced_plot") as debounced,
+        ):
+            plotter._plot_if_cached()
+            plot_it.assert_called_once()
+            debounced.assert_not_called()
+
+            plotter.options_manager.set_option("dataset")
+            plotter._plot_if_cached()
+            plot_it.assert_called_once()
+            debounced.assert_called_once()
+
+            # Edited tables are not cached yet
+            plotter.options_manager.set_option("observable")
+            plotter._invalidate_cache("measurements")
+            plotter._plot_if_cached()
+            plot_it.assert_called_once()
+            self.assertEqual(debounced.call_count, 2)
+
+    def test_cached_subplot_figures(self):
+        """Test cached plot sets show their subplot figures again."""
+        plotter = self.plotter
+        figure = Figure()
+        for ax in figure.subplots(1, 2):
+            ax.plot([0, 1], [0, 1], label="obs")
+        plot_set = PlotSet(figure)
+        plotter._render_cache.put("key", plot_set)
+        nbytes = plotter._render_cache.nbytes
+
+        with mock.patch(
+            "petab_gui.views.plot_rendering.copy_axes_to_figure",
+            wraps=copy_axes_to_figure,
+        ) as copy_axes:
+            plotter._update_tabs(plot_set)
+            plotter.tab_widget.setCurrentIndex(2)
+            sub_fig = plotter.tab_widget.widget(2).canvas.figure
+            self.assertIs(plot_set.subplot_figures[1], sub_fig)
+
+            # Another plot set in between, then the cached one again
+            plotter._update_tabs(PlotSet(Figure()))
+            plotter._update_tabs(plot_set)
+            plotter.tab_widget.setCurrentIndex(2)
+            self.assertIs(plotter.tab_widget.widget(2).canvas.figure, sub_fig)
+        copy_axes.assert_called_once()
+        # The copy is counted for the size of the cache
+        self.assertGreater(plotter._render_cache.nbytes, nbytes)
+        # Highlights are shown on the cached figure
+        self.assertIn(
+            sub_fig.axes[0],
+            [
+                scatter.axes
+                for scatter in plotter.highlighter.highlight_scatters[1]
+            ],
+        )
+
+
+class TestMeasurementHighlighter(unittest.TestCase):
+    """Test blitting the highlights over the cached background."""
+
+    def setUp(self):
+        self.figure = Figure(figsize=(3, 2), dpi=100)
+        self.ax = self.figure.subplots()
+        self.ax.set_xlim(0, 1)
+        self.ax.set_ylim(0, 1)
+        self.canvas = FigureCanvasQTAgg(self.figure)
+        self.addCleanup(self.canvas.deleteLater)
+        self.highlighter = MeasurementHighlighter()
+        self.highlighter.register_subplot(self.ax, 0)
+        self.highlighter.connect_canvas(self.canvas)
+        self.canvas.draw()
+        self.scatter = self.highlighter.highlight_scatters[0][0]
+
+    def highlighted_pixels(self, x=0.5, y=0.5):
+        """Count the dark pixels around a point in the rendered canvas."""
+        buffer = np.asarray(self.canvas.buffer_rgba())
+        px, py = self.ax.transData.transform((x, y))
+        row, column = int(buffer.shape[0] - py), int(px)
+        region = buffer[row - 10 : row + 10, column - 10 : column + 10, :3]
+        return int((region.max(axis=2) < 100).sum())
+
+    def test_update_blits(self):
+        """Test an update restores the background and draws the scatter."""
+        background = self.highlighter._backgrounds[self.canvas]
+        self.assertEqual(self.highlighted_pixels(), 0)
+        with (
+            mock.patch.object(self.canvas, "draw_idle") as draw_idle,
+            mock.patch.object(
+                self.canvas, "restore_region", wraps=self.canvas.restore_region
+            ) as restore_region,
+            mock.patch.object(
+                self.figure, "draw_artist", wraps=self.figure.draw_artist
+            ) as draw_artist,
+            mock.patch.object(
+                self.canvas, "blit", wraps=self.canvas.blit
+            ) as blit,
+        ):
+            self.highlighter.update_highlight(0, [[0.5, 0.5]])
+        draw_idle.assert_not_called()
+        restore_region.assert_called_once_with(background)
+        draw_artist.assert_called_once_with(self.scatter)
+        blit.assert_called_once()
+        self.assertGreater(self.highlighted_pixels(), 0)
+
+        # Moving the highlight restores the background below the old one
+        self.highlighter.update_highlight(0, [[0.2, 0.2]])
+        self.assertEqual(self.highlighted_pixels(), 0)
+        self.assertGreater(self.highlighted_pixels(0.2, 0.2), 0)
+
+    def test_full_redraw(self):
+        """Test a full redraw caches a new background with the highlights."""
+        self.highlighter.update_highlight(0, [[0.5, 0.5]])
+        background = self.highlighter._backgrounds[self.canvas]
+
+        # Resized, e.g. by the layout of the plot dock
+        self.figure.set_size_inches(4, 3)
+        self.canvas.draw()
+        self.assertIsNot(
+            self.highlighter._backgrounds[self.canvas], background
+        )
+        self.assertGreater(self.highlighted_pixels(), 0)
+
+        # The cached background has no highlights
+        self.highlighter.update_highlight(0, [])
+        self.assertEqual(self.highlighted_pixels(), 0)
+
+
+class TestSelectionHighlights(unittest.TestCase):
+    """Test highlighting the plotted points of selected table rows."""
+
+    def setUp(self):
+        self.df = pd.DataFrame(
+            {
+                "observableId": ["obs_a", "obs_b", "obs_a", "obs_b"],
+                "simulationConditionId": ["c"] * 4,
+                "time": [0, 1, "soon", 3],
+                "measurement": [1.0, 2.0, 3.0, "n/a"],
+            }
+        )
+        self.proxy = PandasTableFilterProxy(MeasurementModel(self.df))
+        self.table_view = QTableView()
+        self.addCleanup(self.table_view.deleteLater)
+        self.table_view.setModel(self.proxy)
+        self.plotter = MeasurementPlotter()
+        self.addCleanup(self.plotter.deleteLater)
+        self.plotter.meas_proxy = self.proxy
+        self.plotter.observable_to_subplot = {"obs_a": 0, "obs_b": 1}
+
+    def select(self, *ranges):
+        """Select the cells of ``(top, left, bottom, right)`` ranges."""
+        selection = QItemSelection()
+        for top, left, bottom, right in ranges:
+            selection.select(
+                self.proxy.index(top, left), self.proxy.index(bottom, right)
+            )
+        self.table_view.selectionModel().select(
+            selection, QItemSelectionModel.Select
+        )
+
+    def highlights(self):
+        """Highlight the selection, return the points by subplot."""
+        coordinator = SimpleNamespace(
+            _updating_from_plot=False, plotter=self.plotter
+        )
+        with mock.patch.object(
+            self.plotter.highlighter, "update_highlight"
+        ) as update_highlight:
+            PlotCoordinator._handle_table_selection_changed(
+                coordinator, self.table_view
+            )
+        return {
+            call.args[0]: call.args[1]
+            for call in update_highlight.call_args_list
+        }
+
+    def test_selected_rows(self):
+        """Test overlapping ranges give each selected row once."""
+        # Row 4 is the "New row..." placeholder
+        self.select((0, 0, 1, 0), (1, 2, 4, 3))
+        np.testing.assert_array_equal(
+            get_selected_rows(self.table_view), [0, 1, 2, 3, 4]
+        )
+
+    def test_grouped_by_observable(self):
+        """Test the selected points are highlighted in their subplots."""
+        self.select((0, 0, 1, 0), (1, 2, 4, 3))
+        highlights = self.highlights()
+        self.assertEqual(set(highlights), {0, 1})
+        np.testing.assert_array_equal(highlights[0], [[0, 1], [np.nan, 3]])
+        np.testing.assert_array_equal(highlights[1], [[1, 2], [3, np.nan]])
+
+        # Observables without a subplot are skipped
+        self.plotter.observable_to_subplot = {"obs_b": 1}
+        self.assertEqual(set(self.highlights()), {1})
+
+    def test_non_numeric_cells(self):
+        """Test cells that are not numbers do not raise."""
+        self.plotter._df_cache["measurements"] = self.df
+        self.plotter._cache_valid["measurements"] = True
+        self.select((2, 0, 3, 0))
+        highlights = self.highlights()
+        np.testing.assert_array_equal(highlights[0], [[np.nan, 3]])
+        np.testing.assert_array_equal(highlights[1], [[3, np.nan]])
+
+        self.assertEqual(self.plotter.rows_for_point(1, 2, "obs_b"), [1])
+        self.assertEqual(self.plotter.rows_for_point(3, 3, "obs_a"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""Tests for the persistent simulation cache in simulation_cache.py."""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+import petab.v1 as petab
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from petab_gui.simulation_cache import SimulationCache, problem_fingerprint
+
+EXAMPLE_YAML = (
+    Path(__file__).parent.parent
+    / "src"
+    / "petab_gui"
+    / "example"
+    / "Boehm"
+    / "problem.yaml"
+)
+
+
+class TestProblemFingerprint(unittest.TestCase):
+    """Test which changes of a problem change its fingerprint."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the Boehm example problem once."""
+        cls.problem = petab.Problem.from_yaml(EXAMPLE_YAML)
+        cls.fingerprint = problem_fingerprint(cls.problem)
+
+    def changed(self, table, row, column, value):
+        """Fingerprint of the problem with one changed table cell."""
+        attribute = f"{table}_df"
+        df = getattr(self.problem, attribute).copy()
+        df.loc[row, column] = value
+        problem = petab.Problem(
+            condition_df=self.problem.condition_df,
+            measurement_df=self.problem.measurement_df,
+            observable_df=self.problem.observable_df,
+            parameter_df=self.problem.parameter_df,
+            model=self.problem.model,
+        )
+        setattr(problem, attribute, df)
+        return problem_fingerprint(problem)
+
+    def test_stable(self):
+        """Test the same problem gives the same fingerprint."""
+        problem = petab.Problem.from_yaml(EXAMPLE_YAML)
+        self.assertEqual(problem_fingerprint(problem), self.fingerprint)
+        self.assertNotEqual(
+            problem_fingerprint(problem, "other simulator"), self.fingerprint
+        )
+
+    def test_simulation_inputs_change_fingerprint(self):
+        """Test nominal values, conditions and time points are covered."""
+        parameter_id = self.problem.parameter_df.index[0]
+        condition_id = self.problem.condition_df.index[0]
+        for args in (
+            ("parameter", parameter_id, petab.C.NOMINAL_VALUE, 0.123),
+            ("condition", condition_id, "ratio", 0.5),
+            ("measurement", 0, petab.C.TIME, 1234.0),
+        ):
+            with self.subTest(table=args[0]):
+                self.assertNotEqual(self.changed(*args), self.fingerprint)
+
+    def test_measured_values_keep_fingerprint(self):
+        """Test measured values do not affect the fingerprint."""
+        self.assertEqual(
+            self.changed("measurement", 0, petab.C.MEASUREMENT, 1234.0),
+            self.fingerprint,
+        )
+
+
+class TestSimulationCache(unittest.TestCase):
+    """Test storing and evicting simulation tables."""
+
+    def setUp(self):
+        """Create a cache in a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        measurement_df = petab.Problem.from_yaml(EXAMPLE_YAML).measurement_df
+        self.sim_df = measurement_df.rename(
+            columns={petab.C.MEASUREMENT: petab.C.SIMULATION}
+        )
+        self.cache = SimulationCache(self.directory.name, 10 * 1024**2)
+
+    def test_round_trip(self):
+        """Test a stored table is returned unchanged."""
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.put("a", self.sim_df)
+        pd.testing.assert_frame_equal(self.cache.get("a"), self.sim_df)
+        self.assertEqual(self.cache.stats()[0], 1)
+
+    def test_lru_eviction(self):
+        """Test least recently used entries are evicted over the cap."""
+        self.cache.put("a", self.sim_df)
+        entry_size = self.cache.stats()[1]
+        self.cache.set_max_bytes(2 * entry_size)
+        self.cache.put("b", self.sim_df)
+        # Make the use order unambiguous despite coarse file times
+        os.utime(self.cache._path("a"), (0, 0))
+        os.utime(self.cache._path("b"), (1, 1))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.cache.put("c", self.sim_df)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNotNone(self.cache.get("c"))
+
+    def test_clear_and_disable(self):
+        """Test clearing removes all entries and size 0 disables caching."""
+        self.cache.put("a", self.sim_df)
+        self.cache.clear()
+        self.assertEqual(self.cache.stats(), (0, 0))
+        self.cache.set_max_bytes(0)
+        self.cache.put("a", self.sim_df)
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.stats(), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,443 @@
+"""Tests for running simulations in simulation.py and simulation_runner.py."""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import petab.v1 as petab
+
+# Widgets need a platform, also without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from PySide6.QtWidgets import QApplication
+
+from petab_gui import simulation
+from petab_gui.controllers.simulation_runner import SimulationRunner
+from petab_gui.simulation import (
+    SimulationSnapshot,
+    close_session,
+    reusable_simulations,
+    simulate_incremental,
+    simulate_split,
+    split_problem,
+)
+from petab_gui.simulators import BasicoBackend, SimulatorBackend
+
+_qapp = QApplication.instance() or QApplication([])
+
+EXAMPLE_YAML = (
+    Path(__file__).parent.parent
+    / "src"
+    / "petab_gui"
+    / "example"
+    / "Boehm"
+    / "problem.yaml"
+)
+
+
+def simulate_ok(petab_problem, report_progress):
+    """Report progress and return a table built from the problem."""
+    for done in range(3):
+        report_progress(done, 3, f"step {done}")
+    report_progress(3, 3, "rows", pd.DataFrame({"simulation": [0.5]}))
+    return pd.DataFrame({"simulation": [petab_problem]})
+
+
+def simulate_error(petab_problem, report_progress):
+    """Fail in the worker process."""
+    raise ValueError("broken model")
+
+
+def add(a, b):
+    """A function that does not report progress."""
+    return a + b
+
+
+def simulate_crash(petab_problem, report_progress):
+    """Kill the worker process."""
+    os._exit(3)
+
+
+def simulate_forever(petab_problem, report_progress):
+    """Never finish."""
+    report_progress(0, 1, "started")
+    while True:
+        time.sleep(0.1)
+
+
+class MarkCancelledBackend(SimulatorBackend):
+    """Writes a file when it is cancelled."""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+
+    def cancel(self):
+        """Write the file."""
+        Path(self.path).write_text("cancelled")
+
+
+def simulate_until_cancelled(path, report_progress):
+    """Never finish, with a session backend marking the cancel in path."""
+    simulation._session_backends["mark", None] = MarkCancelledBackend(path)
+    simulate_forever(None, report_progress)
+
+
+class TestSimulationRunner(unittest.TestCase):
+    """Test running simulations in a worker process."""
+
+    def run_until(self, runner, condition, timeout=60):
+        """Process events until ``condition`` holds."""
+        start = time.time()
+        while not condition() and time.time() - start < timeout:
+            _qapp.processEvents()
+            time.sleep(0.01)
+        self.assertTrue(condition(), "Timed out waiting for the runner")
+
+    def connect(self, runner):
+        """Record all signals of the runner."""
+        events = []
+        runner.progress.connect(
+            lambda *args: events.append(("progress", args))
+        )
+        runner.partial_result.connect(
+            lambda df: events.append(("partial", df))
+        )
+        runner.finished.connect(lambda df: events.append(("finished", df)))
+        runner.failed.connect(lambda error: events.append(("failed", error)))
+        runner.cancelled.connect(lambda: events.append(("cancelled", None)))
+        return events
+
+    def test_result_and_progress(self):
+        """Test progress is reported before the result is delivered."""
+        runner = SimulationRunner(simulate_ok)
+        events = self.connect(runner)
+        runner.start(1.5)
+        self.assertTrue(runner.is_running())
+        with self.assertRaises(RuntimeError):
+            runner.start(1.5)
+        self.run_until(runner, lambda: not runner.is_running())
+
+        kinds = [kind for kind, _ in events]
+        self.assertEqual(
+            kinds, ["progress"] * 3 + ["partial", "progress", "finished"]
+        )
+        self.assertEqual(events[1][1], (1, 3, "step 1"))
+        self.assertEqual(events[3][1]["simulation"].tolist(), [0.5])
+        self.assertEqual(events[-1][1]["simulation"].tolist(), [1.5])
+
+    def test_process_kept(self):
+        """Test the worker process is re-used for the next simulation."""
+        runner = SimulationRunner(simulate_ok)
+        self.addCleanup(runner.shutdown)
+        events = self.connect(runner)
+        runner.start(1.5)
+        self.run_until(runner, lambda: not runner.is_running())
+        process = runner._process
+        runner.start(2.5)
+        self.assertIs(runner._process, process)
+        self.run_until(runner, lambda: not runner.is_running())
+        self.assertEqual(events[-1][1]["simulation"].tolist(), [2.5])
+
+        runner.shutdown()
+        self.assertFalse(process.is_alive())
+        self.assertIsNone(runner._process)
+
+    def test_wait(self):
+        """Test waiting blocks until the result was emitted."""
+        runner = SimulationRunner(simulate_ok)
+        self.addCleanup(runner.shutdown)
+        events = self.connect(runner)
+        runner.start(1.5)
+        runner.wait()
+        self.assertFalse(runner.is_running())
+        self.assertEqual(events[-1][0], "finished")
+        self.assertEqual(events[-1][1]["simulation"].tolist(), [1.5])
+
+    def test_run(self):
+        """Test other functions run in the same worker process."""
+        runner = SimulationRunner(simulate_ok)
+        self.addCleanup(runner.shutdown)
+        events = self.connect(runner)
+        runner.start(1.5)
+        runner.wait()
+        process = runner._process
+        runner.run(add, 1, 2)
+        runner.wait()
+        self.assertIs(runner._process, process)
+        self.assertEqual(events[-1], ("finished", 3))
+
+    def test_error(self):
+        """Test errors in the worker are reported with their traceback."""
+        runner = SimulationRunner(simulate_error)
+        events = self.connect(runner)
+        runner.start(None)
+        self.run_until(runner, lambda: not runner.is_running())
+        self.assertEqual(events[-1][0], "failed")
+        self.assertIn("ValueError: broken model", events[-1][1])
+
+    def test_worker_died(self):
+        """Test a dead worker fails the simulation without blocking."""
+        runner = SimulationRunner(simulate_crash)
+        events = self.connect(runner)
+        runner.start(None)
+        process = runner._process
+        process.join(timeout=60)
+        self.assertFalse(process.is_alive())
+
+        start = time.time()
+        runner._poll()
+        self.assertLess(time.time() - start, 0.5)
+        self.run_until(runner, lambda: not runner.is_running())
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0][0], "failed")
+        self.assertIn("code 3", events[0][1])
+
+    def test_exit_message(self):
+        """Test the message of a dead worker is set by the runner."""
+        runner = SimulationRunner(
+            simulate_crash, exit_message="Converter died ({exitcode})"
+        )
+        events = self.connect(runner)
+        runner.start(None)
+        self.run_until(runner, lambda: not runner.is_running())
+        self.assertEqual(events, [("failed", "Converter died (3)")])
+
+    def test_cancel(self):
+        """Test cancelling stops the worker process."""
+        runner = SimulationRunner(simulate_forever)
+        events = self.connect(runner)
+        runner.start(None)
+        self.run_until(runner, lambda: events)
+        process = runner._process
+        runner.cancel()
+        self.assertFalse(runner.is_running())
+        self.assertFalse(process.is_alive())
+        self.assertEqual(events[-1][0], "cancelled")
+
+    @unittest.skipIf(sys.platform == "win32", "terminate sends no SIGTERM")
+    def test_cancel_backends(self):
+        """Test cancelling calls cancel of the backends of the worker."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / "cancelled"
+        runner = SimulationRunner(simulate_until_cancelled)
+        events = self.connect(runner)
+        runner.start(str(path))
+        self.run_until(runner, lambda: events)
+        runner.cancel()
+        self.assertEqual(path.read_text(), "cancelled")
+
+
+class TestSplitProblem(unittest.TestCase):
+    """Test splitting a problem into condition pairs."""
+
+    def test_split_by_condition_pair(self):
+        """Test each measurement ends up in exactly one sub-problem."""
+        problem = petab.Problem.from_yaml(EXAMPLE_YAML)
+        measurement_df = problem.measurement_df.copy()
+        measurement_df[petab.C.PREEQUILIBRATION_CONDITION_ID] = ""
+        measurement_df.loc[::2, petab.C.PREEQUILIBRATION_CONDITION_ID] = (
+            "model1_data1"
+        )
+        problem.measurement_df = measurement_df.sample(frac=1, random_state=0)
+
+        sub_problems = split_problem(problem)
+        self.assertEqual(
+            {key for key, _, _ in sub_problems},
+            {("", "model1_data1"), ("model1_data1", "model1_data1")},
+        )
+        positions = sorted(
+            position
+            for _, group_positions, _ in sub_problems
+            for position in group_positions
+        )
+        self.assertEqual(positions, list(range(len(measurement_df))))
+        for key, group_positions, sub_problem in sub_problems:
+            expected = problem.measurement_df.iloc[group_positions]
+            pd.testing.assert_frame_equal(
+                sub_problem.measurement_df,
+                expected.reset_index(drop=True),
+            )
+            self.assertEqual(list(sub_problem.condition_df.index), [key[1]])
+
+
+class TestSessionBackends(unittest.TestCase):
+    """Test re-using prepared backends for condition pairs."""
+
+    @unittest.skipUnless(BasicoBackend.is_available(), "needs basico")
+    def test_prepared_once_per_condition_pair(self):
+        """Test edited problems do not import the pairs into COPASI again."""
+        problem = petab.Problem.from_yaml(EXAMPLE_YAML)
+        problem.condition_df = pd.concat(
+            [
+                problem.condition_df,
+                problem.condition_df.rename(index={"model1_data1": "other"}),
+            ]
+        )
+        problem.measurement_df = problem.measurement_df.copy()
+        problem.measurement_df.loc[::2, petab.C.SIMULATION_CONDITION_ID] = (
+            "other"
+        )
+        edited = petab.Problem(
+            condition_df=problem.condition_df,
+            measurement_df=problem.measurement_df,
+            observable_df=problem.observable_df,
+            parameter_df=problem.parameter_df.copy(),
+            model=problem.model,
+        )
+        parameter_id = problem.parameter_df.index[0]
+        edited.parameter_df.loc[parameter_id, petab.C.NOMINAL_VALUE] *= 2
+
+        close_session()
+        self.addCleanup(close_session)
+        prepare = BasicoBackend.prepare
+        # A thread shares the session, like a worker getting all pairs
+        with (
+            ThreadPoolExecutor(1) as pool,
+            mock.patch("petab_gui.simulation.session_pool", return_value=pool),
+            mock.patch.object(
+                BasicoBackend, "prepare", autospec=True, side_effect=prepare
+            ) as mock_prepare,
+        ):
+            sim_df = simulate_split(problem, max_workers=2, backend="basico")
+            self.assertEqual(mock_prepare.call_count, 2)
+            simulate_split(edited, max_workers=2, backend="basico")
+            simulate_split(problem, max_workers=2, backend="basico")
+            self.assertEqual(mock_prepare.call_count, 2)
+
+            # Only the pair of the edited condition is imported again
+            renamed = petab.Problem(
+                condition_df=problem.condition_df.copy(),
+                measurement_df=problem.measurement_df,
+                observable_df=problem.observable_df,
+                parameter_df=problem.parameter_df,
+                model=problem.model,
+            )
+            renamed.condition_df.loc["other", petab.C.CONDITION_NAME] = "new"
+            snapshot = SimulationSnapshot(problem, sim_df, backend="basico")
+            reused = reusable_simulations(renamed, snapshot, backend="basico")
+            self.assertEqual(len(reused), len(sim_df) // 2)
+            pd.testing.assert_frame_equal(
+                simulate_incremental(
+                    renamed, reused=reused, max_workers=2, backend="basico"
+                ),
+                sim_df,
+                check_dtype=False,
+            )
+            self.assertEqual(mock_prepare.call_count, 3)
+
+
+class TestIncrementalSimulation(unittest.TestCase):
+    """Test re-using the simulations of unchanged measurements."""
+
+    def setUp(self):
+        """Take a snapshot of fake simulations of the Boehm problem."""
+        self.problem = petab.Problem.from_yaml(EXAMPLE_YAML)
+        self.sim_df = self.problem.measurement_df.rename(
+            columns={petab.C.MEASUREMENT: petab.C.SIMULATION}
+        )
+        self.sim_df[petab.C.SIMULATION] = range(len(self.sim_df))
+        self.snapshot = SimulationSnapshot(self.problem, self.sim_df)
+
+    def edited(self, table, row, column, value):
+        """Copy of the problem with one changed table cell."""
+        problem = petab.Problem(
+            condition_df=self.problem.condition_df.copy(),
+            measurement_df=self.problem.measurement_df.copy(),
+            observable_df=self.problem.observable_df.copy(),
+            parameter_df=self.problem.parameter_df.copy(),
+            model=self.problem.model,
+        )
+        getattr(problem, f"{table}_df").loc[row, column] = value
+        return problem
+
+    def test_unchanged_problem(self):
+        """Test all simulations are re-used without simulating."""
+        reused = reusable_simulations(self.problem, self.snapshot)
+        self.assertEqual(len(reused), len(self.sim_df))
+        sim_df = simulate_incremental(self.problem, reused=reused)
+        pd.testing.assert_frame_equal(sim_df, self.sim_df, check_dtype=False)
+
+    def test_changed_time_point(self):
+        """Test only the edited measurement is re-simulated."""
+        problem = self.edited("measurement", 3, petab.C.TIME, 1234.0)
+        reused = reusable_simulations(problem, self.snapshot)
+        self.assertNotIn(3, reused.index)
+        self.assertEqual(len(reused), len(self.sim_df) - 1)
+        self.assertEqual(reused[4], 4)
+
+    def test_changed_observable(self):
+        """Test the measurements of an edited observable are re-simulated."""
+        observable_id = self.problem.observable_df.index[0]
+        problem = self.edited(
+            "observable", observable_id, petab.C.OBSERVABLE_FORMULA, "2"
+        )
+        reused = reusable_simulations(problem, self.snapshot)
+        is_edited = (
+            self.problem.measurement_df[petab.C.OBSERVABLE_ID] == observable_id
+        ).to_numpy()
+        self.assertEqual(
+            sorted(reused.index), list(np.flatnonzero(~is_edited))
+        )
+
+    def test_changed_parameters_invalidate_all(self):
+        """Test edited parameters require simulating everything."""
+        parameter_id = self.problem.parameter_df.index[0]
+        for args in (
+            ("parameter", parameter_id, petab.C.NOMINAL_VALUE, 0.123),
+            ("condition", "model1_data1", "ratio", 0.5),
+        ):
+            with self.subTest(table=args[0]):
+                problem = self.edited(*args)
+                self.assertTrue(
+                    reusable_simulations(problem, self.snapshot).empty
+                )
+
+    def test_missing_simulations(self):
+        """Test measurements a cancelled simulation missed are simulated."""
+        self.sim_df.loc[[2, 5], petab.C.SIMULATION] = np.nan
+        snapshot = SimulationSnapshot(self.problem, self.sim_df)
+        reused = reusable_simulations(self.problem, snapshot)
+        self.assertEqual(len(reused), len(self.sim_df) - 2)
+        self.assertNotIn(2, reused.index)
+        self.assertNotIn(5, reused.index)
+
+    def test_partial_results(self):
+        """Test re-used and simulated rows are reported at their positions."""
+        problem = self.edited("measurement", 3, petab.C.TIME, 1234.0)
+        reused = reusable_simulations(problem, self.snapshot)
+        partial_dfs = []
+
+        def report_progress(done, total, message, partial_df=None):
+            if partial_df is not None:
+                partial_dfs.append(partial_df)
+
+        sim_df = simulate_incremental(
+            problem, report_progress, reused=reused, backend="scipy"
+        )
+        self.assertEqual(len(partial_dfs), 2)
+        self.assertEqual(list(partial_dfs[1].index), [3])
+        pd.testing.assert_frame_equal(
+            pd.concat(partial_dfs).sort_index(), sim_df, check_dtype=False
+        )
+
+    def test_edited_in_place(self):
+        """Test edits of the simulated tables themselves are detected."""
+        parameter_id = self.problem.parameter_df.index[0]
+        self.problem.parameter_df.loc[parameter_id, petab.C.NOMINAL_VALUE] = 2
+        reused = reusable_simulations(self.problem, self.snapshot)
+        self.assertTrue(reused.empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,242 @@
+"""Tests for the simulator backends in petab_gui.simulators."""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import libsbml
+import numpy as np
+import petab.v1 as petab
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from petab_gui.simulation import session_backend
+from petab_gui.simulators import (
+    BasicoBackend,
+    ScipyBackend,
+    backends,
+    get_backend,
+    required_capabilities,
+)
+
+EXAMPLE_YAML = (
+    Path(__file__).parent.parent
+    / "src"
+    / "petab_gui"
+    / "example"
+    / "Simple_Conversion"
+    / "problem.yaml"
+)
+BOEHM_YAML = EXAMPLE_YAML.parent.parent / "Boehm" / "problem.yaml"
+
+
+class TestRegistry(unittest.TestCase):
+    """Test looking up backends by name."""
+
+    def test_builtin_backends(self):
+        """Test both built-in backends are registered."""
+        self.assertIn("basico", backends())
+        self.assertIsInstance(get_backend("scipy"), ScipyBackend)
+        self.assertFalse(get_backend("scipy").capabilities()["events"])
+
+    def test_unknown_backend(self):
+        """Test unknown names raise."""
+        with self.assertRaises(ValueError):
+            get_backend("unknown")
+
+
+class TestScipyBackend(unittest.TestCase):
+    """Test the SciPy backend on the A -> B conversion example."""
+
+    def setUp(self):
+        """Load the example, with k_conversion = 0.1 and A(0) = 10."""
+        self.problem = petab.Problem.from_yaml(EXAMPLE_YAML)
+        self.backend = ScipyBackend()
+
+    def expected(self, measurement_df, k_conversion=0.1):
+        """Analytic solution of the conversion."""
+        a = 10 * np.exp(-k_conversion * measurement_df[petab.C.TIME])
+        return np.where(
+            measurement_df[petab.C.OBSERVABLE_ID] == "obs_A", a, 10 - a
+        )
+
+    def test_matches_analytic_solution(self):
+        """Test the simulation table holds the analytic solution."""
+        self.backend.prepare(self.problem)
+        sim_df = self.backend.simulate()
+        np.testing.assert_allclose(
+            sim_df[petab.C.SIMULATION],
+            self.expected(self.problem.measurement_df),
+            rtol=1e-6,
+            atol=1e-9,
+        )
+        self.assertEqual(
+            list(sim_df.drop(columns=petab.C.SIMULATION).columns),
+            list(
+                self.problem.measurement_df.drop(columns=petab.C.MEASUREMENT)
+            ),
+        )
+
+    def test_condition_override(self):
+        """Test parameters set in the condition table are used."""
+        self.problem.condition_df["k_conversion"] = 0.2
+        self.backend.prepare(self.problem)
+        np.testing.assert_allclose(
+            self.backend.simulate()[petab.C.SIMULATION],
+            self.expected(self.problem.measurement_df, 0.2),
+            rtol=1e-6,
+            atol=1e-9,
+        )
+
+    def test_steady_state(self):
+        """Test preequilibration and measurements at time ``inf``."""
+        measurement_df = self.problem.measurement_df.copy()
+        measurement_df[petab.C.PREEQUILIBRATION_CONDITION_ID] = "cond_1"
+        measurement_df.loc[measurement_df.index[-1], petab.C.TIME] = np.inf
+        self.problem.measurement_df = measurement_df
+
+        self.backend.prepare(self.problem)
+        simulations = self.backend.simulate()[petab.C.SIMULATION]
+        # After preequilibration, all of A is converted to B
+        expected = np.where(
+            measurement_df[petab.C.OBSERVABLE_ID] == "obs_A", 0, 10
+        )
+        np.testing.assert_allclose(simulations, expected, atol=1e-5)
+
+    def test_unsupported_model(self):
+        """Test models with events are rejected when preparing."""
+        document = libsbml.readSBMLFromString(self.problem.model.to_sbml_str())
+        event = document.getModel().createEvent()
+        event.setId("event")
+        self.problem.model = petab.models.sbml_model.SbmlModel(
+            sbml_model=document.getModel(), sbml_document=document
+        )
+        with self.assertRaisesRegex(ValueError, "events"):
+            self.backend.prepare(self.problem)
+
+    def test_required_capabilities(self):
+        """Test the features a problem uses are detected."""
+        self.assertFalse(
+            required_capabilities(self.problem)
+            & {"events", "algebraic_rules", "steady_state"}
+        )
+        document = libsbml.readSBMLFromString(self.problem.model.to_sbml_str())
+        document.getModel().createEvent().setId("event")
+        self.problem.model = petab.models.sbml_model.SbmlModel(
+            sbml_model=document.getModel(), sbml_document=document
+        )
+        measurement_df = self.problem.measurement_df.copy()
+        measurement_df[petab.C.TIME] = np.inf
+        self.problem.measurement_df = measurement_df
+        required = required_capabilities(self.problem)
+        self.assertIn("events", required)
+        self.assertIn("steady_state", required)
+        self.assertFalse(ScipyBackend.capabilities()["events"])
+
+
+class TestSession(unittest.TestCase):
+    """Test re-using prepared backends for edited problems."""
+
+    def edited(self, problem, k_conversion):
+        """Copy of the problem with another nominal value."""
+        parameter_df = problem.parameter_df.copy()
+        parameter_df.loc["k_conversion", petab.C.NOMINAL_VALUE] = k_conversion
+        return petab.Problem(
+            condition_df=problem.condition_df,
+            measurement_df=problem.measurement_df,
+            observable_df=problem.observable_df,
+            parameter_df=parameter_df,
+            model=problem.model,
+        )
+
+    def test_model_kept_until_sbml_changes(self):
+        """Test the translated model is only replaced with a new model."""
+        problem = petab.Problem.from_yaml(EXAMPLE_YAML)
+        backend = session_backend("scipy", problem)
+        rhs = backend._rhs
+
+        edited = self.edited(problem, 0.2)
+        self.assertIs(session_backend("scipy", edited), backend)
+        self.assertIs(backend._rhs, rhs)
+        a = 10 * np.exp(-0.2 * problem.measurement_df[petab.C.TIME])
+        np.testing.assert_allclose(
+            backend.simulate()[petab.C.SIMULATION],
+            np.where(
+                problem.measurement_df[petab.C.OBSERVABLE_ID] == "obs_A",
+                a,
+                10 - a,
+            ),
+            rtol=1e-6,
+            atol=1e-9,
+        )
+
+        document = libsbml.readSBMLFromString(problem.model.to_sbml_str())
+        document.getModel().setName("renamed")
+        edited.model = petab.models.sbml_model.SbmlModel(
+            sbml_model=document.getModel(), sbml_document=document
+        )
+        session_backend("scipy", edited)
+        self.assertIsNot(backend._rhs, rhs)
+
+    def test_changed_nominal_values(self):
+        """Test COPASI is only updated in place for nominal values."""
+        problem = petab.Problem.from_yaml(EXAMPLE_YAML)
+        backend = BasicoBackend()
+        backend.prepare(problem)
+        self.assertEqual(
+            backend._changed_nominal_values(self.edited(problem, 0.2)),
+            {"k_conversion": 0.2},
+        )
+        self.assertEqual(backend._changed_nominal_values(problem), {})
+        edited = self.edited(problem, 0.1)
+        edited.condition_df = problem.condition_df.assign(k_conversion=0.2)
+        self.assertIsNone(backend._changed_nominal_values(edited))
+
+    @unittest.skipUnless(BasicoBackend.is_available(), "needs basico")
+    def test_nominal_values_set_by_id(self):
+        """Test COPASI parameters are found by ID, not by name."""
+        problem = petab.Problem.from_yaml(BOEHM_YAML)
+        document = libsbml.readSBMLFromString(problem.model.to_sbml_str())
+        model = document.getModel()
+        model.getParameter("k_phos").setName("phosphorylation")
+        # Another parameter named like the edited one
+        decoy = model.createParameter()
+        decoy.setId("decoy")
+        decoy.setName("k_phos")
+        decoy.setValue(1)
+        decoy.setConstant(True)
+        problem.model = petab.models.sbml_model.SbmlModel(
+            sbml_model=model, sbml_document=document
+        )
+        edited = petab.Problem(
+            condition_df=problem.condition_df,
+            measurement_df=problem.measurement_df,
+            observable_df=problem.observable_df,
+            parameter_df=problem.parameter_df.copy(),
+            model=problem.model,
+        )
+        edited.parameter_df.loc["k_phos", petab.C.NOMINAL_VALUE] *= 3
+
+        backend = BasicoBackend()
+        self.addCleanup(backend.close)
+        backend.update(problem)
+        backend.simulate()
+        with mock.patch.object(BasicoBackend, "prepare") as prepare:
+            backend.update(edited)
+            sim_df = backend.simulate()
+        prepare.assert_not_called()
+
+        imported = BasicoBackend()
+        self.addCleanup(imported.close)
+        imported.update(edited)
+        np.testing.assert_allclose(
+            sim_df[petab.C.SIMULATION],
+            imported.simulate()[petab.C.SIMULATION],
+            rtol=1e-4,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()